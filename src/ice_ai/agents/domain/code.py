@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import errno
+import mmap
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
 
 from ice_ai.agents.spec import AgentSpec
@@ -19,6 +24,7 @@ CODE_AGENT_SPEC = AgentSpec(
     capabilities={
         # filesystem
         "fs.read",
+        "fs.read.batch",
         "fs.write",
         "fs.exists",
         "fs.list",
@@ -33,6 +39,21 @@ CODE_AGENT_SPEC = AgentSpec(
 )
 
 
+# ============================================================
+# BULK READ LIMITS
+# ============================================================
+
+# Per-file / per-call byte caps of read_files (overridable per call)
+READ_MAX_FILE_BYTES = 1024 * 1024
+READ_MAX_TOTAL_BYTES = 16 * 1024 * 1024
+
+# Files at least this large are read through mmap (no buffered copy)
+MMAP_MIN_BYTES = 256 * 1024
+
+# Below this many paths a thread pool costs more than it saves
+READ_POOL_MIN_FILES = 4
+
+
 # ============================================================
 # RUNTIME AGENT (NOT USED BY INTROSPECTION)
 # ============================================================
@@ -52,11 +73,10 @@ class CodeAgent:
     def read_file(self, path: str) -> Dict[str, Any]:
         p = Path(path)
 
-        if not p.exists():
-            return {"ok": False, "error": "file_not_found", "path": path}
-
         try:
             content = p.read_text(encoding="utf-8", errors="ignore")
+        except FileNotFoundError:
+            return {"ok": False, "error": "file_not_found", "path": path}
         except Exception as exc:
             return {
                 "ok": False,
@@ -72,6 +92,61 @@ class CodeAgent:
             "length": len(content),
         }
 
+    def read_files(
+        self,
+        paths: Iterable[str],
+        *,
+        max_file_bytes: int = READ_MAX_FILE_BYTES,
+        max_total_bytes: int = READ_MAX_TOTAL_BYTES,
+        workers: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Read many files concurrently (I/O bound: threads, not processes).
+
+        Results keep the input order and have the read_file shape plus
+        "bytes" and "truncated". A file longer than `max_file_bytes` is
+        truncated; `max_total_bytes` is handed out in input order, so
+        the same inputs always yield the same contents. Files left
+        without budget fail with "total_limit_exceeded"; per-file
+        errors never fail the batch.
+        """
+        if max_file_bytes < 1 or max_total_bytes < 1:
+            return {
+                "ok": False,
+                "error": "invalid_limit",
+                "detail": "max_file_bytes and max_total_bytes must be >= 1",
+            }
+
+        paths = [os.fspath(p) for p in paths]
+        workers = workers or min(32, (os.cpu_count() or 1) + 4)
+
+        if workers <= 1 or len(paths) < READ_POOL_MIN_FILES:
+            sizes = [_stat_size(p, max_file_bytes) for p in paths]
+            budgets = _budgets(sizes, max_file_bytes, max_total_bytes)
+            files = [
+                _read_capped(p, size, budget)
+                for p, size, budget in zip(paths, sizes, budgets)
+            ]
+        else:
+            # stat first (one syscall per file, replaces exists()), so
+            # the total budget is assigned deterministically before reading
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                sizes = list(pool.map(
+                    _stat_size, paths, [max_file_bytes] * len(paths)
+                ))
+                budgets = _budgets(sizes, max_file_bytes, max_total_bytes)
+                files = list(pool.map(_read_capped, paths, sizes, budgets))
+
+        read = [f for f in files if f["ok"]]
+        return {
+            "ok": True,
+            "files": files,
+            "read": len(read),
+            "failed": len(files) - len(read),
+            "truncated": sum(1 for f in read if f["truncated"]),
+            "bytes": sum(f["bytes"] for f in read),
+        }
+
     def write_file(self, path: str, content: str) -> Dict[str, Any]:
         p = Path(path)
 
@@ -151,3 +226,121 @@ class CodeAgent:
             "length": len(code),
             "explanation": "Explanation stub.",
         }
+
+
+# ============================================================
+# BULK READ HELPERS
+# ============================================================
+
+def _stat_size(path: str, max_file_bytes: int) -> Any:
+    """
+    File size, or the OSError raised by stat (reported by _read_capped).
+
+    Files reporting st_size 0 (empty, or /proc and other special files
+    whose size is unknown) are read here, up to max_file_bytes + 1 bytes
+    so truncation is still detected: the bytes read stand in for the size.
+    """
+    try:
+        st = os.stat(path)
+    except OSError as exc:
+        return exc
+    if stat.S_ISDIR(st.st_mode):
+        return IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), path)
+    if st.st_size:
+        return st.st_size
+    try:
+        with open(path, "rb") as fh:
+            return fh.read(max_file_bytes + 1)
+    except OSError as exc:
+        return exc
+
+
+def _size_of(size: Any) -> int:
+    return len(size) if isinstance(size, bytes) else size
+
+
+def _budgets(
+    sizes: List[Any],
+    max_file_bytes: int,
+    max_total_bytes: int,
+) -> List[Optional[int]]:
+    """
+    Bytes each file may read, assigned in input order.
+    None = no budget left for a non-empty file.
+    """
+    remaining = max_total_bytes
+    budgets: List[Optional[int]] = []
+    for size in sizes:
+        if isinstance(size, OSError):
+            budgets.append(0)
+            continue
+        size = _size_of(size)
+        budget = min(size, max_file_bytes, remaining)
+        if size and not budget:
+            budgets.append(None)
+            continue
+        remaining -= budget
+        budgets.append(budget)
+    return budgets
+
+
+def _read_capped(path: str, size: Any, budget: Optional[int]) -> Dict[str, Any]:
+    if isinstance(size, FileNotFoundError):
+        return {"ok": False, "error": "file_not_found", "path": path}
+    if isinstance(size, OSError):
+        return {
+            "ok": False,
+            "error": "read_error",
+            "path": path,
+            "detail": str(size),
+        }
+    if budget is None:
+        return {
+            "ok": False,
+            "error": "total_limit_exceeded",
+            "path": path,
+            "size": _size_of(size),
+        }
+
+    if isinstance(size, bytes):
+        # already read by _stat_size
+        data = size[:budget]
+        content, read = data.decode("utf-8", errors="ignore"), len(data)
+        size = len(size)
+    else:
+        try:
+            content, read = _read_bytes(path, budget)
+        except FileNotFoundError:
+            return {"ok": False, "error": "file_not_found", "path": path}
+        except Exception as exc:
+            return {
+                "ok": False,
+                "error": "read_error",
+                "path": path,
+                "detail": str(exc),
+            }
+
+    return {
+        "ok": True,
+        "path": path,
+        "content": content,
+        "length": len(content),
+        "bytes": read,
+        "truncated": read < size,
+    }
+
+
+def _read_bytes(path: str, limit: int) -> Tuple[str, int]:
+    """
+    Decode at most `limit` bytes of the file (UTF-8, like read_file).
+    A multi-byte character cut by the limit is dropped.
+    """
+    with open(path, "rb") as fh:
+        # the file may have changed since stat: trust the open descriptor
+        limit = min(limit, os.fstat(fh.fileno()).st_size)
+        if limit < MMAP_MIN_BYTES:
+            data = fh.read(limit)
+            return data.decode("utf-8", errors="ignore"), len(data)
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm)[:limit] as view:
+                return str(view, "utf-8", "ignore"), len(view)
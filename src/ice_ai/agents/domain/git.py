@@ -1,9 +1,32 @@
 from __future__ import annotations
 
+import io
+import os
 import subprocess
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 
 from ice_ai.agents.spec import AgentSpec
+from ice_ai.agents.domain.git_churn import ChurnIndex
+from ice_ai.agents.domain.git_diff import iter_file_diffs, parse_name_status
+from ice_ai.agents.domain.git_refs import GitRefReader
+
+
+# Separatori usati nei formati --pretty per parsing streaming
+_RECORD_SEP = "\x1e"
+_FIELD_SEP = "\x1f"
+# riga di `git log --summary` per un file eliminato dal commit
+_DELETE_MODE = " delete mode "
+
+
+class _GitStreamError(Exception):
+    """
+    Errore interno di uno stream git (spawn fallito o exit code != 0).
+    Convertito in dict strutturato dalle API pubbliche.
+    """
+
+    def __init__(self, payload: Dict[str, Any]) -> None:
+        super().__init__(payload.get("error"))
+        self.payload = payload
 
 
 class GitAgent:
@@ -34,11 +57,19 @@ class GitAgent:
             "git.commit",
             "git.checkout",
             "git.branches",
+            "git.churn",
+            "git.show",
         },
         ui_label="Git",
         ui_group="domain",
     )
 
+    def __init__(self) -> None:
+        # Backend nativo per ref/HEAD: evita fork su chiamate frequenti
+        self._refs = GitRefReader()
+        # Indici churn già caricati, per path: query senza rilettura JSON
+        self._churn: Dict[str, ChurnIndex] = {}
+
     # ------------------------------------------------------------------
     # INTERNAL
     # ------------------------------------------------------------------
@@ -47,13 +78,23 @@ class GitAgent:
         self,
         repo: str,
         args: List[str],
+        *,
+        strip: bool = True,
+        binary: bool = False,
     ) -> Dict[str, Any]:
+        """
+        Esegue git catturando l'output.
+
+        `strip=False` conserva gli spazi iniziali (es. colonne di
+        `status --porcelain`); `binary=True` ritorna stdout in bytes,
+        intatto (contenuti di file).
+        """
         try:
             proc = subprocess.run(
                 ["git"] + args,
                 cwd=repo,
                 capture_output=True,
-                text=True,
+                text=not binary,
             )
         except Exception as exc:
             return {
@@ -62,24 +103,107 @@ class GitAgent:
                 "detail": str(exc),
             }
 
+        stdout, stderr = proc.stdout, proc.stderr
+        if binary:
+            stderr = stderr.decode("utf-8", "replace")
+        elif strip:
+            stdout = stdout.strip()
+
         return {
             "ok": proc.returncode == 0,
-            "stdout": proc.stdout.strip(),
-            "stderr": proc.stderr.strip(),
+            "stdout": stdout,
+            "stderr": stderr.strip(),
             "returncode": proc.returncode,
             "command": "git " + " ".join(args),
         }
 
+    def _stream(
+        self,
+        repo: str,
+        args: List[str],
+        sep: str = "\n",
+    ) -> Iterator[str]:
+        """
+        Esegue git e produce stdout riga per riga, senza bufferizzare.
+
+        Con `sep` diverso da newline (es. NUL per output `-z`) lo stdout
+        viene letto a blocchi e diviso sul separatore.
+
+        Il processo viene terminato se il consumer chiude il generatore
+        prima della fine dell'output.
+
+        Le righe terminano solo con "\n": un "\r" isolato nel contenuto
+        di un file resta dentro la riga (niente universal newlines).
+        """
+        command = "git " + " ".join(args)
+        try:
+            proc = subprocess.Popen(
+                ["git"] + args,
+                cwd=repo,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        except Exception as exc:
+            raise _GitStreamError(
+                {
+                    "ok": False,
+                    "error": "git_execution_failed",
+                    "detail": str(exc),
+                    "command": command,
+                }
+            )
+
+        assert proc.stdout is not None
+        stdout = io.TextIOWrapper(
+            proc.stdout, encoding="utf-8", errors="replace", newline="\n"
+        )
+        finished = False
+        try:
+            if sep == "\n":
+                for line in stdout:
+                    yield line[:-1] if line.endswith("\n") else line
+            else:
+                pending = ""
+                for chunk in iter(lambda: stdout.read(65536), ""):
+                    *tokens, pending = (pending + chunk).split(sep)
+                    yield from tokens
+                if pending:
+                    yield pending
+            finished = True
+        finally:
+            if not finished:
+                proc.kill()
+            stderr = (
+                proc.stderr.read().decode("utf-8", "replace")
+                if proc.stderr else ""
+            )
+            proc.wait()
+            stdout.close()
+            if proc.stderr:
+                proc.stderr.close()
+
+        if proc.returncode != 0:
+            raise _GitStreamError(
+                {
+                    "ok": False,
+                    "error": "git_command_failed",
+                    "stderr": stderr.strip(),
+                    "returncode": proc.returncode,
+                    "command": command,
+                }
+            )
+
     # ------------------------------------------------------------------
     # READ OPERATIONS
     # ------------------------------------------------------------------
 
     def status(self, repo: str) -> Dict[str, Any]:
-        res = self._run(repo, ["status", "--porcelain=v1"])
+        # niente strip: la prima riga può iniziare con uno spazio (" M a.py")
+        res = self._run(repo, ["status", "--porcelain=v1"], strip=False)
         if not res.get("ok"):
             return res
 
-        lines = res["stdout"].splitlines() if res["stdout"] else []
+        lines = res["stdout"].splitlines()
 
         return {
             "ok": True,
@@ -104,6 +228,139 @@ class GitAgent:
             "diff": res["stdout"],
         }
 
+    def iter_diff(
+        self,
+        repo: str,
+        path: Optional[str] = None,
+        *,
+        rev: Optional[str] = None,
+        staged: bool = False,
+        name_status: bool = False,
+        context: Optional[int] = None,
+        max_file_bytes: Optional[int] = None,
+        max_total_bytes: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Diff strutturato e streaming: una entry per file.
+
+        Input:
+            rev: revisione o range (`HEAD~1`, `a..b`); default working tree
+            staged: confronta l'index (`--cached`)
+            name_status: solo path e status, nessun contenuto (fast mode)
+            context: righe di contesto per hunk (`-U<n>`); con 0 i range
+                dei hunk coincidono con le righe modificate
+            max_file_bytes: budget dei hunk conservati per file
+            max_total_bytes: budget dei hunk conservati sull'intero diff
+
+        Il numstat (`added` / `deleted`) resta esatto anche quando i hunk
+        vengono troncati. I file binari sono marcati `binary` senza hunk.
+        Chiudere il generatore termina il processo git.
+
+        In caso di errore git viene prodotto un ultimo elemento
+        {"ok": False, ...} e l'iterazione termina.
+        """
+        args = ["diff", "--no-color", "--no-ext-diff"]
+        if name_status:
+            args += ["--name-status", "-z"]
+        if context is not None:
+            args.append(f"-U{context}")
+        if staged:
+            args.append("--cached")
+        if rev:
+            args.append(rev)
+        if path:
+            args += ["--", path]
+
+        try:
+            if name_status:
+                yield from parse_name_status(
+                    self._stream(repo, args, sep="\0")
+                )
+            else:
+                yield from iter_file_diffs(
+                    self._stream(repo, args),
+                    max_file_bytes=max_file_bytes,
+                    max_total_bytes=max_total_bytes,
+                )
+        except _GitStreamError as exc:
+            yield exc.payload
+
+    def diff_files(
+        self,
+        repo: str,
+        path: Optional[str] = None,
+        **options: Any,
+    ) -> Dict[str, Any]:
+        """
+        Variante aggregata di `iter_diff` (stesse opzioni).
+        """
+        files: List[Dict[str, Any]] = []
+        for entry in self.iter_diff(repo, path, **options):
+            if entry.get("ok") is False:
+                return entry
+            files.append(entry)
+
+        return {
+            "ok": True,
+            "repo": repo,
+            "path": path,
+            "files": files,
+            "count": len(files),
+            "added": sum(f.get("added", 0) for f in files),
+            "deleted": sum(f.get("deleted", 0) for f in files),
+            "truncated": any(f.get("truncated") for f in files),
+        }
+
+    def toplevel(self, repo: str) -> Dict[str, Any]:
+        """
+        Radice del working tree che contiene `repo`.
+        """
+        res = self._run(repo, ["rev-parse", "--show-toplevel"])
+        if not res.get("ok"):
+            return res
+
+        return {
+            "ok": True,
+            "repo": repo,
+            "root": res["stdout"],
+        }
+
+    def show_file(
+        self,
+        repo: str,
+        path: str,
+        *,
+        rev: str = "HEAD",
+        staged: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Contenuto di un file a una revisione (`rev:path`) o nell'index
+        (`staged=True`, `:path`). `path` è relativo alla radice.
+
+        I byte sono decodificati UTF-8 senza normalizzare i fine riga.
+        """
+        spec = f":{path}" if staged else f"{rev}:{path}"
+        res = self._run(repo, ["show", spec], binary=True)
+        if res.get("error"):
+            return res
+        if not res.get("ok"):
+            return {
+                "ok": False,
+                "error": "file_not_found",
+                "repo": repo,
+                "path": path,
+                "rev": None if staged else rev,
+                "stderr": res["stderr"],
+            }
+
+        return {
+            "ok": True,
+            "repo": repo,
+            "path": path,
+            "rev": None if staged else rev,
+            "content": res["stdout"].decode("utf-8", "replace"),
+        }
+
     def log(self, repo: str, limit: int = 10) -> Dict[str, Any]:
         res = self._run(
             repo,
@@ -132,7 +389,192 @@ class GitAgent:
             "count": len(entries),
         }
 
+    def iter_log(
+        self,
+        repo: str,
+        *,
+        rev: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        path: Optional[str] = None,
+        numstat: bool = False,
+        reverse: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Itera la history leggendo lo stdout di `git log` in modo incrementale.
+
+        Memoria costante: un commit alla volta, indipendentemente dalla
+        lunghezza della history.
+
+        Input:
+            rev: revisione di partenza (default HEAD)
+            after: cursore — riprende dal commit che segue questo hash
+                   nello stesso ordine di output (stesso rev / path);
+                   un hash abbreviato deve essere univoco
+            limit: numero massimo di commit prodotti
+            path: limita la history a un path
+            numstat: include le statistiche per file di ogni commit
+                     (`removed`: file eliminato dal commit)
+            reverse: ordine cronologico (dal più vecchio)
+
+        Il cursore è una posizione nella sequenza di `git log`, non un
+        punto del grafo: su history non lineari (merge) le pagine
+        successive non perdono i commit dei branch laterali.
+
+        Output (per commit):
+            {
+                "hash": ..., "short": ..., "author": ..., "email": ...,
+                "date": ..., "timestamp": ..., "message": ...,
+                ["files": [...]]
+            }
+
+        In caso di errore git viene prodotto un ultimo elemento
+        {"ok": False, ...} e l'iterazione termina.
+        """
+        fmt = _FIELD_SEP.join(["%H", "%h", "%an", "%ae", "%ad", "%at", "%s"])
+        args = ["log", f"--pretty=format:{_RECORD_SEP}{fmt}"]
+        if numstat:
+            # --summary: righe " delete mode ..." per i file rimossi
+            args += ["--numstat", "--summary"]
+
+        rev_args = [rev or "HEAD"]
+        if path:
+            rev_args += ["--", path]
+
+        skip = 0
+        if after:
+            # il cursore è risolto una volta sola: un prefisso ambiguo
+            # non deve agganciarsi al primo commit che gli corrisponde
+            res = self._run(
+                repo, ["rev-parse", "-q", "--verify", f"{after}^{{commit}}"]
+            )
+            if res.get("error"):
+                yield res
+                return
+            position = None
+            try:
+                if res.get("ok"):
+                    position = self._log_position(
+                        repo, rev_args, res["stdout"], reverse
+                    )
+            except _GitStreamError as exc:
+                yield exc.payload
+                return
+            if position is None:
+                yield {
+                    "ok": False,
+                    "error": "cursor_not_found",
+                    "repo": repo,
+                    "after": after,
+                }
+                return
+            skip = position + 1
+
+        # git applica -n / --skip prima di --reverse: in ordine inverso
+        # il taglio avviene qui, sulla sequenza già ordinata
+        remaining = None if limit is None else int(limit)
+        if reverse:
+            args.append("--reverse")
+        else:
+            if remaining is not None:
+                args.append(f"-n{remaining}")
+                remaining = None
+            if skip:
+                args.append(f"--skip={skip}")
+                skip = 0
+
+        args += rev_args
+
+        if remaining is not None and remaining <= 0:
+            return
+
+        records = self._iter_log_records(repo, args, numstat)
+        for record in records:
+            if record.get("ok") is False:
+                yield record
+                return
+            if skip:
+                skip -= 1
+                continue
+            yield record
+            if remaining is not None:
+                remaining -= 1
+                if remaining <= 0:
+                    # chiude lo stream: il processo git viene terminato
+                    records.close()
+                    return
+
+    def _iter_log_records(
+        self,
+        repo: str,
+        args: List[str],
+        numstat: bool,
+    ) -> Iterator[Dict[str, Any]]:
+        current: Optional[Dict[str, Any]] = None
+
+        try:
+            for line in self._stream(repo, args):
+                if line.startswith(_RECORD_SEP):
+                    if current is not None:
+                        yield current
+                    current = self._parse_log_record(line[1:], numstat)
+                    continue
+
+                if current is None or not line or "files" not in current:
+                    continue
+
+                if line.startswith(_DELETE_MODE):
+                    self._mark_removed(current["files"], line)
+                    continue
+
+                entry = self._parse_numstat(line)
+                if entry:
+                    current["files"].append(entry)
+        except _GitStreamError as exc:
+            if current is not None:
+                yield current
+            yield exc.payload
+            return
+
+        if current is not None:
+            yield current
+
+    def _log_position(
+        self,
+        repo: str,
+        rev_args: List[str],
+        after: str,
+        reverse: bool,
+    ) -> Optional[int]:
+        """
+        Indice del commit `after` (hash completo) nella sequenza di
+        `git log rev_args` (stesso ordine e stessa semplificazione della
+        history), None se assente.
+        `git rev-list` non formatta i commit: molto più rapido del log.
+        """
+        args = ["rev-list"]
+        if reverse:
+            args.append("--reverse")
+        lines = self._stream(repo, args + rev_args)
+        try:
+            for position, sha in enumerate(lines):
+                if sha == after:
+                    return position
+        finally:
+            lines.close()
+        return None
+
     def branches(self, repo: str) -> Dict[str, Any]:
+        native = self._refs.branches(repo)
+        if native is not None:
+            return {
+                "ok": True,
+                "repo": repo,
+                "branches": native,
+                "count": len(native),
+                "backend": "native",
+            }
+
         res = self._run(repo, ["branch", "--all"])
         if not res.get("ok"):
             return res
@@ -147,8 +589,304 @@ class GitAgent:
             "repo": repo,
             "branches": branches,
             "count": len(branches),
+            "backend": "subprocess",
+        }
+
+    def current_branch(self, repo: str) -> Dict[str, Any]:
+        """
+        Branch corrente e SHA di HEAD.
+
+        `branch` è None con HEAD detached; `head` è None su un branch
+        non ancora nato (repository senza commit).
+        """
+        native = self._refs.head(repo)
+        if native is not None:
+            return {
+                "ok": True,
+                "repo": repo,
+                "branch": native["branch"],
+                "head": native["sha"],
+                "detached": native["detached"],
+                "backend": "native",
+            }
+
+        sym = self._run(repo, ["symbolic-ref", "-q", "HEAD"])
+        if sym.get("returncode") not in (0, 1):
+            return sym
+
+        ref = sym["stdout"] if sym.get("ok") else None
+        branch = None
+        if ref and ref.startswith("refs/heads/"):
+            branch = ref[len("refs/heads/"):]
+
+        head = self._run(repo, ["rev-parse", "-q", "--verify", "HEAD"])
+
+        return {
+            "ok": True,
+            "repo": repo,
+            "branch": branch,
+            "head": head["stdout"] if head.get("ok") else None,
+            "detached": ref is None,
+            "backend": "subprocess",
+        }
+
+    def resolve_ref(self, repo: str, ref: str) -> Dict[str, Any]:
+        """
+        Risolve un ref (branch, tag, remote, HEAD, SHA) nel suo object id.
+
+        Nomi semplici vengono letti da filesystem; espressioni di
+        revisione (`HEAD~2`, SHA abbreviati) passano da `git rev-parse`.
+        """
+        sha = self._refs.resolve(repo, ref)
+        backend = "native"
+
+        if sha is None:
+            res = self._run(repo, ["rev-parse", "-q", "--verify", ref])
+            if res.get("error"):
+                return res
+            if not res.get("ok"):
+                return {
+                    "ok": False,
+                    "error": "ref_not_found",
+                    "repo": repo,
+                    "ref": ref,
+                }
+            sha = res["stdout"]
+            backend = "subprocess"
+
+        return {
+            "ok": True,
+            "repo": repo,
+            "ref": ref,
+            "sha": sha,
+            "backend": backend,
+        }
+
+    # ------------------------------------------------------------------
+    # CHURN / HOTSPOT INDEX
+    # ------------------------------------------------------------------
+
+    def update_churn_index(
+        self,
+        repo: str,
+        index_path: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Aggiorna l'indice churn con i soli commit successivi all'ultimo
+        SHA indicizzato.
+
+        Se la history è stata riscritta (l'ultimo SHA non è più antenato
+        di HEAD) l'indice viene ricostruito da zero.
+
+        Default path: `<git dir>/ice-ai/churn.json` (per worktree: ogni
+        worktree ha il proprio HEAD).
+        """
+        index = self._churn_index(repo, index_path)
+        if isinstance(index, dict):
+            return index
+
+        head = self.resolve_ref(repo, "HEAD")
+        if not head.get("ok"):
+            # repository senza commit: indice vuoto
+            return self._churn_result(repo, index, 0, rebuilt=False)
+
+        head_sha = head["sha"]
+        if index.head == head_sha:
+            return self._churn_result(repo, index, 0, rebuilt=False)
+
+        rebuilt = index.head is None
+        rev = head_sha
+        if index.head:
+            check = self._run(
+                repo, ["merge-base", "--is-ancestor", index.head, head_sha]
+            )
+            if check.get("ok"):
+                rev = f"{index.head}..{head_sha}"
+            else:
+                index.reset()
+                rebuilt = True
+
+        new_commits = 0
+        for commit in self.iter_log(repo, rev=rev, numstat=True, reverse=True):
+            if commit.get("ok") is False:
+                # l'indice su disco resta all'ultimo stato coerente
+                self._churn.pop(index.path, None)
+                return commit
+            index.apply_commit(commit)
+            new_commits += 1
+
+        index.head = head_sha
+        try:
+            index.save()
+        except OSError as exc:
+            return {
+                "ok": False,
+                "error": "churn_index_write_failed",
+                "detail": str(exc),
+                "path": index.path,
+            }
+
+        return self._churn_result(repo, index, new_commits, rebuilt=rebuilt)
+
+    def churn_hotspots(
+        self,
+        repo: str,
+        limit: int = 20,
+        *,
+        index_path: Optional[str] = None,
+        update: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        File con più commit (change frequency), con autori recenti.
+        """
+        index = self._churn_ready(repo, index_path, update)
+        if isinstance(index, dict):
+            return index
+
+        hotspots = index.hotspots(limit)
+        return {
+            "ok": True,
+            "repo": repo,
+            "head": index.head,
+            "hotspots": hotspots,
+            "count": len(hotspots),
         }
 
+    def churn_file(
+        self,
+        repo: str,
+        path: str,
+        *,
+        co_change_limit: int = 10,
+        index_path: Optional[str] = None,
+        update: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Statistiche churn di un file: frequenza, autori recenti, co-change.
+        """
+        index = self._churn_ready(repo, index_path, update)
+        if isinstance(index, dict):
+            return index
+
+        info = index.file(path, co_change_limit)
+        if info is None:
+            return {
+                "ok": False,
+                "error": "path_not_indexed",
+                "repo": repo,
+                "path": path,
+            }
+
+        return {"ok": True, "repo": repo, "head": index.head, **info}
+
+    def _churn_ready(
+        self,
+        repo: str,
+        index_path: Optional[str],
+        update: bool,
+    ) -> Any:
+        if update:
+            res = self.update_churn_index(repo, index_path)
+            if not res.get("ok"):
+                return res
+        return self._churn_index(repo, index_path)
+
+    def _churn_index(
+        self,
+        repo: str,
+        index_path: Optional[str],
+    ) -> Any:
+        if index_path is None:
+            # git dir del worktree, non common dir: l'indice segue HEAD,
+            # che è diverso per ogni worktree
+            layout = self._refs.locate(repo)
+            if layout is not None:
+                git_dir = layout[0]
+            else:
+                res = self._run(repo, ["rev-parse", "--git-dir"])
+                if not res.get("ok"):
+                    return res
+                git_dir = os.path.join(repo, res["stdout"])
+            index_path = os.path.join(git_dir, "ice-ai", "churn.json")
+
+        index_path = os.path.abspath(index_path)
+        index = self._churn.get(index_path)
+        if index is None:
+            index = ChurnIndex.load(index_path)
+            self._churn[index_path] = index
+        return index
+
+    def _churn_result(
+        self,
+        repo: str,
+        index: ChurnIndex,
+        new_commits: int,
+        rebuilt: bool,
+    ) -> Dict[str, Any]:
+        return {
+            "ok": True,
+            "repo": repo,
+            "index_path": index.path,
+            "head": index.head,
+            "new_commits": new_commits,
+            "indexed_commits": index.commits,
+            "files": len(index.files),
+            "rebuilt": rebuilt,
+        }
+
+    # ------------------------------------------------------------------
+    # PARSING
+    # ------------------------------------------------------------------
+
+    def _parse_log_record(
+        self,
+        record: str,
+        numstat: bool,
+    ) -> Optional[Dict[str, Any]]:
+        parts = record.split(_FIELD_SEP, 6)
+        if len(parts) != 7:
+            return None
+
+        entry: Dict[str, Any] = {
+            "hash": parts[0],
+            "short": parts[1],
+            "author": parts[2],
+            "email": parts[3],
+            "date": parts[4],
+            "timestamp": int(parts[5]) if parts[5].isdigit() else None,
+            "message": parts[6],
+        }
+        if numstat:
+            entry["files"] = []
+        return entry
+
+    def _parse_numstat(self, line: str) -> Optional[Dict[str, Any]]:
+        parts = line.split("\t", 2)
+        if len(parts) != 3:
+            return None
+
+        added, deleted, path = parts
+        binary = added == "-" and deleted == "-"
+
+        return {
+            "path": path,
+            "added": 0 if binary else int(added),
+            "deleted": 0 if binary else int(deleted),
+            "binary": binary,
+            "removed": False,
+        }
+
+    @staticmethod
+    def _mark_removed(files: List[Dict[str, Any]], line: str) -> None:
+        # " delete mode 100644 <path>": stesso quoting del numstat
+        parts = line[len(_DELETE_MODE):].split(" ", 1)
+        if len(parts) != 2:
+            return
+        for entry in reversed(files):
+            if entry["path"] == parts[1]:
+                entry["removed"] = True
+                return
+
     # ------------------------------------------------------------------
     # WRITE OPERATIONS
     # ------------------------------------------------------------------
@@ -0,0 +1,243 @@
+"""
+Git Churn — indice incrementale di change frequency e co-change.
+
+RESPONSABILITÀ:
+- accumulare statistiche per file da commit con numstat
+- mantenere autori recenti e coppie di file modificati insieme
+- persistere l'indice su disco con l'ultimo SHA indicizzato
+
+NON FA:
+- esecuzione di git (riceve commit già parsati da GitAgent.iter_log)
+- ranking semantico o decisioni di routing
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from ice_ai.agents.domain.git_diff import unquote_path
+from ice_ai.utils.fs import write_json_atomic
+
+
+INDEX_VERSION = 2
+
+# "dir/{old => new}/file" oppure "old => new"
+_BRACE_RENAME_RE = re.compile(r"^(.*)\{(.*) => (.*)\}(.*)$")
+
+
+def split_rename(path: str) -> Tuple[Optional[str], str]:
+    """
+    Ritorna (old_path, new_path) per la notazione rename di numstat.
+    old_path è None se il path non è un rename.
+    """
+    path = unquote_path(path)
+
+    match = _BRACE_RENAME_RE.match(path)
+    if match:
+        prefix, old, new, suffix = match.groups()
+        old_path = (prefix + old + suffix).replace("//", "/")
+        new_path = (prefix + new + suffix).replace("//", "/")
+        return old_path, new_path
+
+    if " => " in path:
+        old_path, new_path = path.split(" => ", 1)
+        return unquote_path(old_path), unquote_path(new_path)
+
+    return None, path
+
+
+class ChurnIndex:
+    """
+    Indice churn/hotspot aggiornabile commit per commit.
+
+    Struttura persistita (JSON):
+        {
+            "version": 2,
+            "head": ultimo SHA indicizzato,
+            "commits": commit indicizzati,
+            "files": {path: {"commits", "added", "deleted",
+                             "last_timestamp", "authors": [[nome, ts], ...]}},
+            "pairs": {path: {altro_path: co-change count}}
+        }
+    """
+
+    MAX_RECENT_AUTHORS = 5
+
+    # Commit enormi (vendoring, reformat) non dicono nulla sul co-change
+    # e genererebbero O(n²) coppie
+    MAX_COCHANGE_FILES = 50
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.head: Optional[str] = None
+        self.commits = 0
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.pairs: Dict[str, Dict[str, int]] = {}
+
+    # ------------------------------------------------------------------
+    # PERSISTENZA
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def load(cls, path: str) -> "ChurnIndex":
+        index = cls(path)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return index
+
+        if data.get("version") != INDEX_VERSION:
+            return index
+
+        index.head = data.get("head")
+        index.commits = int(data.get("commits", 0))
+        index.files = data.get("files", {})
+        index.pairs = data.get("pairs", {})
+        return index
+
+    def save(self) -> None:
+        data = {
+            "version": INDEX_VERSION,
+            "head": self.head,
+            "commits": self.commits,
+            "files": self.files,
+            "pairs": self.pairs,
+        }
+        # scrittura atomica: un crash non lascia indici corrotti
+        write_json_atomic(self.path, data, separators=(",", ":"))
+
+    def reset(self) -> None:
+        self.head = None
+        self.commits = 0
+        self.files = {}
+        self.pairs = {}
+
+    # ------------------------------------------------------------------
+    # AGGIORNAMENTO
+    # ------------------------------------------------------------------
+
+    def apply_commit(self, commit: Dict[str, Any]) -> None:
+        """
+        Integra un commit prodotto da `GitAgent.iter_log(numstat=True)`.
+        I commit vanno applicati in ordine cronologico.
+        """
+        author = commit.get("author") or ""
+        timestamp = commit.get("timestamp") or 0
+        touched: List[str] = []
+        removed: List[str] = []
+
+        for change in commit.get("files", []):
+            old_path, path = split_rename(change["path"])
+            if old_path is not None:
+                self._rename(old_path, path)
+
+            stats = self.files.get(path)
+            if stats is None:
+                stats = {
+                    "commits": 0,
+                    "added": 0,
+                    "deleted": 0,
+                    "last_timestamp": 0,
+                    "authors": [],
+                }
+                self.files[path] = stats
+
+            stats["commits"] += 1
+            stats["added"] += change.get("added", 0)
+            stats["deleted"] += change.get("deleted", 0)
+            stats["last_timestamp"] = max(stats["last_timestamp"], timestamp)
+
+            authors = [a for a in stats["authors"] if a[0] != author]
+            authors.insert(0, [author, timestamp])
+            stats["authors"] = authors[: self.MAX_RECENT_AUTHORS]
+
+            touched.append(path)
+            if change.get("removed"):
+                removed.append(path)
+
+        if 1 < len(touched) <= self.MAX_COCHANGE_FILES:
+            for path in touched:
+                row = self.pairs.setdefault(path, {})
+                for other in touched:
+                    if other != path:
+                        row[other] = row.get(other, 0) + 1
+
+        # un file eliminato non è più un hotspot (né un co-change);
+        # se ricompare riparte da zero
+        for path in removed:
+            self._remove(path)
+
+        self.head = commit.get("hash") or self.head
+        self.commits += 1
+
+    def _rename(self, old_path: str, new_path: str) -> None:
+        stats = self.files.pop(old_path, None)
+        if stats is not None and new_path not in self.files:
+            self.files[new_path] = stats
+
+        row = self.pairs.pop(old_path, None)
+        if row is not None:
+            merged = self.pairs.setdefault(new_path, {})
+            for other, count in row.items():
+                merged[other] = merged.get(other, 0) + count
+                back = self.pairs.get(other)
+                if back is not None and old_path in back:
+                    back[new_path] = back.get(new_path, 0) + back.pop(old_path)
+
+    def _remove(self, path: str) -> None:
+        self.files.pop(path, None)
+        row = self.pairs.pop(path, None)
+        if row is not None:
+            for other in row:
+                back = self.pairs.get(other)
+                if back is not None:
+                    back.pop(path, None)
+                    if not back:
+                        del self.pairs[other]
+
+    # ------------------------------------------------------------------
+    # QUERY
+    # ------------------------------------------------------------------
+
+    def hotspots(self, limit: int = 20) -> List[Dict[str, Any]]:
+        ranked = sorted(
+            self.files.items(),
+            key=lambda item: (item[1]["commits"], item[1]["last_timestamp"]),
+            reverse=True,
+        )
+        return [self._describe(path, stats) for path, stats in ranked[:limit]]
+
+    def file(
+        self,
+        path: str,
+        co_change_limit: int = 10,
+    ) -> Optional[Dict[str, Any]]:
+        stats = self.files.get(path)
+        if stats is None:
+            return None
+
+        info = self._describe(path, stats)
+        info["co_changes"] = self.co_changes(path, co_change_limit)
+        return info
+
+    def co_changes(self, path: str, limit: int = 10) -> List[Dict[str, Any]]:
+        row = self.pairs.get(path, {})
+        ranked = sorted(row.items(), key=lambda item: item[1], reverse=True)
+        return [
+            {"path": other, "count": count}
+            for other, count in ranked[:limit]
+        ]
+
+    @staticmethod
+    def _describe(path: str, stats: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "path": path,
+            "commits": stats["commits"],
+            "added": stats["added"],
+            "deleted": stats["deleted"],
+            "last_timestamp": stats["last_timestamp"],
+            "recent_authors": [a[0] for a in stats["authors"]],
+        }
@@ -0,0 +1,253 @@
+"""
+Git Diff — parsing streaming di unified diff e name-status.
+
+RESPONSABILITÀ:
+- trasformare l'output di `git diff` in entry per file
+- contare righe aggiunte / rimosse (numstat) durante lo stream
+- applicare budget di byte per file e totali
+
+NON FA:
+- esecuzione di processi git
+- applicazione di patch
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def unquote_path(path: str) -> str:
+    """
+    Decodifica un path quotato da git (core.quotePath): "a/\\303\\250.txt".
+    """
+    if len(path) < 2 or path[0] != '"' or path[-1] != '"':
+        return path
+    try:
+        raw = path[1:-1].encode("latin-1").decode("unicode_escape")
+        return raw.encode("latin-1").decode("utf-8")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return path[1:-1]
+
+
+def _strip_prefix(path: str) -> Optional[str]:
+    path = unquote_path(path)
+    if path == "/dev/null":
+        return None
+    if path[:2] in ("a/", "b/"):
+        return path[2:]
+    return path
+
+
+def _header_path(rest: str) -> Optional[str]:
+    """
+    Path da "diff --git a/P b/P" quando old e new coincidono
+    (unico caso non ambiguo con spazi nel nome).
+    """
+    if rest.startswith('"'):
+        end = rest.find('"', 1)
+        while end > 0 and rest[end - 1] == "\\":
+            end = rest.find('"', end + 1)
+        return _strip_prefix(rest[: end + 1]) if end > 0 else None
+
+    half = (len(rest) - 1) // 2
+    old, new = rest[:half], rest[half + 1:]
+    if old[2:] == new[2:]:
+        return old[2:]
+    return None
+
+
+def _new_entry(rest: str) -> Dict[str, Any]:
+    return {
+        "path": _header_path(rest),
+        "old_path": None,
+        "status": "M",
+        "binary": False,
+        "added": 0,
+        "deleted": 0,
+        "hunks": [],
+        "bytes": 0,
+        "truncated": False,
+    }
+
+
+def _finalize(
+    entry: Dict[str, Any],
+    hunk: Optional[Dict[str, Any]],
+    lines: List[str],
+) -> Dict[str, Any]:
+    if hunk is not None:
+        hunk["text"] = "\n".join(lines)
+    if entry["old_path"] is None and entry["status"] != "A":
+        entry["old_path"] = entry["path"]
+    return entry
+
+
+def iter_file_diffs(
+    lines: Iterable[str],
+    *,
+    max_file_bytes: Optional[int] = None,
+    max_total_bytes: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Produce una entry per file da uno stream di righe unified diff.
+
+    Le righe dei hunk oltre il budget non vengono conservate ma
+    continuano a essere contate in `added` / `deleted`: il numstat
+    resta esatto, il costo in memoria è limitato dal budget.
+
+    Output (per file):
+        {
+            "path", "old_path", "status" (A/D/M/R/C),
+            "binary", "added", "deleted",
+            "hunks": [{"header", "old_start", "old_lines",
+                       "new_start", "new_lines", "text"}],
+            "bytes": dimensione della patch del file,
+            "truncated": True se parte dei hunk è stata scartata
+        }
+    """
+    entry: Optional[Dict[str, Any]] = None
+    hunk: Optional[Dict[str, Any]] = None
+    hunk_lines: List[str] = []
+    kept_file = 0
+    kept_total = 0
+
+    for line in lines:
+        if line.startswith("diff --git "):
+            if entry is not None:
+                yield _finalize(entry, hunk, hunk_lines)
+            entry = _new_entry(line[len("diff --git "):])
+            hunk, hunk_lines, kept_file = None, [], 0
+            continue
+
+        if entry is None:
+            continue
+
+        size = len(line.encode("utf-8")) + 1
+        entry["bytes"] += size
+
+        if hunk is None or not line or line[0] not in " +-\\":
+            # --- header del file / inizio hunk ---
+            if line.startswith("@@"):
+                if hunk is not None:
+                    hunk["text"] = "\n".join(hunk_lines)
+                    hunk, hunk_lines = None, []
+
+                match = _HUNK_RE.match(line)
+                if not match:
+                    continue
+                if not _fits(
+                    size, kept_file, kept_total, max_file_bytes, max_total_bytes
+                ):
+                    entry["truncated"] = True
+                    hunk = {"discarded": True}
+                    continue
+
+                kept_file += size
+                kept_total += size
+                hunk = {
+                    "header": line,
+                    "old_start": int(match.group(1)),
+                    "old_lines": int(match.group(2) or 1),
+                    "new_start": int(match.group(3)),
+                    "new_lines": int(match.group(4) or 1),
+                    "text": "",
+                }
+                entry["hunks"].append(hunk)
+                continue
+
+            _apply_header(entry, line)
+            continue
+
+        # --- righe del hunk ---
+        if line[0] == "+":
+            entry["added"] += 1
+        elif line[0] == "-":
+            entry["deleted"] += 1
+
+        if hunk.get("discarded"):
+            continue
+        if not _fits(
+            size, kept_file, kept_total, max_file_bytes, max_total_bytes
+        ):
+            entry["truncated"] = True
+            hunk["text"] = "\n".join(hunk_lines)
+            hunk, hunk_lines = {"discarded": True}, []
+            continue
+
+        kept_file += size
+        kept_total += size
+        hunk_lines.append(line)
+
+    if entry is not None:
+        yield _finalize(entry, hunk, hunk_lines)
+
+
+def _fits(
+    size: int,
+    kept_file: int,
+    kept_total: int,
+    max_file_bytes: Optional[int],
+    max_total_bytes: Optional[int],
+) -> bool:
+    if max_file_bytes is not None and kept_file + size > max_file_bytes:
+        return False
+    if max_total_bytes is not None and kept_total + size > max_total_bytes:
+        return False
+    return True
+
+
+def _apply_header(entry: Dict[str, Any], line: str) -> None:
+    if line.startswith("new file mode"):
+        entry["status"] = "A"
+    elif line.startswith("deleted file mode"):
+        entry["status"] = "D"
+    elif line.startswith("rename from "):
+        entry["status"] = "R"
+        entry["old_path"] = unquote_path(line[len("rename from "):])
+    elif line.startswith("rename to "):
+        entry["path"] = unquote_path(line[len("rename to "):])
+    elif line.startswith("copy from "):
+        entry["status"] = "C"
+        entry["old_path"] = unquote_path(line[len("copy from "):])
+    elif line.startswith("copy to "):
+        entry["path"] = unquote_path(line[len("copy to "):])
+    elif line.startswith("--- "):
+        old = _strip_prefix(line[4:])
+        if old is not None and entry["status"] not in ("R", "C"):
+            entry["old_path"] = old
+    elif line.startswith("+++ "):
+        new = _strip_prefix(line[4:])
+        if new is not None:
+            entry["path"] = new
+        elif entry["path"] is None:
+            entry["path"] = entry["old_path"]
+    elif line.startswith("Binary files ") or line == "GIT binary patch":
+        entry["binary"] = True
+
+
+def parse_name_status(tokens: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Parsing di `git diff --name-status -z` (token separati da NUL).
+    """
+    it = iter(tokens)
+    for status in it:
+        if not status:
+            continue
+        code = status[0]
+        if code in ("R", "C"):
+            old_path = next(it, None)
+            path = next(it, None)
+        else:
+            path = next(it, None)
+            old_path = None if code == "A" else path
+
+        yield {
+            "path": path,
+            "old_path": old_path,
+            "status": code,
+            "score": int(status[1:]) if status[1:].isdigit() else None,
+        }
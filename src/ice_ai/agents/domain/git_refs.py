@@ -0,0 +1,289 @@
+"""
+Git Refs — lettura nativa di HEAD, loose refs e packed-refs.
+
+RESPONSABILITÀ:
+- individuare git dir e common dir (worktree, submodule, `commondir`)
+- leggere HEAD, branch locali e remoti senza fork di processi
+- risolvere ref simboliche e nomi brevi
+
+NON FA:
+- scrittura di ref
+- parsing di oggetti / revision expressions (`HEAD~1`, `abc^{tree}`)
+- supporto reftable
+
+Ogni metodo ritorna None quando il layout del repository non è
+supportato: il chiamante deve ricadere sul backend subprocess.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+
+_HEX = frozenset("0123456789abcdef")
+_MAX_SYMREF_DEPTH = 5
+
+# Ordine di risoluzione dei nomi brevi (cfr. gitrevisions)
+_SHORT_REF_RULES = (
+    "{}",
+    "refs/{}",
+    "refs/tags/{}",
+    "refs/heads/{}",
+    "refs/remotes/{}",
+    "refs/remotes/{}/HEAD",
+)
+
+
+def _is_object_id(value: str) -> bool:
+    return len(value) in (40, 64) and all(c in _HEX for c in value)
+
+
+class GitRefReader:
+    """
+    Reader di ref Git basato solo su filesystem.
+
+    Mantiene in cache il contenuto di `packed-refs`, invalidato
+    tramite (mtime, size): pensato per chiamate frequenti
+    (es. status bar dell'editor).
+    """
+
+    def __init__(self) -> None:
+        self._packed_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, str]]] = {}
+
+    # ------------------------------------------------------------------
+    # LAYOUT
+    # ------------------------------------------------------------------
+
+    def locate(self, repo: str) -> Optional[Tuple[str, str]]:
+        """
+        Ritorna (git_dir, common_dir) oppure None se non supportato.
+        """
+        dot_git = os.path.join(repo, ".git")
+
+        if os.path.isdir(dot_git):
+            git_dir = dot_git
+        elif os.path.isfile(dot_git):
+            # worktree / submodule: ".git" è un file "gitdir: <path>"
+            content = self._read(dot_git)
+            if not content or not content.startswith("gitdir:"):
+                return None
+            git_dir = content[len("gitdir:"):].strip()
+            if not os.path.isabs(git_dir):
+                git_dir = os.path.join(repo, git_dir)
+        else:
+            return None
+
+        git_dir = os.path.normpath(git_dir)
+        if not os.path.isfile(os.path.join(git_dir, "HEAD")):
+            return None
+
+        common_dir = git_dir
+        commondir = self._read(os.path.join(git_dir, "commondir"))
+        if commondir:
+            common_dir = commondir.strip()
+            if not os.path.isabs(common_dir):
+                common_dir = os.path.join(git_dir, common_dir)
+            common_dir = os.path.normpath(common_dir)
+
+        # reftable: formato binario, delegato a git
+        if os.path.isdir(os.path.join(common_dir, "reftable")):
+            return None
+
+        return git_dir, common_dir
+
+    # ------------------------------------------------------------------
+    # HEAD
+    # ------------------------------------------------------------------
+
+    def head(self, repo: str) -> Optional[Dict[str, object]]:
+        """
+        Legge HEAD del worktree.
+
+        Output:
+            {"branch": str | None, "ref": str | None,
+             "sha": str | None, "detached": bool}
+        """
+        layout = self.locate(repo)
+        if layout is None:
+            return None
+        git_dir, common_dir = layout
+
+        content = self._read(os.path.join(git_dir, "HEAD"))
+        if content is None:
+            return None
+        content = content.strip()
+
+        if content.startswith("ref:"):
+            ref = content[len("ref:"):].strip()
+            return {
+                "branch": ref[len("refs/heads/"):]
+                if ref.startswith("refs/heads/") else None,
+                "ref": ref,
+                # None su branch non ancora nato (repo vuoto)
+                "sha": self._resolve_full(git_dir, common_dir, ref),
+                "detached": False,
+            }
+
+        if _is_object_id(content):
+            return {
+                "branch": None,
+                "ref": None,
+                "sha": content,
+                "detached": True,
+            }
+
+        return None
+
+    # ------------------------------------------------------------------
+    # BRANCHES
+    # ------------------------------------------------------------------
+
+    def branches(self, repo: str) -> Optional[List[str]]:
+        """
+        Elenca branch locali e remoti nel formato di `git branch --all`
+        (senza marker `*`): "main", "remotes/origin/main",
+        "remotes/origin/HEAD -> origin/main".
+
+        Con HEAD detached ritorna None: la riga descrittiva di git
+        dipende da reflog e abbreviazioni, meglio delegare.
+        """
+        layout = self.locate(repo)
+        if layout is None:
+            return None
+        _, common_dir = layout
+
+        head = self.head(repo)
+        if head is None or head["detached"]:
+            return None
+
+        refs = dict(self._packed_refs(common_dir))
+        for prefix in ("refs/heads", "refs/remotes"):
+            refs.update(self._loose_refs(common_dir, prefix))
+
+        out: List[str] = []
+        for name in sorted(refs):
+            value = refs[name]
+            if name.startswith("refs/heads/"):
+                out.append(name[len("refs/heads/"):])
+            elif name.startswith("refs/remotes/"):
+                label = name[len("refs/"):]
+                if value.startswith("ref:"):
+                    target = value[len("ref:"):].strip()
+                    if target.startswith("refs/remotes/"):
+                        target = target[len("refs/remotes/"):]
+                    label = f"{label} -> {target}"
+                out.append(label)
+
+        return out
+
+    # ------------------------------------------------------------------
+    # RESOLUTION
+    # ------------------------------------------------------------------
+
+    def resolve(self, repo: str, ref: str) -> Optional[str]:
+        """
+        Risolve un nome di ref (o un object id completo) nello SHA puntato.
+
+        Ritorna None se il ref non è trovato o non è un nome semplice:
+        il chiamante decide se ricadere su `git rev-parse`.
+        """
+        if _is_object_id(ref):
+            return ref
+
+        layout = self.locate(repo)
+        if layout is None:
+            return None
+        git_dir, common_dir = layout
+
+        for rule in _SHORT_REF_RULES:
+            sha = self._resolve_full(git_dir, common_dir, rule.format(ref))
+            if sha:
+                return sha
+
+        return None
+
+    def _resolve_full(
+        self,
+        git_dir: str,
+        common_dir: str,
+        ref: str,
+    ) -> Optional[str]:
+        for _ in range(_MAX_SYMREF_DEPTH):
+            value = self._read_ref(git_dir, common_dir, ref)
+            if value is None:
+                return None
+            if value.startswith("ref:"):
+                ref = value[len("ref:"):].strip()
+                continue
+            return value if _is_object_id(value) else None
+        return None
+
+    def _read_ref(
+        self,
+        git_dir: str,
+        common_dir: str,
+        ref: str,
+    ) -> Optional[str]:
+        # HEAD e ref pseudo / per-worktree vivono nella git dir
+        base = common_dir
+        if "/" not in ref or ref.startswith(("refs/worktree/", "refs/bisect/")):
+            base = git_dir
+
+        content = self._read(os.path.join(base, *ref.split("/")))
+        if content is not None:
+            return content.strip()
+
+        return self._packed_refs(common_dir).get(ref)
+
+    # ------------------------------------------------------------------
+    # STORAGE
+    # ------------------------------------------------------------------
+
+    def _packed_refs(self, common_dir: str) -> Dict[str, str]:
+        path = os.path.join(common_dir, "packed-refs")
+        try:
+            st = os.stat(path)
+        except OSError:
+            return {}
+
+        key = (st.st_mtime_ns, st.st_size)
+        cached = self._packed_cache.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        refs: Dict[str, str] = {}
+        content = self._read(path) or ""
+        for line in content.splitlines():
+            # "#" header, "^" peeled tag: non servono per la risoluzione
+            if not line or line[0] in "#^":
+                continue
+            parts = line.split(" ", 1)
+            if len(parts) == 2:
+                refs[parts[1]] = parts[0]
+
+        self._packed_cache[path] = (key, refs)
+        return refs
+
+    def _loose_refs(self, common_dir: str, prefix: str) -> Dict[str, str]:
+        refs: Dict[str, str] = {}
+        root = os.path.join(common_dir, *prefix.split("/"))
+
+        for dirpath, _, filenames in os.walk(root):
+            rel = os.path.relpath(dirpath, common_dir).replace(os.sep, "/")
+            for name in filenames:
+                if name.endswith(".lock"):
+                    continue
+                content = self._read(os.path.join(dirpath, name))
+                if content:
+                    refs[f"{rel}/{name}"] = content.strip()
+
+        return refs
+
+    @staticmethod
+    def _read(path: str) -> Optional[str]:
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                return fh.read()
+        except (OSError, UnicodeDecodeError):
+            return None
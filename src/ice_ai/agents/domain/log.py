@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from ice_ai.agents.spec import AgentSpec
 
+if TYPE_CHECKING:
+    from ice_ai.agents.domain.log_rate import LogRatePipeline
+
 
 # ============================================================
 # LOG EVENT MODEL
@@ -68,6 +71,7 @@ class LogAgent:
         capabilities={
             "logs.analyze",
             "logs.scan_text",
+            "logs.rate_anomaly",
         },
         ui_label="Log Analyzer",
         ui_group="Diagnostics",
@@ -154,6 +158,52 @@ class LogAgent:
             "summary": summary,
         }
 
+    def rate_pipeline(self, **options: Any) -> "LogRatePipeline":
+        """
+        Pipeline streaming per anomalie di frequenza: le righe vengono
+        classificate con le regole di questo agente, contate per
+        intervallo e chiave (by="severity" | "template") e passate a un
+        detector incrementale MLAgent (Holt-Winters) per chiave.
+
+        Opzioni: interval (secondi), by, detector_factory, timestamp,
+        source, max_keys, max_exemplars, max_gap, increases_only.
+        """
+        from ice_ai.agents.domain.log_rate import LogRatePipeline
+
+        return LogRatePipeline(log_agent=self, **options)
+
+    def analyze_rates(
+        self,
+        lines: Any,
+        **options: Any,
+    ) -> Dict[str, Any]:
+        """
+        Esegue `rate_pipeline` su un iterabile di righe in un solo
+        passaggio (il testo non viene mai bufferizzato per intero).
+        """
+        pipeline = self.rate_pipeline(**options)
+        anomalies = [a.to_dict() for a in pipeline.run(lines)]
+        return {
+            "anomalies": anomalies,
+            "summary": {
+                "count": len(anomalies),
+                **pipeline.summary(),
+            },
+        }
+
+    def classify_line(
+        self,
+        line: str,
+        *,
+        line_no: Optional[int] = None,
+        source: Optional[str] = None,
+    ) -> Optional[LogEvent]:
+        """
+        Evento di una singola riga (None se non è errore / warning).
+        Per consumer streaming che non passano da `analyze`.
+        """
+        return self._analyze_line(line=line, line_no=line_no, source=source)
+
     # ========================================================
     # INTERNALS
     # ========================================================
@@ -162,7 +212,7 @@ class LogAgent:
         self,
         *,
         line: str,
-        line_no: int,
+        line_no: Optional[int],
         source: Optional[str],
     ) -> Optional[LogEvent]:
 
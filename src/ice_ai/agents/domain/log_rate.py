@@ -0,0 +1,353 @@
+"""
+Log Rate — pipeline streaming da eventi LogAgent a anomalie di frequenza.
+
+RESPONSABILITÀ:
+- classificare le righe con le regole di LogAgent (severità / template)
+- contare gli eventi per intervallo di tempo e per chiave
+- alimentare un detector incrementale di MLAgent per chiave
+- emettere anomalie con riferimenti a righe esemplari
+- memoria limitata: chiavi, esemplari e intervalli vuoti hanno un tetto
+
+NON FA:
+- buffering del log (un solo passaggio, riga per riga)
+- I/O, tail di file, notifiche
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from ice_ai.agents.domain.log import LogAgent, LogEvent
+from ice_ai.agents.domain.ml_seasonal import HoltWintersDetector
+
+
+KEY_MODES = ("severity", "template")
+
+# Chiave di raccolta per template oltre il limite `max_keys` (l'unica
+# oltre il limite: detector al più max_keys + 1)
+OVERFLOW_KEY = "template:<other>"
+
+# ISO 8601 / "YYYY-MM-DD HH:MM:SS[,.]mmm" / epoch in testa alla riga
+_TIMESTAMP_RE = re.compile(
+    r"^\[?(?:"
+    r"(?P<iso>\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?"
+    r"(?:Z|[+-]\d{2}:?\d{2})?)"
+    r"|(?P<epoch>\d{10}(?:\.\d+)?)"
+    r")\b"
+)
+
+_TEMPLATE_TOKEN_RE = re.compile(r"[A-Za-z0-9_]+")
+_DIGIT_RE = re.compile(r"\d")
+
+LineInput = Union[str, Tuple[float, str]]
+
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+def parse_timestamp(line: str) -> Optional[float]:
+    """
+    Timestamp (epoch secondi) in testa alla riga, se riconosciuto.
+    Orari senza fuso sono interpretati come UTC.
+    """
+    match = _TIMESTAMP_RE.match(line)
+    if match is None:
+        return None
+    if match.group("epoch"):
+        return float(match.group("epoch"))
+
+    raw = match.group("iso").replace(",", ".").replace("Z", "+00:00")
+    try:
+        parsed = datetime.fromisoformat(raw)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def message_template(message: str, max_tokens: int = 12) -> str:
+    """
+    Forma del messaggio: token con cifre sostituiti da segnaposto,
+    timestamp iniziale rimosso. Righe con la stessa forma condividono
+    la serie.
+    """
+    match = _TIMESTAMP_RE.match(message)
+    if match is not None:
+        message = message[match.end():]
+    tokens = [
+        "<var>" if _DIGIT_RE.search(token) else token.lower()
+        for token in _TEMPLATE_TOKEN_RE.findall(message)
+    ]
+    return " ".join(tokens[:max_tokens])
+
+
+# ============================================================
+# RESULT MODEL
+# ============================================================
+
+@dataclass(frozen=True)
+class RateAnomaly:
+    """
+    Anomalia di frequenza su un intervallo chiuso.
+    """
+    key: str
+    interval_start: float
+    interval: float
+    count: int
+    expected: Optional[float]
+    score: float
+    severity: str
+    exemplars: Tuple[Dict[str, Any], ...] = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "log.rate_anomaly",
+            "key": self.key,
+            "interval_start": self.interval_start,
+            "interval": self.interval,
+            "count": self.count,
+            "expected": self.expected,
+            "score": self.score,
+            "severity": self.severity,
+            "exemplars": list(self.exemplars),
+        }
+
+
+# ============================================================
+# PIPELINE
+# ============================================================
+
+class LogRatePipeline:
+    """
+    Stage streaming: righe di log -> conteggi per intervallo -> detector.
+
+    Ogni chiave (es. "severity:error" o "template:timeout after <var>")
+    ha un proprio HoltWintersDetector. Alla chiusura di un intervallo il
+    conteggio di ogni chiave nota (zero incluso) aggiorna il detector;
+    le anomalie portano con sé le prime righe dell'intervallo.
+    """
+
+    def __init__(
+        self,
+        *,
+        interval: float = 60.0,
+        by: str = "severity",
+        log_agent: Optional[LogAgent] = None,
+        detector_factory: Optional[Callable[[], HoltWintersDetector]] = None,
+        timestamp: Optional[Callable[[str], Optional[float]]] = None,
+        source: Optional[str] = None,
+        max_keys: int = 200,
+        max_exemplars: int = 3,
+        max_gap: int = 1440,
+        increases_only: bool = True,
+    ) -> None:
+        if interval <= 0:
+            raise ValueError("interval must be > 0")
+        if by not in KEY_MODES:
+            raise ValueError(f"Unknown key mode: {by}")
+
+        self.interval = float(interval)
+        self.by = by
+        self.source = source
+        self.max_keys = max_keys
+        self.max_exemplars = max_exemplars
+        self.max_gap = max_gap
+        self.increases_only = increases_only
+
+        self._agent = log_agent or LogAgent()
+        self._factory = detector_factory or HoltWintersDetector
+        self._timestamp = timestamp or parse_timestamp
+
+        self._detectors: Dict[str, HoltWintersDetector] = {}
+        self._bucket: Optional[int] = None
+        self._counts: Dict[str, int] = {}
+        self._new_keys = 0
+        self._exemplars: Dict[str, List[Dict[str, Any]]] = {}
+        self._last_ts: Optional[float] = None
+
+        self.lines = 0
+        self.events = 0
+        self.intervals = 0
+
+    # ------------------------------------------------------------------
+    # INPUT
+    # ------------------------------------------------------------------
+
+    def feed(
+        self,
+        line: str,
+        *,
+        timestamp: Optional[float] = None,
+    ) -> List[RateAnomaly]:
+        """
+        Elabora una riga. Ritorna le anomalie degli intervalli chiusi
+        dal suo arrivo (di solito nessuna).
+
+        Righe senza timestamp (es. traceback) ereditano l'ultimo visto;
+        quelle prima del primo timestamp vanno nel primo intervallo.
+        """
+        self.lines += 1
+        if timestamp is None:
+            timestamp = self._timestamp(line)
+        if timestamp is None:
+            timestamp = self._last_ts
+
+        anomalies: List[RateAnomaly] = []
+        if timestamp is not None:
+            self._last_ts = timestamp
+            bucket = int(timestamp // self.interval)
+            if self._bucket is None:
+                self._bucket = bucket
+            elif bucket > self._bucket:
+                anomalies = self._advance(bucket)
+
+        evt = self._agent.classify_line(
+            line,
+            line_no=self.lines,
+            source=self.source,
+        )
+        if evt is not None:
+            self._count(evt)
+        return anomalies
+
+    def run(self, lines: Iterable[LineInput]) -> Iterator[RateAnomaly]:
+        """
+        Consuma un iterabile di righe (o coppie (timestamp, riga)) in un
+        solo passaggio; alla fine chiude l'intervallo aperto.
+        """
+        for item in lines:
+            if isinstance(item, tuple):
+                ts, line = item
+                yield from self.feed(line, timestamp=ts)
+            else:
+                yield from self.feed(item)
+        yield from self.flush()
+
+    def flush(self) -> List[RateAnomaly]:
+        """
+        Chiude l'intervallo corrente (fine stream o shutdown).
+        """
+        if self._bucket is None:
+            # eventi senza alcun timestamp: nessun intervallo da chiudere
+            self._counts, self._exemplars, self._new_keys = {}, {}, 0
+            return []
+        anomalies = self._close(self._bucket)
+        self._bucket = None
+        return anomalies
+
+    # ------------------------------------------------------------------
+    # CONTEGGIO
+    # ------------------------------------------------------------------
+
+    def _key(self, evt: LogEvent) -> str:
+        if self.by == "severity":
+            return f"severity:{evt.severity}"
+        key = f"template:{message_template(evt.message)}"
+        if key not in self._detectors and key not in self._counts:
+            # chiavi già note + chiavi nuove dell'intervallo aperto
+            # (diventano detector alla sua chiusura)
+            if len(self._detectors) + self._new_keys >= self.max_keys:
+                return OVERFLOW_KEY
+        return key
+
+    def _count(self, evt: LogEvent) -> None:
+        self.events += 1
+        key = self._key(evt)
+        if key not in self._counts and key not in self._detectors:
+            if key != OVERFLOW_KEY:
+                self._new_keys += 1
+        self._counts[key] = self._counts.get(key, 0) + 1
+
+        exemplars = self._exemplars.setdefault(key, [])
+        if len(exemplars) < self.max_exemplars:
+            exemplars.append(
+                {"file": evt.file, "line": evt.line, "message": evt.message}
+            )
+
+    def _advance(self, bucket: int) -> List[RateAnomaly]:
+        anomalies = self._close(self._bucket)
+        # intervalli vuoti: conteggio zero per le chiavi note, al più
+        # `max_gap` (un buco di giorni non costa giorni di update)
+        first_empty = max(self._bucket + 1, bucket - self.max_gap)
+        for empty in range(first_empty, bucket):
+            anomalies.extend(self._close(empty))
+        self._bucket = bucket
+        return anomalies
+
+    def _close(self, bucket: int) -> List[RateAnomaly]:
+        counts, self._counts = self._counts, {}
+        exemplars, self._exemplars = self._exemplars, {}
+        self._new_keys = 0
+        self.intervals += 1
+
+        for key in counts:
+            if key not in self._detectors:
+                self._detectors[key] = self._factory()
+
+        anomalies: List[RateAnomaly] = []
+        for key, detector in self._detectors.items():
+            count = counts.get(key, 0)
+            expected = detector.forecast()
+            anomaly = detector.update(count)
+            if anomaly is None:
+                continue
+            dropped = expected is not None and count < expected
+            if self.increases_only and dropped:
+                continue
+            anomalies.append(
+                RateAnomaly(
+                    key=key,
+                    interval_start=bucket * self.interval,
+                    interval=self.interval,
+                    count=count,
+                    expected=None if expected is None else round(expected, 3),
+                    score=anomaly.score,
+                    severity=anomaly.severity,
+                    exemplars=tuple(exemplars.get(key, ())),
+                )
+            )
+        return anomalies
+
+    # ------------------------------------------------------------------
+    # STATO
+    # ------------------------------------------------------------------
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "lines": self.lines,
+            "events": self.events,
+            "intervals": self.intervals,
+            "keys": len(self._detectors),
+            "interval": self.interval,
+            "by": self.by,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Checkpoint dei detector per chiave (l'intervallo aperto non è
+        incluso: chiamare `flush` prima dello shutdown).
+        """
+        return {
+            key: detector.to_dict()
+            for key, detector in self._detectors.items()
+        }
+
+    def restore(self, state: Dict[str, Any]) -> "LogRatePipeline":
+        for key, data in state.items():
+            self._detectors[key] = HoltWintersDetector.from_dict(data)
+        return self
@@ -1,10 +1,41 @@
 from __future__ import annotations
 
+import operator
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from functools import reduce
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 from ice_ai.agents.spec import AgentSpec
 
+if TYPE_CHECKING:
+    from ice_ai.agents.domain.ml_cluster import MiniBatchKMeans
+    from ice_ai.agents.domain.ml_multivariate import MahalanobisDetector
+    from ice_ai.agents.domain.ml_seasonal import DetectorBank, HoltWintersDetector
+    from ice_ai.agents.domain.ml_sketch import KLLSketch
+    from ice_ai.agents.domain.ml_stream import StreamingDetector
+
+try:  # backend vettoriale opzionale
+    import numpy as np
+except ImportError:  # pragma: no cover - dipende dall'ambiente
+    np = None
+
+
+# Sotto questa soglia l'overhead di conversione supera il guadagno
+VECTORIZE_MIN_SIZE = 256
+
+# Blocco delle somme cumulative: memoria temporanea limitata
+_SUM_BLOCK = 1 << 16
+
 
 # ============================================================
 # ML RESULT MODELS
@@ -29,6 +60,66 @@ class Anomaly:
         }
 
 
+# ============================================================
+# NUMERIC INPUT HELPERS
+# ============================================================
+
+def _as_float_array(values: Any) -> Any:
+    """
+    Vista float64 contigua 1-D dell'input (zero-copy per ndarray,
+    array.array('d') e memoryview di double). ValueError se l'input
+    non è una serie 1-D: gli indici segnalati devono valere sull'input.
+    """
+    arr = np.asarray(values)
+    if arr.ndim != 1:
+        raise ValueError(f"values must be 1-D, got shape {arr.shape}")
+    return np.ascontiguousarray(arr, dtype=np.float64)
+
+
+def _as_matrix(rows: Any) -> Any:
+    """
+    Matrice float64 2-D: una singola riga diventa 1 x d.
+    """
+    X = np.asarray(rows, dtype=np.float64)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    return X
+
+
+def _sequential_sum(arr: Any) -> float:
+    """
+    Somma da sinistra a destra di un array float64, nello stesso ordine
+    di `_python_sum`: `np.sum` somma a coppie e il risultato può
+    differire nell'ultima cifra. `cumsum` accumula in sequenza; il
+    totale parziale entra in testa al blocco successivo.
+    """
+    buf = np.empty(min(arr.size, _SUM_BLOCK) + 1)
+    total = 0.0
+    for start in range(0, arr.size, _SUM_BLOCK):
+        block = arr[start:start + _SUM_BLOCK]
+        part = buf[:block.size + 1]
+        part[0] = total
+        part[1:] = block
+        np.cumsum(part, out=part)
+        total = float(part[-1])
+    return total
+
+
+def _python_sum(values: Iterable[Any]) -> Any:
+    # `sum` su float usa la somma compensata da Python 3.12: l'ordine
+    # esplicito mantiene i due backend identici su ogni versione
+    return reduce(operator.add, values, 0)
+
+
+def _scalar(value: Any) -> Any:
+    """
+    Scalare Python nativo (int/float) anche per elementi NumPy,
+    così le descrizioni restano identiche tra backend.
+    """
+    item = getattr(value, "item", None)
+    return item() if item is not None else value
+
+
 # ============================================================
 # ML AGENT
 # ============================================================
@@ -40,13 +131,13 @@ class MLAgent:
     Responsabilità:
     - Analisi ML/statistica su dati testuali o numerici
     - Anomaly detection
-    - Pattern discovery (future)
-    - Clustering (future)
+    - Pattern discovery (feature hashing di testo)
+    - Clustering (mini-batch k-means)
 
     NON:
     - non carica modelli pesanti
-    - non gestisce training
-    - non accede a filesystem
+    - non gestisce training supervisionato
+    - non accede a filesystem (salvo persistenza esplicita dei centroidi)
     """
 
     # --------------------------------------------------------
@@ -61,6 +152,13 @@ class MLAgent:
         capabilities={
             "ml.anomaly.detect",
             "ml.anomaly.score",
+            "ml.anomaly.stream",
+            "ml.anomaly.robust",
+            "ml.anomaly.batch",
+            "ml.quantile.sketch",
+            "ml.anomaly.seasonal",
+            "ml.anomaly.multivariate",
+            "ml.cluster",
         },
         ui_label="ML Analyzer",
         ui_group="Diagnostics",
@@ -73,16 +171,24 @@ class MLAgent:
 
     def detect_anomalies(
         self,
-        values: List[float] | List[int],
+        values: Sequence[float] | Sequence[int],
         *,
         z_threshold: float = 3.0,
+        backend: str = "auto",
     ) -> Dict[str, Any]:
         """
         Rileva anomalie tramite z-score (baseline deterministica).
 
         Input:
-            values: lista numerica
+            values: sequenza numerica (list, array.array, memoryview,
+                    numpy.ndarray — letti senza copia quando possibile)
             z_threshold: soglia anomalia
+            backend: "auto" | "numpy" | "python"
+
+        Con NumPy disponibile e input grande le statistiche e la maschera
+        di soglia sono calcolate in blocco; solo gli indici segnalati
+        vengono materializzati. Entrambi i backend sommano nello stesso
+        ordine: risultati identici a parità di input. Un ndarray deve essere 1-D (ValueError altrimenti).
 
         Output:
             {
@@ -91,7 +197,7 @@ class MLAgent:
             }
         """
 
-        if not values:
+        if len(values) == 0:
             return {
                 "anomalies": [],
                 "summary": {
@@ -101,11 +207,10 @@ class MLAgent:
                 },
             }
 
-        mean = sum(values) / len(values)
-        variance = sum((v - mean) ** 2 for v in values) / len(values)
-        std = variance ** 0.5
-
-        anomalies: List[Anomaly] = []
+        if self._use_numpy(values, backend):
+            mean, std, hits = self._zscore_numpy(values, z_threshold)
+        else:
+            mean, std, hits = self._zscore_python(values, z_threshold)
 
         if std == 0:
             return {
@@ -117,17 +222,18 @@ class MLAgent:
                 },
             }
 
-        for idx, v in enumerate(values):
-            z = abs((v - mean) / std)
-            if z >= z_threshold:
-                anomalies.append(
-                    Anomaly(
-                        index=idx,
-                        score=round(z, 3),
-                        description=f"Value {v} deviates from mean",
-                        severity="error" if z >= z_threshold * 1.5 else "warning",
-                    )
+        anomalies: List[Anomaly] = []
+
+        for idx, z in hits:
+            v = _scalar(values[idx])
+            anomalies.append(
+                Anomaly(
+                    index=idx,
+                    score=round(z, 3),
+                    description=f"Value {v} deviates from mean",
+                    severity="error" if z >= z_threshold * 1.5 else "warning",
                 )
+            )
 
         return {
             "anomalies": [a.to_dict() for a in anomalies],
@@ -139,20 +245,514 @@ class MLAgent:
             },
         }
 
+    def detect_anomalies_batch(
+        self,
+        series: Any,
+        *,
+        z_threshold: float = 3.0,
+        backend: str = "auto",
+        workers: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        z-score su molte serie in una chiamata.
+
+        Input:
+            series: Mapping {id: valori}, matrice 2-D NumPy (una serie
+                    per riga) o sequenza di serie anche di lunghezze diverse
+            backend: "auto" | "numpy" | "python"
+            workers: processi per il backend puro (default: CPU)
+
+        Con NumPy tutte le serie sono elaborate in un'unica passata
+        vettoriale (somma pairwise: mean/std possono differire
+        nell'ultima cifra da `detect_anomalies`). Senza NumPy le serie
+        vengono distribuite a chunk su un process pool.
+
+        Output:
+            {
+                "series": {id: {"count", "mean", "std",
+                                "indices": [...], "scores": [...]}},
+                "summary": {...}
+            }
+        """
+        from ice_ai.agents.domain.ml_batch import (
+            normalize_series,
+            score_numpy,
+            score_python,
+        )
+
+        if backend == "numpy" and np is None:
+            raise RuntimeError("NumPy backend requested but not installed")
+
+        ids, values = normalize_series(series)
+        use_numpy = np is not None and backend != "python"
+
+        if use_numpy:
+            results = score_numpy(values, z_threshold)
+        else:
+            results = score_python(values, z_threshold, workers=workers)
+
+        by_id = dict(zip(ids, results))
+
+        return {
+            "series": by_id,
+            "summary": {
+                "series": len(ids),
+                "points": sum(len(v) for v in values),
+                "anomalous_series": sum(1 for r in results if r["count"]),
+                "anomalies": sum(r["count"] for r in results),
+                "threshold": z_threshold,
+                "backend": "numpy" if use_numpy else "python",
+            },
+        }
+
+    def detect_anomalies_multivariate(
+        self,
+        rows: Any,
+        *,
+        quantile: float = 0.999,
+        threshold: Optional[float] = None,
+        robust: bool = True,
+        feature_names: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Rileva righe anomale (es. CPU + latenza + error rate insieme)
+        tramite distanza di Mahalanobis. Richiede NumPy.
+
+        Input:
+            rows: matrice n x d (lista di righe o ndarray)
+            quantile: soglia come quantile chi-quadro a d gradi di libertà
+            threshold: soglia esplicita sulla distanza (prevale)
+            robust: stima baseline con C-step MCD (outlier esclusi)
+        """
+        detector = self.multivariate_detector(
+            quantile=quantile,
+            threshold=threshold,
+            feature_names=feature_names,
+        )
+        detector.fit(rows, robust=robust)
+        anomalies = detector.detect(rows)
+
+        return {
+            "anomalies": [a.to_dict() for a in anomalies],
+            "summary": {
+                "count": len(anomalies),
+                **detector.summary(),
+            },
+        }
+
+    def multivariate_detector(self, **options: Any) -> "MahalanobisDetector":
+        """
+        Detector Mahalanobis con inversa in cache e update rank-one
+        (`update`, `update_many`, `detect(rows, update=True)`).
+        """
+        if np is None:
+            raise RuntimeError("Multivariate detection requires NumPy")
+
+        from ice_ai.agents.domain.ml_multivariate import MahalanobisDetector
+
+        return MahalanobisDetector(**options)
+
+    def streaming_detector(self, **options: Any) -> "StreamingDetector":
+        """
+        Detector z-score online (Welford), O(1) per punto.
+
+        Opzioni: z_threshold, mode ("cumulative" | "decay" | "window"),
+        alpha, window, min_samples. Per ripristinare un checkpoint usare
+        `StreamingDetector.from_dict(state)`.
+        """
+        from ice_ai.agents.domain.ml_stream import StreamingDetector
+
+        return StreamingDetector(**options)
+
+    def detect_anomalies_robust(
+        self,
+        values: Sequence[float],
+        *,
+        window: int = 100,
+        threshold: float = 3.5,
+        min_samples: int = 10,
+    ) -> Dict[str, Any]:
+        """
+        Rileva anomalie con mediana / MAD su finestra scorrevole.
+
+        Ogni punto è valutato contro la finestra precedente con lo z-score
+        modificato 0.6745 * (x - mediana) / MAD: a differenza di media e
+        deviazione standard, non viene distorto dagli outlier stessi.
+        Costo O(log w) per punto (skiplist indicizzabile).
+        """
+        from ice_ai.agents.domain.ml_rolling import (
+            RollingRobustDetector,
+            describe_window,
+        )
+
+        detector = RollingRobustDetector(
+            window=window,
+            threshold=threshold,
+            min_samples=min_samples,
+        )
+        anomalies = detector.update_many(values)
+
+        return {
+            "anomalies": [a.to_dict() for a in anomalies],
+            "summary": {
+                "count": len(anomalies),
+                "window": window,
+                "threshold": threshold,
+                **describe_window(detector.window),
+            },
+        }
+
+    def rolling_quantiles(
+        self,
+        values: Sequence[float],
+        *,
+        window: int = 100,
+        quantiles: Sequence[float] = (0.25, 0.5, 0.75),
+    ) -> Dict[str, Any]:
+        """
+        Quantili della finestra scorrevole che termina su ogni punto.
+        """
+        from ice_ai.agents.domain.ml_rolling import rolling_quantiles
+
+        return {
+            "window": window,
+            "quantiles": list(quantiles),
+            "values": rolling_quantiles(values, window, quantiles),
+        }
+
+    def seasonal_detector(
+        self,
+        *,
+        period: Optional[int] = None,
+        history: Optional[Sequence[float]] = None,
+        **options: Any,
+    ) -> "HoltWintersDetector":
+        """
+        Detector Holt-Winters additivo (period=None: Holt / EWMA).
+
+        `history` esegue il warm-up in blocco; da lì in poi ogni punto
+        costa O(1). Opzioni: alpha, beta, gamma, var_alpha, threshold,
+        min_samples.
+        """
+        from ice_ai.agents.domain.ml_seasonal import HoltWintersDetector
+
+        detector = HoltWintersDetector(period=period, **options)
+        if history is not None:
+            detector.warm_up(history)
+        return detector
+
+    def ewma_detector(
+        self,
+        *,
+        alpha: float = 0.2,
+        **options: Any,
+    ) -> "HoltWintersDetector":
+        """
+        EWMA puro: Holt-Winters senza stagionalità né trend.
+        """
+        return self.seasonal_detector(alpha=alpha, beta=0.0, **options)
+
+    def detector_bank(self, **options: Any) -> "DetectorBank":
+        """
+        Detector stagionali per serie (es. per endpoint), creati on demand
+        con le stesse opzioni di `seasonal_detector`.
+        """
+        from ice_ai.agents.domain.ml_seasonal import (
+            DetectorBank,
+            HoltWintersDetector,
+        )
+
+        return DetectorBank(lambda: HoltWintersDetector(**options))
+
+    def cluster(
+        self,
+        rows: Any,
+        k: int,
+        *,
+        batch_size: int = 1024,
+        epochs: int = 3,
+        seed: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Raggruppa vettori numerici (es. finestre di metriche) con
+        mini-batch k-means. Richiede NumPy.
+
+        Per dati più grandi della memoria usare `clusterer(k)` e
+        `fit_batches` / `partial_fit` su blocchi letti a chunk.
+        """
+        model = self.clusterer(k, seed=seed)
+
+        from ice_ai.agents.domain.ml_cluster import iter_batches
+
+        X = np.asarray(rows, dtype=np.float64)
+        batches = list(iter_batches(X, batch_size))
+        model.fit_batches(batches, epochs=epochs)
+        labels, distances = self._assign_batches(model, batches)
+        result = self._cluster_result(model, labels, distances)
+        result["centroids"] = model.centroids.tolist()
+        return result
+
+    def cluster_texts(
+        self,
+        texts: Sequence[str],
+        k: int,
+        *,
+        dims: int = 256,
+        batch_size: int = 1024,
+        epochs: int = 3,
+        seed: Optional[int] = None,
+        examples: int = 3,
+    ) -> Dict[str, Any]:
+        """
+        Raggruppa messaggi (es. righe LogAgent) per forma: numeri e id
+        sono normalizzati, poi il testo è ridotto a feature hashate.
+
+        Ogni cluster riporta dimensione ed esempi rappresentativi
+        (i messaggi più vicini al centroide).
+
+        Le feature restano sparse: la matrice densa esiste un blocco
+        alla volta (batch_size x dims), per training e assegnazione.
+        """
+        model = self.clusterer(k, seed=seed)
+
+        from ice_ai.agents.domain.ml_cluster import (
+            dense_batch,
+            hash_text_batches,
+        )
+
+        sparse = hash_text_batches(texts, dims, batch_size)
+        for _ in range(epochs):
+            for batch in sparse:
+                model.partial_fit(dense_batch(batch, dims))
+        labels, distances = self._assign_batches(
+            model, (dense_batch(batch, dims) for batch in sparse)
+        )
+        result = self._cluster_result(model, labels, distances)
+
+        clusters = []
+        for c in range(model.k):
+            members = np.flatnonzero(labels == c)
+            closest = members[np.argsort(distances[members])[:examples]]
+            clusters.append(
+                {
+                    "cluster": c,
+                    "size": int(members.size),
+                    "examples": [texts[i] for i in closest.tolist()],
+                }
+            )
+        result["clusters"] = clusters
+        return result
+
+    def clusterer(self, k: int, **options: Any) -> "MiniBatchKMeans":
+        """
+        Modello mini-batch k-means incrementale (`partial_fit`,
+        `fit_batches`, `predict`). I centroidi si persistono con
+        `save(path)` e si riusano con `MiniBatchKMeans.load(path)`.
+        """
+        if np is None:
+            raise RuntimeError("Clustering requires NumPy")
+
+        from ice_ai.agents.domain.ml_cluster import MiniBatchKMeans
+
+        return MiniBatchKMeans(k, **options)
+
+    @staticmethod
+    def _assign_batches(
+        model: "MiniBatchKMeans",
+        batches: Iterable[Any],
+    ) -> Tuple[Any, Any]:
+        """
+        Etichette e distanze di tutte le righe, un blocco alla volta.
+        """
+        labels: List[Any] = []
+        distances: List[Any] = []
+        for batch in batches:
+            batch_labels, batch_distances = model.assign(batch)
+            labels.append(batch_labels)
+            distances.append(batch_distances)
+        if not labels:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        return np.concatenate(labels), np.concatenate(distances)
+
+    @staticmethod
+    def _cluster_result(
+        model: "MiniBatchKMeans",
+        labels: Any,
+        distances: Any,
+    ) -> Dict[str, Any]:
+        sizes = np.bincount(labels, minlength=model.k)
+        return {
+            "labels": labels.tolist(),
+            "summary": {
+                "k": model.k,
+                "rows": int(labels.size),
+                "sizes": sizes.tolist(),
+                "inertia": round(float(distances.sum()), 6),
+            },
+        }
+
+    # ========================================================
+    # BACKENDS
+    # ========================================================
+
+    @staticmethod
+    def _use_numpy(values: Sequence[Any], backend: str) -> bool:
+        if backend == "python" or np is None:
+            if backend == "numpy":
+                raise RuntimeError("NumPy backend requested but not installed")
+            return False
+        if backend == "numpy" or isinstance(values, np.ndarray):
+            return True
+        return len(values) >= VECTORIZE_MIN_SIZE
+
+    @staticmethod
+    def _zscore_python(
+        values: Sequence[float],
+        z_threshold: float,
+    ) -> Tuple[float, float, List[Tuple[int, float]]]:
+        n = len(values)
+
+        mean = _python_sum(values) / n
+        variance = _python_sum((v - mean) * (v - mean) for v in values) / n
+        std = variance ** 0.5
+
+        hits: List[Tuple[int, float]] = []
+        if std == 0:
+            return mean, std, hits
+
+        for idx, v in enumerate(values):
+            z = abs((v - mean) / std)
+            if z >= z_threshold:
+                hits.append((idx, z))
+
+        return mean, std, hits
+
+    @staticmethod
+    def _zscore_numpy(
+        values: Any,
+        z_threshold: float,
+    ) -> Tuple[float, float, List[Tuple[int, float]]]:
+        arr = _as_float_array(values)
+
+        mean = _sequential_sum(arr) / arr.size
+        dev = arr - mean
+        variance = _sequential_sum(dev * dev) / arr.size
+        std = variance ** 0.5
+
+        if std == 0:
+            return mean, std, []
+
+        z = np.abs(dev, out=dev)
+        z /= std
+        flagged = np.flatnonzero(z >= z_threshold)
+
+        return mean, std, [(int(i), float(z[i])) for i in flagged]
+
     # ========================================================
     # EXTENSION POINTS (FUTURE)
     # ========================================================
 
-    def score_series(self, values: List[float]) -> List[float]:
+    def score_series(
+        self,
+        values: Sequence[float],
+        *,
+        method: str = "max",
+        sketch: Optional["KLLSketch"] = None,
+        low: float = 0.05,
+        high: float = 0.95,
+    ) -> List[float]:
         """
         Restituisce uno score normalizzato per ogni valore.
-        Placeholder per futuri modelli ML.
+
+        Metodi:
+            "max": v / max(values) (baseline storica)
+            "rank": rank stimato del valore (CDF) in [0, 1]
+            "quantile": (v - q_low) / (q_high - q_low), limitato a [0, 1]
+
+        "rank" e "quantile" usano uno sketch KLL: passando `sketch`
+        (anche fuso da worker diversi) i valori non devono stare tutti
+        in memoria per costruire la normalizzazione; un singolo outlier
+        non schiaccia più gli altri score.
         """
-        if not values:
-            return []
+        if method == "max":
+            if not values:
+                return []
+
+            max_v = max(values)
+            if max_v == 0:
+                return [0.0 for _ in values]
+
+            return [round(v / max_v, 4) for v in values]
 
-        max_v = max(values)
-        if max_v == 0:
-            return [0.0 for _ in values]
+        return list(
+            self.score_stream(
+                values,
+                sketch=sketch,
+                method=method,
+                low=low,
+                high=high,
+            )
+        )
+
+    def score_stream(
+        self,
+        values: Iterable[float],
+        *,
+        sketch: Optional["KLLSketch"] = None,
+        method: str = "rank",
+        low: float = 0.05,
+        high: float = 0.95,
+    ) -> Iterator[float]:
+        """
+        Variante generatore di `score_series` per metodi a quantili.
+
+        Senza `sketch` i valori vengono letti due volte (costruzione e
+        scoring): in quel caso `values` deve essere ri-iterabile.
+        """
+        if method not in ("rank", "quantile"):
+            raise ValueError(f"Unknown scoring method: {method}")
+
+        if sketch is None:
+            sketch = self.quantile_sketch(values)
+        if sketch.n == 0:
+            return
+
+        if method == "rank":
+            for v in values:
+                yield round(sketch.rank(v), 4)
+            return
+
+        q_low = sketch.quantile(low)
+        span = sketch.quantile(high) - q_low
+        for v in values:
+            if span <= 0:
+                yield 0.0
+                continue
+            yield round(min(max((v - q_low) / span, 0.0), 1.0), 4)
+
+    def quantile_sketch(
+        self,
+        values: Optional[Iterable[float]] = None,
+        *,
+        k: int = 200,
+    ) -> "KLLSketch":
+        """
+        Sketch KLL fondibile (memoria O(k log n)), opzionalmente
+        popolato con `values`. Vedi `merge_sketches` per la fusione.
+        """
+        from ice_ai.agents.domain.ml_sketch import KLLSketch
+
+        sketch = KLLSketch(k)
+        if values is not None:
+            sketch.update_many(values)
+        return sketch
+
+    def merge_sketches(self, sketches: Iterable["KLLSketch"]) -> "KLLSketch":
+        """
+        Fonde sketch parziali (worker paralleli, host diversi).
+        """
+        from ice_ai.agents.domain.ml_sketch import merge_sketches
 
-        return [round(v / max_v, 4) for v in values]
+        sketches = list(sketches)
+        k = max((s.k for s in sketches), default=200)
+        return merge_sketches(sketches, k)
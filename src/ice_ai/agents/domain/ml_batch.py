@@ -0,0 +1,176 @@
+"""
+ML Batch — anomaly detection z-score su molte serie in una chiamata.
+
+RESPONSABILITÀ:
+- normalizzare input matrice / collezione ragged / mapping per id
+- calcolare statistiche di tutte le serie in un'unica passata NumPy
+- senza NumPy, distribuire le serie a chunk su un process pool
+
+NON FA:
+- detector incrementali (vedi ml_stream / ml_rolling)
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from ice_ai.agents.domain.ml import MLAgent, np
+
+
+# Sotto questa mole di punti il pool costa più di quanto fa risparmiare
+POOL_MIN_POINTS = 200_000
+
+
+def normalize_series(series: Any) -> Tuple[List[Hashable], List[Any]]:
+    """
+    Ritorna (ids, serie) da:
+    - Mapping {id: valori}
+    - matrice 2-D NumPy (una serie per riga, id = indice di riga)
+    - sequenza di serie (id = posizione)
+    """
+    if isinstance(series, Mapping):
+        return list(series.keys()), list(series.values())
+
+    if np is not None and isinstance(series, np.ndarray):
+        if series.ndim == 1:
+            return [0], [series]
+        rows = series.reshape(series.shape[0], -1)
+        return list(range(rows.shape[0])), list(rows)
+
+    items = list(series)
+    return list(range(len(items))), items
+
+
+def _empty_entry() -> Dict[str, Any]:
+    return {"count": 0, "mean": None, "std": None, "indices": [], "scores": []}
+
+
+def _entry(
+    mean: float,
+    std: float,
+    indices: List[int],
+    scores: List[float],
+) -> Dict[str, Any]:
+    return {
+        "count": len(indices),
+        "mean": round(mean, 4),
+        "std": round(std, 4),
+        "indices": indices,
+        "scores": [round(z, 3) for z in scores],
+    }
+
+
+# ============================================================
+# NUMPY BACKEND
+# ============================================================
+
+def score_numpy(
+    values: List[Any],
+    z_threshold: float,
+) -> List[Dict[str, Any]]:
+    """
+    Tutte le serie concatenate in un unico array: somme per segmento
+    con `reduceat`, maschera di soglia e indici in blocco.
+    """
+    lengths = np.fromiter(
+        (len(v) for v in values), dtype=np.int64, count=len(values)
+    )
+    results: List[Dict[str, Any]] = [_empty_entry() for _ in values]
+
+    present = np.flatnonzero(lengths > 0)
+    if present.size == 0:
+        return results
+
+    flat = np.concatenate(
+        [np.asarray(values[i], dtype=np.float64).reshape(-1) for i in present]
+    )
+    seg_len = lengths[present]
+    offsets = np.concatenate(([0], np.cumsum(seg_len)[:-1]))
+
+    means = np.add.reduceat(flat, offsets) / seg_len
+    dev = flat - np.repeat(means, seg_len)
+    stds = np.sqrt(np.add.reduceat(np.square(dev), offsets) / seg_len)
+
+    rep_std = np.repeat(stds, seg_len)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.abs(dev / rep_std)
+    mask = (rep_std > 0) & (z >= z_threshold)
+
+    hits = np.flatnonzero(mask)
+    owner = np.searchsorted(offsets, hits, side="right") - 1
+    bounds = np.searchsorted(owner, np.arange(present.size + 1))
+
+    for k, i in enumerate(present):
+        lo, hi = bounds[k], bounds[k + 1]
+        local = (hits[lo:hi] - offsets[k]).tolist()
+        results[i] = _entry(
+            float(means[k]),
+            float(stds[k]),
+            local,
+            z[hits[lo:hi]].tolist(),
+        )
+
+    return results
+
+
+# ============================================================
+# PURE-PYTHON / PROCESS POOL BACKEND
+# ============================================================
+
+def _score_chunk(
+    chunk: List[Sequence[float]],
+    z_threshold: float,
+) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    for values in chunk:
+        if len(values) == 0:
+            out.append(_empty_entry())
+            continue
+        mean, std, hits = MLAgent._zscore_python(values, z_threshold)
+        out.append(
+            _entry(mean, std, [i for i, _ in hits], [z for _, z in hits])
+        )
+    return out
+
+
+def score_python(
+    values: List[Sequence[float]],
+    z_threshold: float,
+    *,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Serie distribuite a chunk su un process pool (il GIL impedisce ai
+    thread di aiutare su calcolo puro). Input piccoli restano inline.
+    """
+    workers = workers or os.cpu_count() or 1
+    points = sum(len(v) for v in values)
+
+    if workers <= 1 or len(values) < 2 or points < POOL_MIN_POINTS:
+        return _score_chunk(values, z_threshold)
+
+    # alcuni chunk per worker: bilanciamento senza moltiplicare l'IPC
+    chunk_size = chunk_size or max(1, len(values) // (workers * 4))
+    chunks = [
+        values[i:i + chunk_size]
+        for i in range(0, len(values), chunk_size)
+    ]
+
+    results: List[Dict[str, Any]] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        thresholds = [z_threshold] * len(chunks)
+        for part in pool.map(_score_chunk, chunks, thresholds):
+            results.extend(part)
+    return results
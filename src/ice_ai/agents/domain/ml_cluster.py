@@ -0,0 +1,284 @@
+"""
+ML Cluster — mini-batch k-means per pattern discovery.
+
+RESPONSABILITÀ:
+- clustering di vettori numerici a blocchi (dati più grandi della RAM)
+- feature hashing di testo (es. messaggi LogAgent) in vettori fissi
+- distanze vettoriali NumPy, nessun loop Python per punto
+- persistenza dei centroidi per riuso tra esecuzioni
+
+NON FA:
+- scelta automatica di k
+- funzionare senza NumPy (il chiamante verifica la disponibilità)
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ice_ai.agents.domain.ml import _as_matrix, np
+from ice_ai.utils.fs import write_json_atomic
+
+
+STATE_VERSION = 1
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+_DIGIT_RE = re.compile(r"\d")
+
+
+# ============================================================
+# TEXT FEATURES
+# ============================================================
+
+def text_tokens(text: str) -> List[str]:
+    """
+    Token normalizzati: quelli con cifre (numeri, id, durate) diventano
+    segnaposto, così "took 12ms" e "took 950ms" condividono le feature.
+    """
+    return [
+        "<var>" if _DIGIT_RE.search(token) else token
+        for token in _TOKEN_RE.findall(text.lower())
+    ]
+
+
+def _hash_row(text: str, dims: int) -> Any:
+    vec = np.zeros(dims, dtype=np.float64)
+    tokens = text_tokens(text)
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vec[h % dims] += 1.0 if (h >> 31) & 1 else -1.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def hash_text_features(texts: Iterable[str], dims: int = 256) -> Any:
+    """
+    Feature hashing (con segno) di unigrammi e bigrammi, normalizzato L2.
+
+    Hash stabile (crc32), indipendente da PYTHONHASHSEED: i centroidi
+    persistiti restano validi tra processi.
+    """
+    rows = [_hash_row(text, dims) for text in texts]
+    if not rows:
+        return np.zeros((0, dims), dtype=np.float64)
+    return np.vstack(rows)
+
+
+# (righe, riga, colonna, valore): blocco di feature in forma sparsa
+SparseBatch = Tuple[int, Any, Any, Any]
+
+
+def hash_text_batches(
+    texts: Sequence[str],
+    dims: int = 256,
+    batch_size: int = 1024,
+) -> List[SparseBatch]:
+    """
+    Come `hash_text_features`, a blocchi e in forma sparsa: la memoria
+    segue il numero di token, non n x dims. Ogni testo è hashato una
+    volta sola; `dense_batch` ricostruisce un blocco alla volta.
+    """
+    batches: List[SparseBatch] = []
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start:start + batch_size]
+        rows, cols, vals = [], [], []
+        for i, text in enumerate(chunk):
+            vec = _hash_row(text, dims)
+            nonzero = np.flatnonzero(vec)
+            rows.append(np.full(nonzero.size, i, dtype=np.int32))
+            cols.append(nonzero.astype(np.int32))
+            vals.append(vec[nonzero])
+        batches.append((
+            len(chunk),
+            np.concatenate(rows),
+            np.concatenate(cols),
+            np.concatenate(vals),
+        ))
+    return batches
+
+
+def dense_batch(batch: SparseBatch, dims: int) -> Any:
+    size, rows, cols, vals = batch
+    X = np.zeros((size, dims), dtype=np.float64)
+    X[rows, cols] = vals
+    return X
+
+
+# ============================================================
+# MINI-BATCH K-MEANS
+# ============================================================
+
+class MiniBatchKMeans:
+    """
+    Mini-batch k-means (Sculley, 2010).
+
+    Ogni blocco sposta i centroidi verso la media dei punti assegnati
+    con learning rate n_c / count_c: il costo per blocco è O(b · k · d),
+    indipendente dal volume totale visto.
+    """
+
+    def __init__(
+        self,
+        k: int,
+        *,
+        seed: Optional[int] = None,
+    ) -> None:
+        if np is None:
+            raise RuntimeError("MiniBatchKMeans requires NumPy")
+        if k < 1:
+            raise ValueError("k must be >= 1")
+        self.k = k
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
+
+        self.centroids: Any = None
+        self.counts: Any = None
+        self.inertia: Optional[float] = None
+        self.seen = 0
+
+    # ------------------------------------------------------------------
+    # DISTANZE
+    # ------------------------------------------------------------------
+
+    def _distances_sq(self, X: Any) -> Any:
+        # ||x||² - 2 x·c + ||c||², in blocco
+        d2 = (
+            np.einsum("ij,ij->i", X, X)[:, None]
+            - 2.0 * X @ self.centroids.T
+            + np.einsum("ij,ij->i", self.centroids, self.centroids)[None, :]
+        )
+        return np.maximum(d2, 0.0)
+
+    def assign(self, rows: Any) -> Tuple[Any, Any]:
+        """
+        Etichette e distanze al quadrato dal centroide assegnato.
+        """
+        if self.centroids is None:
+            raise ValueError("model not fitted")
+        X = _as_matrix(rows)
+        if X.shape[0] == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        d2 = self._distances_sq(X)
+        labels = np.argmin(d2, axis=1)
+        return labels, d2[np.arange(X.shape[0]), labels]
+
+    def predict(self, rows: Any) -> Any:
+        return self.assign(rows)[0]
+
+    # ------------------------------------------------------------------
+    # TRAINING
+    # ------------------------------------------------------------------
+
+    def _init_centroids(self, X: Any) -> None:
+        """
+        k-means++ sul primo blocco.
+        """
+        if X.shape[0] < self.k:
+            raise ValueError(
+                f"first batch needs at least k={self.k} rows, got {X.shape[0]}"
+            )
+        first = int(self._rng.integers(X.shape[0]))
+        centroids = [X[first]]
+        closest = np.sum((X - X[first]) ** 2, axis=1)
+        for _ in range(1, self.k):
+            total = closest.sum()
+            if total <= 0:
+                idx = int(self._rng.integers(X.shape[0]))
+            else:
+                idx = int(self._rng.choice(X.shape[0], p=closest / total))
+            centroids.append(X[idx])
+            closest = np.minimum(closest, np.sum((X - X[idx]) ** 2, axis=1))
+
+        self.centroids = np.array(centroids, dtype=np.float64)
+        self.counts = np.zeros(self.k, dtype=np.float64)
+
+    def partial_fit(self, rows: Any) -> "MiniBatchKMeans":
+        X = _as_matrix(rows)
+        if X.shape[0] == 0:
+            return self
+        if self.centroids is None:
+            self._init_centroids(X)
+
+        labels, best = self.assign(X)
+        self.inertia = float(best.sum())
+
+        batch_counts = np.bincount(labels, minlength=self.k).astype(np.float64)
+        sums = np.zeros_like(self.centroids)
+        np.add.at(sums, labels, X)
+
+        hit = batch_counts > 0
+        self.counts[hit] += batch_counts[hit]
+        eta = batch_counts[hit] / self.counts[hit]
+        means = sums[hit] / batch_counts[hit][:, None]
+        self.centroids[hit] += eta[:, None] * (means - self.centroids[hit])
+
+        # centroidi mai assegnati: riposizionati sui punti peggio serviti
+        dead = np.flatnonzero(self.counts == 0)
+        if dead.size:
+            far = np.argsort(best)[::-1][: dead.size]
+            self.centroids[dead[: far.size]] = X[far]
+
+        self.seen += X.shape[0]
+        return self
+
+    def fit_batches(
+        self,
+        batches: Iterable[Any],
+        *,
+        epochs: int = 1,
+    ) -> "MiniBatchKMeans":
+        """
+        Addestra da un iterabile di blocchi (es. letti da disco a chunk).
+        Con epochs > 1 l'iterabile deve essere ri-iterabile.
+        """
+        for _ in range(epochs):
+            for batch in batches:
+                self.partial_fit(batch)
+        return self
+
+    # ------------------------------------------------------------------
+    # PERSISTENZA
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": STATE_VERSION,
+            "k": self.k,
+            "seed": self.seed,
+            "seen": self.seen,
+            "centroids": (
+                None if self.centroids is None else self.centroids.tolist()
+            ),
+            "counts": None if self.counts is None else self.counts.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "MiniBatchKMeans":
+        if state.get("version") != STATE_VERSION:
+            raise ValueError(
+                f"Unsupported clustering state version: {state.get('version')}"
+            )
+        model = cls(int(state["k"]), seed=state.get("seed"))
+        model.seen = int(state.get("seen", 0))
+        if state.get("centroids") is not None:
+            model.centroids = np.array(state["centroids"], dtype=np.float64)
+            model.counts = np.array(state["counts"], dtype=np.float64)
+        return model
+
+    def save(self, path: str) -> None:
+        write_json_atomic(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path: str) -> "MiniBatchKMeans":
+        with open(path, "r", encoding="utf-8") as fh:
+            return cls.from_dict(json.load(fh))
+
+
+def iter_batches(rows: Sequence[Any], batch_size: int) -> Iterable[Any]:
+    for start in range(0, len(rows), batch_size):
+        yield rows[start:start + batch_size]
+
@@ -0,0 +1,270 @@
+"""
+ML Multivariate — anomaly detection con distanza di Mahalanobis.
+
+RESPONSABILITÀ:
+- stimare media e covarianza di righe multi-feature in blocco (NumPy)
+- mantenere l'inversa in cache e aggiornarla con update rank-one
+  (Sherman-Morrison) man mano che arrivano nuove righe
+- stima robusta opzionale (C-step di tipo MCD)
+- scoring vettoriale di migliaia di righe senza loop Python per riga
+
+NON FA:
+- funzionare senza NumPy (il chiamante verifica la disponibilità)
+"""
+
+from __future__ import annotations
+
+import math
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Sequence
+
+from ice_ai.agents.domain.ml import Anomaly, _as_matrix, np
+
+
+def chi2_quantile(q: float, dof: int) -> float:
+    """
+    Quantile chi-quadro approssimato (Wilson-Hilferty), senza SciPy.
+    """
+    z = NormalDist().inv_cdf(q)
+    h = 2.0 / (9.0 * dof)
+    return dof * (1.0 - h + z * math.sqrt(h)) ** 3
+
+
+class MahalanobisDetector:
+    """
+    Detector multivariato: segnala righe la cui distanza di Mahalanobis
+    dalla baseline supera la soglia (default: quantile chi-quadro).
+
+    Covarianza di popolazione; l'inversa è ricalcolata da zero ogni
+    `refresh_every` update rank-one per contenere la deriva numerica.
+    """
+
+    def __init__(
+        self,
+        *,
+        quantile: float = 0.999,
+        threshold: Optional[float] = None,
+        ridge: float = 1e-9,
+        refresh_every: int = 10_000,
+        feature_names: Optional[Sequence[str]] = None,
+    ) -> None:
+        if np is None:
+            raise RuntimeError("MahalanobisDetector requires NumPy")
+        self.quantile = quantile
+        self._threshold = threshold
+        self.ridge = ridge
+        self.refresh_every = refresh_every
+        self.feature_names = list(feature_names) if feature_names else None
+
+        self.n = 0
+        self.mean: Any = None
+        self.cov: Any = None
+        self._inv: Any = None
+        self._since_refresh = 0
+
+    # ------------------------------------------------------------------
+    # FIT
+    # ------------------------------------------------------------------
+
+    @property
+    def dims(self) -> int:
+        return 0 if self.mean is None else int(self.mean.shape[0])
+
+    @property
+    def threshold(self) -> float:
+        if self._threshold is not None:
+            return self._threshold
+        return math.sqrt(chi2_quantile(self.quantile, max(self.dims, 1)))
+
+    def fit(
+        self,
+        rows: Any,
+        *,
+        robust: bool = False,
+        support: float = 0.75,
+        steps: int = 5,
+    ) -> "MahalanobisDetector":
+        """
+        Stima media / covarianza in blocco.
+
+        robust=True: C-step (FAST-MCD da un singolo avvio) — si tiene la
+        frazione `support` di righe più vicine e si ristima, per `steps`
+        iterazioni, poi si corregge la scala con la mediana chi-quadro.
+        Gli outlier non gonfiano più la covarianza.
+        """
+        X = _as_matrix(rows)
+        self._set_stats(X)
+
+        if robust and X.shape[0] > X.shape[1] + 1:
+            h = max(int(support * X.shape[0]), X.shape[1] + 1)
+            subset: Any = None
+            for _ in range(steps):
+                keep = np.argsort(self._distances_sq(X))[:h]
+                keep.sort()
+                if subset is not None and np.array_equal(keep, subset):
+                    break
+                subset = keep
+                self._set_stats(X[keep])
+
+            # fattore di consistenza: la covarianza del sottoinsieme più
+            # compatto sottostima quella reale
+            factor = float(np.median(self._distances_sq(X))) / chi2_quantile(
+                0.5, X.shape[1]
+            )
+            if factor > 0:
+                self.cov = self.cov * factor
+                self._refresh()
+
+        return self
+
+    def _set_stats(self, X: Any) -> None:
+        self.n = X.shape[0]
+        self.mean = X.mean(axis=0)
+        diff = X - self.mean
+        self.cov = diff.T @ diff / self.n
+        self._refresh()
+
+    def _refresh(self) -> None:
+        d = self.cov.shape[0]
+        self._inv = np.linalg.pinv(self.cov + self.ridge * np.eye(d))
+        self._since_refresh = 0
+
+    # ------------------------------------------------------------------
+    # UPDATE INCREMENTALE
+    # ------------------------------------------------------------------
+
+    def update(self, row: Any) -> None:
+        """
+        Incorpora una riga: media / covarianza alla Welford e inversa
+        aggiornata con Sherman-Morrison in O(d²).
+        """
+        x = np.asarray(row, dtype=np.float64).reshape(-1)
+        if self.mean is None:
+            self._set_stats(x.reshape(1, -1))
+            return
+
+        n = self.n
+        u = x - self.mean
+        a = n / (n + 1.0)
+        b = n / (n + 1.0) ** 2
+
+        # C' = a·C + b·u·uᵀ  =>  C'^-1 = (1/a)·(C^-1 - k·v·vᵀ)
+        v = self._inv @ u
+        k = (b / a) / (1.0 + (b / a) * float(u @ v))
+        self._inv = (self._inv - k * np.outer(v, v)) / a
+
+        self.cov = a * self.cov + b * np.outer(u, u)
+        self.mean = self.mean + u / (n + 1.0)
+        self.n = n + 1
+
+        self._since_refresh += 1
+        if self._since_refresh >= self.refresh_every:
+            self._refresh()
+
+    def update_many(self, rows: Any) -> None:
+        """
+        Incorpora un blocco di righe. Blocchi grandi (>= d righe) vengono
+        fusi con la formula di Chan e l'inversa ricalcolata una volta
+        sola; blocchi piccoli usano update rank-one.
+        """
+        X = _as_matrix(rows)
+        if X.shape[0] == 0:
+            return
+        if self.mean is None:
+            self._set_stats(X)
+            return
+        if X.shape[0] < X.shape[1]:
+            for row in X:
+                self.update(row)
+            return
+
+        m = X.shape[0]
+        batch_mean = X.mean(axis=0)
+        diff = X - batch_mean
+        batch_cov = diff.T @ diff / m
+
+        total = self.n + m
+        delta = batch_mean - self.mean
+        self.cov = (
+            self.n * self.cov
+            + m * batch_cov
+            + np.outer(delta, delta) * (self.n * m / total)
+        ) / total
+        self.mean = self.mean + delta * (m / total)
+        self.n = total
+        self._refresh()
+
+    # ------------------------------------------------------------------
+    # SCORING
+    # ------------------------------------------------------------------
+
+    def _distances_sq(self, X: Any) -> Any:
+        diff = X - self.mean
+        return np.einsum("ij,jk,ik->i", diff, self._inv, diff)
+
+    def score(self, rows: Any) -> Any:
+        """
+        Distanze di Mahalanobis (ndarray) per ogni riga.
+        """
+        if self.mean is None:
+            raise ValueError("detector not fitted")
+        d2 = self._distances_sq(_as_matrix(rows))
+        return np.sqrt(np.maximum(d2, 0.0))
+
+    def detect(
+        self,
+        rows: Any,
+        *,
+        update: bool = False,
+        start_index: int = 0,
+    ) -> List[Anomaly]:
+        """
+        Segnala le righe oltre soglia; solo quelle vengono materializzate.
+
+        update=True: dopo lo scoring le righe *non* anomale vengono
+        incorporate nella baseline.
+        """
+        X = _as_matrix(rows)
+        distances = self.score(X)
+        threshold = self.threshold
+        flagged = np.flatnonzero(distances >= threshold)
+
+        anomalies: List[Anomaly] = []
+        if flagged.size:
+            diff = X[flagged] - self.mean
+            contrib = diff * (diff @ self._inv)
+            top = np.argmax(contrib, axis=1)
+            for row_idx, feature in zip(flagged.tolist(), top.tolist()):
+                d = float(distances[row_idx])
+                severity = "error" if d >= threshold * 1.5 else "warning"
+                anomalies.append(
+                    Anomaly(
+                        index=start_index + row_idx,
+                        score=round(d, 3),
+                        description=(
+                            "Row deviates from multivariate baseline "
+                            f"(top feature: {self._feature(feature)})"
+                        ),
+                        severity=severity,
+                    )
+                )
+
+        if update:
+            inliers = np.ones(X.shape[0], dtype=bool)
+            inliers[flagged] = False
+            self.update_many(X[inliers])
+
+        return anomalies
+
+    def _feature(self, idx: int) -> str:
+        if self.feature_names and idx < len(self.feature_names):
+            return self.feature_names[idx]
+        return str(idx)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "rows": self.n,
+            "dims": self.dims,
+            "threshold": round(self.threshold, 4),
+        }
+
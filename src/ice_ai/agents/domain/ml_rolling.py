@@ -0,0 +1,382 @@
+"""
+ML Rolling — detector robusti su finestra scorrevole (mediana / MAD).
+
+RESPONSABILITÀ:
+- mantenere la finestra ordinata con costo O(log w) per passo
+- calcolare mediana, MAD e quantili della finestra senza ri-ordinare
+- segnalare anomalie con z-score modificato (Iglewicz-Hoaglin)
+
+NON FA:
+- statistiche su tutta la storia (vedi ml_stream)
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from collections import deque
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from ice_ai.agents.domain.ml import Anomaly
+
+
+# 0.6745 = quantile 0.75 della normale standard: rende MAD
+# confrontabile con la deviazione standard
+MAD_SCALE = 0.6745
+
+
+# ============================================================
+# INDEXABLE SKIPLIST
+# ============================================================
+
+class _Node:
+    __slots__ = ("value", "next", "width")
+
+    def __init__(
+        self,
+        value: Any,
+        next: List["_Node"],
+        width: List[int],
+    ) -> None:
+        self.value = value
+        self.next = next
+        self.width = width
+
+
+class _End:
+    """Sentinella di fine lista: maggiore di qualsiasi valore."""
+
+    def __gt__(self, other: object) -> bool:
+        return True
+
+    def __ge__(self, other: object) -> bool:
+        return True
+
+    def __lt__(self, other: object) -> bool:
+        return False
+
+    def __le__(self, other: object) -> bool:
+        return False
+
+
+_NIL = _Node(_End(), [], [])
+
+
+class IndexableSkiplist:
+    """
+    Multiset ordinato con insert / remove / accesso per rank in O(log n).
+
+    Ogni link conosce quanti elementi scavalca (`width`): la ricerca
+    per indice segue i link più lunghi che non superano il rank.
+    """
+
+    def __init__(self, expected_size: int = 128) -> None:
+        self.size = 0
+        self.maxlevels = int(1 + math.log(max(expected_size, 2), 2))
+        self.head = _Node(
+            float("-inf"),
+            [_NIL] * self.maxlevels,
+            [1] * self.maxlevels,
+        )
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, i: int) -> float:
+        if i < 0:
+            i += self.size
+        if not 0 <= i < self.size:
+            raise IndexError("skiplist index out of range")
+
+        node = self.head
+        i += 1
+        for level in range(self.maxlevels - 1, -1, -1):
+            width = node.width[level]
+            while width <= i:
+                i -= width
+                node = node.next[level]
+                width = node.width[level]
+        return node.value
+
+    def __iter__(self) -> Iterator[float]:
+        node = self.head.next[0]
+        while node is not _NIL:
+            yield node.value
+            node = node.next[0]
+
+    def insert(self, value: float) -> None:
+        chain: List[_Node] = [None] * self.maxlevels  # type: ignore[list-item]
+        steps_at_level = [0] * self.maxlevels
+        node = self.head
+        for level in reversed(range(self.maxlevels)):
+            while node.next[level].value <= value:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        d = min(self.maxlevels, 1 - int(math.log(random.random() or 1e-300, 2.0)))
+        new = _Node(value, [None] * d, [None] * d)  # type: ignore[list-item]
+        steps = 0
+        for level in range(d):
+            prev = chain[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            new.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(d, self.maxlevels):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, value: float) -> None:
+        chain: List[_Node] = [None] * self.maxlevels  # type: ignore[list-item]
+        node = self.head
+        for level in reversed(range(self.maxlevels)):
+            while node.next[level].value < value:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is _NIL or target.value != value:
+            raise KeyError("value not found in skiplist")
+
+        d = len(target.next)
+        for level in range(d):
+            prev = chain[level]
+            prev.width[level] += prev.next[level].width[level] - 1
+            prev.next[level] = prev.next[level].next[level]
+        for level in range(d, self.maxlevels):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+
+# ============================================================
+# ORDER STATISTICS
+# ============================================================
+
+def _kth_pair_of_two(
+    a: Callable[[int], float],
+    len_a: int,
+    b: Callable[[int], float],
+    len_b: int,
+    k: int,
+) -> Tuple[float, Optional[float]]:
+    """
+    (k-esimo, (k-1)-esimo) elemento 0-based della fusione di due sequenze
+    ordinate ad accesso casuale, in O(log) accessi.
+    """
+    lo = max(0, k + 1 - len_b)
+    hi = min(k + 1, len_a)
+    while lo < hi:
+        i = (lo + hi) // 2
+        j = k + 1 - i
+        if j > 0 and b(j - 1) > a(i):
+            lo = i + 1
+        else:
+            hi = i
+
+    # i elementi presi da a, j da b: i due più grandi sono k e k-1
+    i = lo
+    j = k + 1 - i
+    taken = []
+    if i > 0:
+        taken.append(a(i - 1))
+        if i > 1:
+            taken.append(a(i - 2))
+    if j > 0:
+        taken.append(b(j - 1))
+        if j > 1:
+            taken.append(b(j - 2))
+    taken.sort(reverse=True)
+    return taken[0], (taken[1] if len(taken) > 1 else None)
+
+
+class RollingWindow:
+    """
+    Finestra scorrevole ordinata: mediana, quantili e MAD in O(log² w)
+    accessi per query, O(log w) per update.
+    """
+
+    def __init__(self, window: int) -> None:
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        self.window = window
+        self._fifo: Deque[float] = deque()
+        self._sorted = IndexableSkiplist(window)
+
+    def __len__(self) -> int:
+        return len(self._fifo)
+
+    def push(self, value: float) -> None:
+        """
+        ValueError su NaN: non ha posizione in un ordinamento (e non
+        potrebbe più essere ritrovato nella skiplist per l'eviction).
+        """
+        value = float(value)
+        if math.isnan(value):
+            raise ValueError("NaN cannot enter a rolling window")
+        if len(self._fifo) == self.window:
+            self._sorted.remove(self._fifo.popleft())
+        self._fifo.append(value)
+        self._sorted.insert(value)
+
+    def quantile(self, q: float) -> float:
+        """
+        Quantile con interpolazione lineare (come numpy "linear").
+        """
+        n = len(self._sorted)
+        if n == 0:
+            raise ValueError("quantile of empty window")
+        pos = q * (n - 1)
+        lo = int(math.floor(pos))
+        hi = min(lo + 1, n - 1)
+        frac = pos - lo
+        low = self._sorted[lo]
+        if frac == 0 or hi == lo:
+            return low
+        return low + (self._sorted[hi] - low) * frac
+
+    def median(self) -> float:
+        return self.quantile(0.5)
+
+    def mad(self, median: Optional[float] = None) -> float:
+        """
+        Median Absolute Deviation senza materializzare le distanze.
+
+        Le distanze |x - m| formano due sequenze ordinate (a sinistra e a
+        destra della mediana): la loro mediana si ottiene come k-esimo
+        elemento della fusione.
+        """
+        n = len(self._sorted)
+        if n == 0:
+            raise ValueError("MAD of empty window")
+        m = self.median() if median is None else median
+        s = self._sorted
+
+        # a sinistra di n // 2 tutti i valori sono <= m, a destra >= m
+        split = n // 2
+
+        def left(i: int) -> float:
+            return m - s[split - 1 - i]
+
+        def right(j: int) -> float:
+            return s[split + j] - m
+
+        upper, lower = _kth_pair_of_two(left, split, right, n - split, n // 2)
+        if n % 2 or lower is None:
+            return upper
+        return (lower + upper) / 2
+
+
+# ============================================================
+# ROBUST DETECTOR
+# ============================================================
+
+class RollingRobustDetector:
+    """
+    Detector robusto: z-score modificato 0.6745 * (x - mediana) / MAD
+    sulla finestra precedente al punto.
+
+    Mediana e MAD non vengono spostate dagli outlier che si cercano,
+    a differenza di media e deviazione standard.
+    """
+
+    def __init__(
+        self,
+        *,
+        window: int = 100,
+        threshold: float = 3.5,
+        min_samples: int = 10,
+    ) -> None:
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.index = 0
+        self._window = RollingWindow(window)
+
+    @property
+    def window(self) -> RollingWindow:
+        return self._window
+
+    def score(self, value: float) -> Optional[float]:
+        if len(self._window) < self.min_samples:
+            return None
+        median = self._window.median()
+        mad = self._window.mad(median)
+        if mad == 0:
+            return None
+        return abs(MAD_SCALE * (value - median) / mad)
+
+    def update(self, value: float) -> Optional[Anomaly]:
+        """
+        Valuta e aggiunge un punto. NaN (valore mancante) consuma un
+        indice ma non entra nella finestra né viene segnalato.
+        """
+        idx = self.index
+        self.index += 1
+        if math.isnan(value):
+            return None
+
+        z = self.score(value)
+        self._window.push(value)
+
+        if z is None or z < self.threshold:
+            return None
+
+        return Anomaly(
+            index=idx,
+            score=round(z, 3),
+            description=f"Value {value} deviates from rolling median",
+            severity="error" if z >= self.threshold * 1.5 else "warning",
+        )
+
+    def update_many(self, values: Iterable[float]) -> List[Anomaly]:
+        anomalies: List[Anomaly] = []
+        for value in values:
+            anomaly = self.update(value)
+            if anomaly is not None:
+                anomalies.append(anomaly)
+        return anomalies
+
+
+def rolling_quantiles(
+    values: Iterable[float],
+    window: int,
+    quantiles: Sequence[float],
+) -> List[List[float]]:
+    """
+    Quantili della finestra che termina su ogni punto (inclusivo).
+    I NaN sono saltati: il punto riporta i quantili della finestra
+    corrente (NaN finché è vuota).
+    """
+    rolling = RollingWindow(window)
+    out: List[List[float]] = []
+    for value in values:
+        if not math.isnan(value):
+            rolling.push(value)
+        if len(rolling) == 0:
+            out.append([math.nan] * len(quantiles))
+        else:
+            out.append([rolling.quantile(q) for q in quantiles])
+    return out
+
+
+def describe_window(rolling: RollingWindow) -> Dict[str, Any]:
+    if len(rolling) == 0:
+        return {"size": 0, "median": None, "mad": None}
+    median = rolling.median()
+    return {
+        "size": len(rolling),
+        "median": round(median, 4),
+        "mad": round(rolling.mad(median), 4),
+    }
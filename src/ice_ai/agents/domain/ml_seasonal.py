@@ -0,0 +1,331 @@
+"""
+ML Seasonal — detector EWMA / Holt-Winters con stato incrementale.
+
+RESPONSABILITÀ:
+- prevedere il punto successivo (livello + trend + stagionalità)
+- valutare il residuo contro la sua varianza esponenziale
+- warm-up in blocco dalla storia, poi aggiornamento O(1) per punto
+- stato compatto (array di double) per serie, serializzabile
+
+NON FA:
+- fitting dei parametri (alpha / beta / gamma sono configurazione)
+- stagionalità multiple: usare il periodo più lungo (es. 168 per
+  dati orari con ciclo settimanale, che include quello giornaliero)
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+)
+
+from ice_ai.agents.domain.ml import Anomaly
+
+
+STATE_VERSION = 1
+
+# Layout dello stato scalare
+_LEVEL, _TREND, _VAR, _COUNT = range(4)
+
+
+class HoltWintersDetector:
+    """
+    Holt-Winters additivo con scoring sul residuo di previsione.
+
+    - period=None: solo livello e trend (Holt); con beta=0 è un EWMA
+    - residui oltre soglia vengono limitati (±threshold·std) prima di
+      aggiornare lo stato: un picco non sposta la baseline stagionale
+    """
+
+    def __init__(
+        self,
+        *,
+        period: Optional[int] = None,
+        alpha: float = 0.2,
+        beta: float = 0.01,
+        gamma: float = 0.1,
+        var_alpha: float = 0.05,
+        threshold: float = 3.0,
+        min_samples: int = 10,
+    ) -> None:
+        if period is not None and period < 2:
+            raise ValueError("period must be >= 2")
+        rates = (("alpha", alpha), ("gamma", gamma), ("var_alpha", var_alpha))
+        for name, value in rates:
+            if not 0 < value <= 1:
+                raise ValueError(f"{name} must be in (0, 1]")
+        if not 0 <= beta <= 1:
+            raise ValueError("beta must be in [0, 1]")
+
+        self.period = period
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.var_alpha = var_alpha
+        self.threshold = threshold
+        self.min_samples = min_samples
+
+        self.index = 0
+        self._state = array("d", [0.0, 0.0, 0.0, 0.0])
+        self._season = array("d", [0.0] * (period or 0))
+
+    # ------------------------------------------------------------------
+    # STATO
+    # ------------------------------------------------------------------
+
+    @property
+    def level(self) -> float:
+        return self._state[_LEVEL]
+
+    @property
+    def trend(self) -> float:
+        return self._state[_TREND]
+
+    @property
+    def std(self) -> float:
+        return self._state[_VAR] ** 0.5
+
+    def _ready(self) -> bool:
+        warm = self._state[_COUNT] >= self.min_samples
+        if self.period:
+            warm = warm and self._state[_COUNT] >= self.period
+        return warm and self._state[_VAR] > 0
+
+    def forecast(self, steps: int = 1) -> Optional[float]:
+        """
+        Previsione a `steps` passi dall'ultimo punto osservato.
+        """
+        if self._state[_COUNT] == 0:
+            return None
+        value = self._state[_LEVEL] + steps * self._state[_TREND]
+        if self.period:
+            value += self._season[(self.index + steps - 1) % self.period]
+        return value
+
+    # ------------------------------------------------------------------
+    # UPDATE
+    # ------------------------------------------------------------------
+
+    def update(self, value: float) -> Optional[Anomaly]:
+        """
+        Valuta il punto contro la previsione, poi aggiorna lo stato.
+
+        Valori non finiti (NaN = mancante, ±inf) consumano un indice
+        senza essere segnalati, come in RollingRobustDetector: il
+        livello avanza del trend e la stagionalità resta allineata.
+        """
+        return self._step(float(value), flag=True)
+
+    def update_many(self, values: Iterable[float]) -> List[Anomaly]:
+        anomalies: List[Anomaly] = []
+        for value in values:
+            anomaly = self._step(float(value), flag=True)
+            if anomaly is not None:
+                anomalies.append(anomaly)
+        return anomalies
+
+    def warm_up(self, history: Sequence[float]) -> "HoltWintersDetector":
+        """
+        Inizializza lo stato dalla storia senza segnalare anomalie.
+
+        Con almeno due cicli completi (e finiti), livello / trend /
+        stagionalità iniziali sono stimati in blocco dai primi due cicli
+        (metodo classico); il resto della storia viene poi replayato in
+        O(1) per punto.
+        """
+        start = 0
+        m = self.period
+        cycles = len(history) // m if m else 0
+        if (
+            cycles >= 2
+            and self._state[_COUNT] == 0
+            and all(math.isfinite(v) for v in history[:cycles * m])
+        ):
+            means = [
+                sum(history[c * m:(c + 1) * m]) / m for c in range(cycles)
+            ]
+            first, second = means[0], means[1]
+
+            self._state[_LEVEL] = first
+            self._state[_TREND] = (second - first) / m
+            for i in range(m):
+                deviations = sum(
+                    history[c * m + i] - means[c] for c in range(cycles)
+                )
+                self._season[i] = deviations / cycles
+
+            # prima stima della varianza dai residui del primo ciclo
+            residuals = [
+                history[i] - (first + self._season[i]) for i in range(m)
+            ]
+            self._state[_VAR] = sum(r * r for r in residuals) / m
+            self._state[_COUNT] = m
+            self.index = m
+            start = m
+
+        for value in history[start:]:
+            self._step(float(value), flag=False)
+        return self
+
+    def _step(self, value: float, *, flag: bool) -> Optional[Anomaly]:
+        state = self._state
+        idx = self.index
+        self.index += 1
+
+        if not math.isfinite(value):
+            # punto mancante: nessun residuo, la previsione prosegue
+            if state[_COUNT]:
+                state[_LEVEL] += state[_TREND]
+            return None
+
+        if state[_COUNT] == 0:
+            state[_LEVEL] = value
+            state[_COUNT] = 1
+            return None
+
+        m = self.period
+        pos = idx % m if m else 0
+        seasonal = self._season[pos] if m else 0.0
+        forecast = state[_LEVEL] + state[_TREND] + seasonal
+        error = value - forecast
+
+        z: Optional[float] = None
+        limit: Optional[float] = None
+        if self._ready():
+            std = self.std
+            z = abs(error) / std
+            limit = self.threshold * std
+
+        clipped = error
+        if limit is not None:
+            clipped = max(-limit, min(limit, error))
+        observed = forecast + clipped
+
+        level = state[_LEVEL]
+        new_level = (
+            self.alpha * (observed - seasonal)
+            + (1 - self.alpha) * (level + state[_TREND])
+        )
+        state[_TREND] = (
+            self.beta * (new_level - level)
+            + (1 - self.beta) * state[_TREND]
+        )
+        state[_LEVEL] = new_level
+        if m:
+            self._season[pos] = (
+                self.gamma * (observed - new_level)
+                + (1 - self.gamma) * seasonal
+            )
+        state[_VAR] = (
+            (1 - self.var_alpha) * state[_VAR]
+            + self.var_alpha * clipped * clipped
+        )
+        state[_COUNT] += 1
+
+        if not flag or z is None or z < self.threshold:
+            return None
+
+        return Anomaly(
+            index=idx,
+            score=round(z, 3),
+            description=f"Value {value} deviates from forecast {forecast:.4g}",
+            severity="error" if z >= self.threshold * 1.5 else "warning",
+        )
+
+    # ------------------------------------------------------------------
+    # CHECKPOINT
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": STATE_VERSION,
+            "config": {
+                "period": self.period,
+                "alpha": self.alpha,
+                "beta": self.beta,
+                "gamma": self.gamma,
+                "var_alpha": self.var_alpha,
+                "threshold": self.threshold,
+                "min_samples": self.min_samples,
+            },
+            "index": self.index,
+            "state": list(self._state),
+            "season": list(self._season),
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "HoltWintersDetector":
+        if state.get("version") != STATE_VERSION:
+            raise ValueError(
+                f"Unsupported detector state version: {state.get('version')}"
+            )
+        detector = cls(**state["config"])
+        detector.index = int(state["index"])
+        detector._state = array("d", state["state"])
+        detector._season = array("d", state["season"])
+        return detector
+
+
+class DetectorBank:
+    """
+    Un detector per serie, creato alla prima osservazione.
+
+    Pensato per migliaia di serie (es. endpoint): lo stato di ciascuna
+    è un paio di array di double.
+    """
+
+    def __init__(self, factory: Callable[[], HoltWintersDetector]) -> None:
+        self._factory = factory
+        self._detectors: Dict[Hashable, HoltWintersDetector] = {}
+
+    def __len__(self) -> int:
+        return len(self._detectors)
+
+    def get(self, series_id: Hashable) -> HoltWintersDetector:
+        detector = self._detectors.get(series_id)
+        if detector is None:
+            detector = self._factory()
+            self._detectors[series_id] = detector
+        return detector
+
+    def update(self, series_id: Hashable, value: float) -> Optional[Anomaly]:
+        return self.get(series_id).update(value)
+
+    def warm_up(self, series_id: Hashable, history: Sequence[float]) -> None:
+        self.get(series_id).warm_up(history)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Checkpoint JSON-serializzabile. Gli id restano valori (non
+        chiavi stringa): `7` e `"7"` sono serie distinte anche dopo un
+        round-trip JSON.
+        """
+        return {
+            "series": [
+                [series_id, detector.to_dict()]
+                for series_id, detector in self._detectors.items()
+            ],
+        }
+
+    def restore(self, state: Dict[str, Any]) -> "DetectorBank":
+        for series_id, data in state["series"]:
+            # JSON trasforma le tuple in liste (non hashable)
+            if isinstance(series_id, list):
+                series_id = _as_tuple(series_id)
+            self._detectors[series_id] = HoltWintersDetector.from_dict(data)
+        return self
+
+
+def _as_tuple(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(_as_tuple(v) for v in value)
+    return value
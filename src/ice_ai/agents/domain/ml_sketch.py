@@ -0,0 +1,232 @@
+"""
+ML Sketch — quantili approssimati in memoria limitata (KLL).
+
+RESPONSABILITÀ:
+- stimare quantili e rank su serie arbitrariamente lunghe
+- fondere sketch costruiti in parallelo o su host diversi
+- esportare / ripristinare lo stato (dict serializzabile JSON)
+
+NON FA:
+- quantili esatti (errore di rank ~ O(1/k))
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import random
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+STATE_VERSION = 1
+
+
+class KLLSketch:
+    """
+    Sketch KLL (Karnin-Lang-Liberty).
+
+    Gerarchia di compattatori: il livello h contiene elementi di peso 2^h.
+    Quando un livello è pieno viene ordinato e metà degli elementi
+    (pari o dispari, a caso) promossa al livello successivo.
+    Memoria O(k · log(n / k)); gli sketch sono fondibili.
+    """
+
+    def __init__(
+        self,
+        k: int = 200,
+        *,
+        c: float = 2.0 / 3.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        if k < 8:
+            raise ValueError("k must be >= 8")
+        self.k = k
+        self.c = c
+        self.n = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._levels: List[List[float]] = [[]]
+        self._size = 0
+        self._max_size = self._total_capacity()
+        self._rng = random.Random(seed)
+        self._cdf: Optional[Tuple[List[float], List[int]]] = None
+
+    # ------------------------------------------------------------------
+    # CAPACITÀ
+    # ------------------------------------------------------------------
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return int(math.ceil(self.c ** depth * self.k)) + 1
+
+    def _total_capacity(self) -> int:
+        return sum(self._capacity(h) for h in range(len(self._levels)))
+
+    def _grow(self) -> None:
+        self._levels.append([])
+        self._max_size = self._total_capacity()
+
+    # ------------------------------------------------------------------
+    # UPDATE / MERGE
+    # ------------------------------------------------------------------
+
+    def update(self, value: float) -> None:
+        value = float(value)
+        if self.n == 0:
+            self.min = self.max = value
+        else:
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+        self._levels[0].append(value)
+        self._size += 1
+        self.n += 1
+        self._cdf = None
+
+        if self._size >= self._max_size:
+            self._compress()
+
+    def update_many(self, values: Iterable[float]) -> "KLLSketch":
+        for value in values:
+            self.update(value)
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """
+        Fonde `other` in questo sketch (in place). `other` non cambia.
+        """
+        if other.n == 0:
+            return self
+
+        while len(self._levels) < len(other._levels):
+            self._grow()
+        for h, items in enumerate(other._levels):
+            self._levels[h].extend(items)
+
+        self.min = other.min if self.n == 0 else min(self.min, other.min)
+        self.max = other.max if self.n == 0 else max(self.max, other.max)
+        self.n += other.n
+        self._size = sum(len(items) for items in self._levels)
+        self._cdf = None
+
+        while self._size >= self._max_size:
+            self._compress()
+        return self
+
+    def _compress(self) -> None:
+        for h, items in enumerate(self._levels):
+            if len(items) < self._capacity(h):
+                continue
+            if h + 1 == len(self._levels):
+                self._grow()
+
+            items.sort()
+            # con lunghezza dispari il più piccolo resta al suo livello
+            keep = len(items) % 2
+            offset = keep + self._rng.randint(0, 1)
+            self._levels[h + 1].extend(items[offset::2])
+            del items[keep:]
+
+            self._size = sum(len(level) for level in self._levels)
+            return
+
+    # ------------------------------------------------------------------
+    # QUERY
+    # ------------------------------------------------------------------
+
+    def _weighted(self) -> Tuple[List[float], List[int]]:
+        if self._cdf is None:
+            pairs = sorted(
+                (value, 1 << h)
+                for h, items in enumerate(self._levels)
+                for value in items
+            )
+            values = [v for v, _ in pairs]
+            cumulative: List[int] = []
+            total = 0
+            for _, weight in pairs:
+                total += weight
+                cumulative.append(total)
+            self._cdf = (values, cumulative)
+        return self._cdf
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Valore approssimato al quantile q in [0, 1].
+        """
+        if self.n == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        values, cumulative = self._weighted()
+        target = q * cumulative[-1]
+        idx = bisect.bisect_left(cumulative, target)
+        return values[min(idx, len(values) - 1)]
+
+    def rank(self, value: float) -> float:
+        """
+        Frazione stimata di elementi <= value (CDF empirica).
+        """
+        if self.n == 0:
+            return 0.0
+        if value < self.min:
+            return 0.0
+        if value >= self.max:
+            return 1.0
+
+        values, cumulative = self._weighted()
+        idx = bisect.bisect_right(values, value)
+        if idx == 0:
+            return 0.0
+        return cumulative[idx - 1] / cumulative[-1]
+
+    def __len__(self) -> int:
+        return self.n
+
+    # ------------------------------------------------------------------
+    # SERIALIZZAZIONE
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": STATE_VERSION,
+            "k": self.k,
+            "c": self.c,
+            "n": self.n,
+            "min": self.min,
+            "max": self.max,
+            "levels": [list(items) for items in self._levels],
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "KLLSketch":
+        if state.get("version") != STATE_VERSION:
+            raise ValueError(
+                f"Unsupported sketch state version: {state.get('version')}"
+            )
+
+        sketch = cls(int(state["k"]), c=float(state["c"]))
+        sketch.n = int(state["n"])
+        sketch.min = state["min"]
+        sketch.max = state["max"]
+        sketch._levels = [
+            [float(v) for v in items] for items in state["levels"]
+        ] or [[]]
+        sketch._size = sum(len(items) for items in sketch._levels)
+        sketch._max_size = sketch._total_capacity()
+        return sketch
+
+
+def merge_sketches(sketches: Iterable[KLLSketch], k: int = 200) -> KLLSketch:
+    """
+    Nuovo sketch risultato della fusione di sketch parziali.
+    """
+    merged = KLLSketch(k)
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
@@ -0,0 +1,213 @@
+"""
+ML Stream — anomaly detection online con statistiche di Welford.
+
+RESPONSABILITÀ:
+- mantenere media / varianza in O(1) per punto
+- supportare finestra scorrevole o decadimento esponenziale
+- esportare / ripristinare lo stato (checkpoint)
+
+NON FA:
+- I/O, scheduling, persistenza (lo stato è un dict serializzabile)
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from ice_ai.agents.domain.ml import Anomaly
+
+
+STATE_VERSION = 1
+
+MODES = ("cumulative", "decay", "window")
+
+
+class StreamingDetector:
+    """
+    Detector z-score incrementale.
+
+    Modalità:
+    - "cumulative": Welford su tutta la storia
+    - "decay": media / varianza esponenziali (peso `alpha` al nuovo punto)
+    - "window": Welford con rimozione sugli ultimi `window` punti
+
+    Ogni punto viene valutato contro le statistiche *precedenti* e solo
+    dopo incorporato: un outlier non maschera se stesso.
+    """
+
+    def __init__(
+        self,
+        *,
+        z_threshold: float = 3.0,
+        mode: str = "cumulative",
+        alpha: Optional[float] = None,
+        window: Optional[int] = None,
+        min_samples: int = 10,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown streaming mode: {mode}")
+        if mode == "decay" and not (alpha and 0 < alpha < 1):
+            raise ValueError("decay mode requires 0 < alpha < 1")
+        if mode == "window" and not (window and window > 1):
+            raise ValueError("window mode requires window > 1")
+
+        self.z_threshold = z_threshold
+        self.mode = mode
+        self.alpha = alpha
+        self.window = window
+        self.min_samples = min_samples
+
+        self.index = 0          # punti visti in totale
+        self.count = 0          # punti che pesano sulle statistiche
+        self.mean = 0.0
+        self._m2 = 0.0          # cumulative/window: somma quadrati; decay: varianza
+        self._buffer: Deque[float] = deque()
+
+    # ------------------------------------------------------------------
+    # STATISTICHE
+    # ------------------------------------------------------------------
+
+    @property
+    def variance(self) -> float:
+        if self.count == 0:
+            return 0.0
+        if self.mode == "decay":
+            return self._m2
+        return max(self._m2, 0.0) / self.count
+
+    @property
+    def std(self) -> float:
+        return self.variance ** 0.5
+
+    def score(self, value: float) -> Optional[float]:
+        """
+        z-score di `value` rispetto allo stato corrente (senza aggiornare).
+        None finché il detector non ha abbastanza campioni.
+        """
+        if self.count < self.min_samples:
+            return None
+        std = self.std
+        if std == 0:
+            return None
+        return abs((value - self.mean) / std)
+
+    # ------------------------------------------------------------------
+    # UPDATE
+    # ------------------------------------------------------------------
+
+    def update(self, value: float) -> Optional[Anomaly]:
+        """
+        Valuta e incorpora un punto. Ritorna l'anomalia, se presente.
+
+        Valori non finiti (NaN = mancante, ±inf) consumano un indice ma
+        non entrano nelle statistiche, come in RollingRobustDetector:
+        un solo NaN renderebbe NaN media e varianza per sempre.
+        """
+        idx = self.index
+        self.index += 1
+        if not math.isfinite(value):
+            return None
+
+        z = self.score(value)
+        self._push(value)
+
+        if z is None or z < self.z_threshold:
+            return None
+
+        return Anomaly(
+            index=idx,
+            score=round(z, 3),
+            description=f"Value {value} deviates from mean",
+            severity="error" if z >= self.z_threshold * 1.5 else "warning",
+        )
+
+    def update_many(self, values: Iterable[float]) -> List[Anomaly]:
+        anomalies: List[Anomaly] = []
+        for value in values:
+            anomaly = self.update(value)
+            if anomaly is not None:
+                anomalies.append(anomaly)
+        return anomalies
+
+    def _push(self, value: float) -> None:
+        if self.mode == "decay":
+            if self.count == 0:
+                self.mean = float(value)
+                self._m2 = 0.0
+            else:
+                diff = value - self.mean
+                incr = self.alpha * diff
+                self.mean += incr
+                self._m2 = (1 - self.alpha) * (self._m2 + diff * incr)
+            self.count += 1
+            return
+
+        if self.mode == "window":
+            if len(self._buffer) == self.window:
+                self._pop(self._buffer.popleft())
+            self._buffer.append(float(value))
+
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def _pop(self, value: float) -> None:
+        if self.count <= 1:
+            self.count, self.mean, self._m2 = 0, 0.0, 0.0
+            return
+        self.count -= 1
+        delta = value - self.mean
+        self.mean -= delta / self.count
+        self._m2 -= delta * (value - self.mean)
+
+    # ------------------------------------------------------------------
+    # CHECKPOINT
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Stato serializzabile (JSON) per checkpoint / restore.
+        """
+        return {
+            "version": STATE_VERSION,
+            "config": {
+                "z_threshold": self.z_threshold,
+                "mode": self.mode,
+                "alpha": self.alpha,
+                "window": self.window,
+                "min_samples": self.min_samples,
+            },
+            "index": self.index,
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self._m2,
+            "buffer": list(self._buffer),
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "StreamingDetector":
+        if state.get("version") != STATE_VERSION:
+            raise ValueError(
+                f"Unsupported detector state version: {state.get('version')}"
+            )
+
+        detector = cls(**state["config"])
+        detector.index = int(state["index"])
+        detector.count = int(state["count"])
+        detector.mean = float(state["mean"])
+        detector._m2 = float(state["m2"])
+        detector._buffer = deque(float(v) for v in state.get("buffer", []))
+        return detector
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "seen": self.index,
+            "count": self.count,
+            "mean": round(self.mean, 4),
+            "std": round(self.std, 4),
+            "threshold": self.z_threshold,
+        }
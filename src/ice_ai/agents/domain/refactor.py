@@ -1,10 +1,34 @@
 from __future__ import annotations
 
-import difflib
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
+from ice_ai.agents.domain.refactor_codemod import Codemod, codemod_from_dict
+from ice_ai.agents.domain.refactor_diff import (
+    diff_opcodes,
+    diff_stats,
+    format_unified,
+    split_lines,
+    unified_diff,
+)
+from ice_ai.agents.domain.refactor_store import ContentStore
 from ice_ai.agents.spec import AgentSpec
 
+if TYPE_CHECKING:
+    from ice_ai.agents.domain.refactor_index import SymbolIndex
+    from ice_ai.agents.domain.refactor_patch import Hunk, LineTableCache
+
 
 class RefactorAgent:
     """
@@ -14,6 +38,12 @@ class RefactorAgent:
     - analizzare codice esistente
     - proporre refactor deterministici o LLM-driven
     - produrre diff strutturato
+    - proposte per riferimento (contenuti in ContentStore, diff
+      materializzato su richiesta, budget di byte)
+    - codemod AST (rename, move import, replace call) guidati da un
+      indice di progetto dei simboli
+    - dry-run delle proposte sul contenuto corrente (offset, fuzz,
+      conflitti 3-way)
     - NON applica patch (decisione esterna)
 
     Output sempre dichiarativo.
@@ -28,11 +58,39 @@ class RefactorAgent:
         capabilities={
             "code.refactor.propose",
             "code.refactor.diff",
+            "code.refactor.propose.ref",
+            "code.refactor.batch",
+            "code.refactor.codemod",
+            "code.refactor.index",
+            "code.refactor.dry_run",
         },
         ui_label="Refactor",
         ui_group="domain",
     )
 
+    def __init__(
+        self,
+        *,
+        store: Optional[ContentStore] = None,
+        max_input_bytes: Optional[int] = None,
+        inline_diff_bytes: int = 64 * 1024,
+    ) -> None:
+        self._store = store if store is not None else ContentStore()
+        self._index: Optional[SymbolIndex] = None
+        self._tables: Optional[LineTableCache] = None
+        # (before_ref, after_ref) -> hunk: una proposta non cambia
+        self._hunks: OrderedDict[Tuple[str, str], List[Hunk]] = OrderedDict()
+        self.max_input_bytes = max_input_bytes
+        self.inline_diff_bytes = inline_diff_bytes
+
+    @property
+    def store(self) -> ContentStore:
+        return self._store
+
+    @property
+    def index(self) -> Optional[SymbolIndex]:
+        return self._index
+
     # ------------------------------------------------------------------
     # API PUBBLICA
     # ------------------------------------------------------------------
@@ -73,10 +131,567 @@ class RefactorAgent:
             "actions": [],
         }
 
+    def propose_ref(
+        self,
+        code: str,
+        goal: str,
+        filename: Optional[str] = None,
+        *,
+        inline_diff_bytes: Optional[int] = None,
+        codemod: Optional[Codemod] = None,
+    ) -> Dict[str, Any]:
+        """
+        Come `propose`, ma before / after sono salvati nello store e
+        referenziati per hash (lo stesso contenuto è salvato una volta).
+
+        Il diff è incluso solo fino a `inline_diff_bytes`
+        ("diff_truncated" se tagliato); il diff completo si ottiene con
+        `iter_diff` / `diff_of`. Le statistiche sono sempre complete.
+
+        Con `codemod` il sorgente proposto è la sua trasformazione
+        deterministica invece del placeholder.
+        """
+        if not code.strip():
+            return self._error("empty_code", "No code provided for refactor.")
+        size = len(code.encode("utf-8", "surrogatepass"))
+        if self.max_input_bytes is not None and size > self.max_input_bytes:
+            return self._error(
+                "too_large",
+                f"Input is {size} bytes, budget is {self.max_input_bytes}.",
+            )
+
+        if codemod is None:
+            proposed_code = self._mock_refactor(code, goal)
+        else:
+            try:
+                proposed_code = codemod.apply(code)
+            except (SyntaxError, ValueError) as e:
+                return self._error("parse_failed", str(e))
+        before_lines = split_lines(code)
+        after_lines = split_lines(proposed_code)
+        opcodes = diff_opcodes(before_lines, after_lines)
+
+        before_ref, after_ref = self._store.put_all(code, proposed_code)
+        if before_ref not in self._store or after_ref not in self._store:
+            # senza disco il contenuto non sarebbe materializzabile
+            return self._error(
+                "store_full",
+                "Proposal content exceeds the store budget (max_bytes) "
+                "and the store has no disk tier.",
+            )
+        # gli hunk per il dry-run derivano dagli stessi opcode: la
+        # proposta non viene ri-diffata da `dry_run`
+        from ice_ai.agents.domain.refactor_patch import hunks_from_opcodes
+
+        self._remember_hunks(
+            (before_ref, after_ref),
+            hunks_from_opcodes(before_lines, after_lines, opcodes),
+        )
+
+        budget = self.inline_diff_bytes
+        if inline_diff_bytes is not None:
+            budget = inline_diff_bytes
+        diff, truncated = _bounded(
+            format_unified(
+                before_lines,
+                after_lines,
+                opcodes,
+                fromfile="before",
+                tofile="after",
+            ),
+            budget,
+        )
+
+        return {
+            "ok": True,
+            "goal": goal,
+            "filename": filename,
+            "summary": self._summarize(goal),
+            "before_ref": before_ref,
+            "after_ref": after_ref,
+            "before_bytes": size,
+            "after_bytes": len(proposed_code.encode("utf-8", "surrogatepass")),
+            "diff": diff,
+            "diff_truncated": truncated,
+            "diff_stats": diff_stats(opcodes),
+            "actions": [],
+        }
+
+    def materialize(self, ref: str) -> Dict[str, Any]:
+        """
+        Contenuto di un ref dello store.
+        """
+        if not ContentStore.is_ref(ref):
+            return self._error("invalid_ref", f"Not a content ref: {ref!r}")
+        content = self._store.get(ref)
+        if content is None:
+            return self._error("unknown_ref", f"Content not available: {ref}")
+        return {"ok": True, "ref": ref, "content": content}
+
+    def iter_diff(
+        self,
+        proposal: Mapping[str, Any],
+        *,
+        context: int = 3,
+        algorithm: str = "histogram",
+    ) -> Iterator[str]:
+        """
+        Righe del diff completo di una proposta `propose_ref`, generate
+        man mano (il testo intero del diff non viene mai costruito).
+
+        KeyError se un contenuto non è più nello store.
+        """
+        before, after = self._contents(proposal)
+        before_lines = split_lines(before)
+        after_lines = split_lines(after)
+        return format_unified(
+            before_lines,
+            after_lines,
+            diff_opcodes(before_lines, after_lines, algorithm),
+            fromfile="before",
+            tofile="after",
+            n=context,
+        )
+
+    def diff_of(
+        self,
+        proposal: Mapping[str, Any],
+        *,
+        max_bytes: Optional[int] = None,
+        context: int = 3,
+    ) -> Dict[str, Any]:
+        """
+        Diff di una proposta `propose_ref`, opzionalmente limitato.
+        """
+        try:
+            lines = self.iter_diff(proposal, context=context)
+        except KeyError as e:
+            return self._error("unknown_ref", str(e.args[0]))
+        diff, truncated = _bounded(lines, max_bytes)
+        return {"ok": True, "diff": diff, "truncated": truncated}
+
+    def iter_propose_many(
+        self,
+        requests: Iterable[Any],
+        *,
+        sources: Optional[Mapping[str, str]] = None,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Proposte `propose_ref` per molte coppie (path, goal), calcolate
+        su un process pool e restituite man mano che i chunk terminano
+        (ordine non garantito).
+
+        Ogni file è letto una sola volta per run anche con più goal;
+        `sources` ({path: codice}) evita del tutto la lettura. I
+        contenuti finiscono nello store di questo agente.
+        """
+        from ice_ai.agents.domain.refactor_batch import (
+            group_requests,
+            iter_proposals,
+        )
+
+        return iter_proposals(
+            group_requests(requests, sources),
+            agent=self,
+            workers=workers,
+            chunk_size=chunk_size,
+        )
+
+    def propose_many(
+        self,
+        requests: Iterable[Any],
+        *,
+        sources: Optional[Mapping[str, str]] = None,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Come `iter_propose_many`, con proposte ordinate per path e
+        sommario del patch-set (file, righe +/-, hunk, errori).
+        """
+        from ice_ai.agents.domain.refactor_batch import PatchSetSummary
+
+        summary = PatchSetSummary()
+        proposals: List[Dict[str, Any]] = []
+        for proposal in self.iter_propose_many(
+            requests,
+            sources=sources,
+            workers=workers,
+            chunk_size=chunk_size,
+        ):
+            summary.add(proposal)
+            proposals.append(proposal)
+        proposals.sort(
+            key=lambda p: (p.get("filename") or "", p.get("goal") or "")
+        )
+
+        return {
+            "ok": summary.failed == 0,
+            "proposals": proposals,
+            "summary": summary.to_dict(),
+        }
+
+    # ------------------------------------------------------------------
+    # CODEMOD
+    # ------------------------------------------------------------------
+
+    def build_index(
+        self,
+        root: str,
+        *,
+        patterns: Optional[List[str]] = None,
+        workers: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Scansiona `root` con ScannerAgent e costruisce l'indice dei
+        simboli (parsing AST su process pool). Sostituisce l'indice
+        precedente.
+        """
+        from ice_ai.agents.domain.refactor_index import SymbolIndex
+        from ice_ai.agents.domain.scanner import ScannerAgent
+
+        scan = ScannerAgent().scan(root, patterns or [".py"])
+        if scan.get("ok") is False:
+            return scan
+
+        paths = [
+            f["path"] for f in scan["files"]
+            if f.get("type") == "python"
+        ]
+        index = SymbolIndex()
+        counts = index.build(paths, workers=workers)
+        self._index = index
+        return {
+            "ok": True,
+            "root": scan["root"],
+            **counts,
+            "stats": index.stats(),
+            "scan_errors": scan["errors"],
+        }
+
+    def update_index(
+        self,
+        paths: Optional[Iterable[str]] = None,
+        *,
+        workers: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Riallinea l'indice sui file cambiati (es. da GitAgent); senza
+        `paths` controlla mtime / size di tutti i file indicizzati.
+        Solo i file cambiati vengono riparsati.
+        """
+        if self._index is None:
+            return self._error("no_index", "Call build_index first.")
+        if paths is None:
+            counts = self._index.refresh(workers=workers)
+        else:
+            counts = self._index.update(paths, workers=workers)
+        return {"ok": True, **counts, "stats": self._index.stats()}
+
+    def propose_codemod(
+        self,
+        operation: Union[Codemod, Mapping[str, Any]],
+        *,
+        paths: Optional[Iterable[str]] = None,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Proposte di un codemod sul progetto.
+
+        I file sono scelti dall'indice (solo quelli che contengono i
+        simboli coinvolti), oppure esplicitamente con `paths`. Solo le
+        proposte che cambiano il file vengono restituite.
+
+        `operation`: Codemod o dict, es.
+        {"op": "rename", "old": "f", "new": "g"},
+        {"op": "move_import", "name": "f", "source": "a", "target": "b"},
+        {"op": "replace_call", "old": "os.getcwd", "new": "Path.cwd",
+         "add_import": "from pathlib import Path"}.
+        """
+        try:
+            codemod = (
+                operation if isinstance(operation, Codemod)
+                else codemod_from_dict(operation)
+            )
+        except ValueError as e:
+            return self._error("invalid_codemod", str(e))
+
+        if paths is not None:
+            candidates = sorted(set(map(str, paths)))
+        elif self._index is not None:
+            candidates = self._index.candidates(codemod)
+        else:
+            return self._error("no_index", "Call build_index or pass paths.")
+
+        result = self.propose_many(
+            [{"path": path, "codemod": codemod} for path in candidates],
+            workers=workers,
+            chunk_size=chunk_size,
+        )
+        result["proposals"] = [
+            p for p in result["proposals"]
+            if not p["ok"] or p["diff_stats"]["hunks"]
+        ]
+        result["codemod"] = codemod.to_dict()
+        result["candidates"] = len(candidates)
+        result["indexed"] = len(self._index) if self._index is not None else 0
+        return result
+
+    # ------------------------------------------------------------------
+    # DRY RUN
+    # ------------------------------------------------------------------
+
+    def dry_run(
+        self,
+        proposal: Union[str, Mapping[str, Any]],
+        *,
+        current: Optional[str] = None,
+        path: Optional[str] = None,
+        base: Optional[str] = None,
+        fuzz: int = 2,
+        with_result: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Verifica se una proposta si applica ancora al contenuto
+        corrente, senza rigenerarla.
+
+        `proposal`: risultato di `propose` / `propose_ref` (3-way: il
+        before è la base) oppure testo di un unified diff (3-way solo
+        con `base`). Il contenuto corrente è `current` o il file
+        `path` / "filename" della proposta.
+
+        "status": clean | offset | fuzz | already_applied | conflict |
+        failed, più l'esito per hunk. Con `with_result` il contenuto
+        risultante viene salvato nello store ("result_ref").
+        """
+        return self._dry_run(
+            proposal,
+            current=current,
+            path=path,
+            base=base,
+            fuzz=fuzz,
+            with_result=with_result,
+            base_maps={},
+        )
+
+    def dry_run_many(
+        self,
+        proposals: Iterable[Union[str, Mapping[str, Any]]],
+        *,
+        currents: Optional[Mapping[str, str]] = None,
+        fuzz: int = 2,
+    ) -> Dict[str, Any]:
+        """
+        `dry_run` di molte proposte (es. dopo un rebase). Ogni file è
+        letto una volta e le modifiche base -> corrente sono calcolate
+        una volta per coppia di contenuti.
+        """
+        from ice_ai.agents.domain.refactor_batch import read_text
+
+        texts: Dict[str, Any] = dict(currents or {})
+        base_maps: Dict[Tuple[str, str], Any] = {}
+        results: List[Dict[str, Any]] = []
+        counts: Dict[str, int] = {}
+        for proposal in proposals:
+            filename = (
+                proposal.get("filename")
+                if isinstance(proposal, Mapping) else None
+            )
+            current = None
+            if filename is not None:
+                if filename not in texts:
+                    try:
+                        texts[filename] = read_text(filename)
+                    except (OSError, UnicodeDecodeError, SyntaxError) as e:
+                        texts[filename] = e
+                current = texts[filename]
+
+            if isinstance(current, Exception):
+                result = dict(
+                    self._error("read_failed", str(current)),
+                    filename=filename,
+                )
+            else:
+                result = self._dry_run(
+                    proposal,
+                    current=current,
+                    path=None,
+                    base=None,
+                    fuzz=fuzz,
+                    with_result=False,
+                    base_maps=base_maps,
+                )
+            status = result.get("status", result.get("error", "unknown"))
+            counts[status] = counts.get(status, 0) + 1
+            results.append(result)
+
+        return {
+            "ok": all(r["ok"] for r in results),
+            "results": results,
+            "summary": dict(sorted(counts.items())),
+        }
+
+    def _dry_run(
+        self,
+        proposal: Union[str, Mapping[str, Any]],
+        *,
+        current: Optional[str],
+        path: Optional[str],
+        base: Optional[str],
+        fuzz: int,
+        with_result: bool,
+        base_maps: Dict[Tuple[str, str], Any],
+    ) -> Dict[str, Any]:
+        from ice_ai.agents.domain.refactor_batch import read_text
+        from ice_ai.agents.domain.refactor_patch import (
+            BaseMap,
+            HunkResult,
+            LineTableCache,
+            check_hunks,
+            parse_unified,
+            summarize,
+        )
+
+        filename = path
+        if filename is None and isinstance(proposal, Mapping):
+            filename = proposal.get("filename")
+
+        # 1) hunk e base della proposta
+        after: Optional[str] = None
+        if isinstance(proposal, str):
+            try:
+                hunks = parse_unified(proposal)
+            except ValueError as e:
+                return self._error("invalid_patch", str(e))
+            base_ref = None
+        else:
+            try:
+                base, after, base_ref = self._patch_sides(proposal)
+            except KeyError as e:
+                return self._error("unknown_ref", str(e.args[0]))
+            hunks = self._proposal_hunks(base_ref, base, after)
+
+        # 2) contenuto corrente
+        if current is None:
+            if filename is None:
+                return self._error("no_target", "No current content or path.")
+            try:
+                current = read_text(filename)
+            except (OSError, UnicodeDecodeError, SyntaxError) as e:
+                return dict(self._error("read_failed", str(e)), filename=filename)
+
+        report: Dict[str, Any] = {"ok": True, "filename": filename}
+        current_ref = ContentStore.ref(current)
+
+        # 3) fast path per hash: file invariato o proposta già applicata
+        if base_ref is not None and current_ref in (
+            base_ref, ContentStore.ref(after)
+        ):
+            status = "clean" if current_ref == base_ref else "already_applied"
+            results = []
+            for i, hunk in enumerate(hunks):
+                start = hunk.start
+                if status == "already_applied":
+                    start = hunk.new_start - 1 if hunk.new_lines else hunk.new_start
+                results.append(HunkResult(
+                    i, status, hunk.start + 1, start + 1, start - hunk.start
+                ))
+            report.update(
+                status=summarize(results),
+                hunks=[r.to_dict() for r in results],
+            )
+            if with_result:
+                report["result_ref"] = self._store.put(
+                    after if status == "clean" else current
+                )
+            return report
+
+        # 4) localizzazione dei hunk (3-way se c'è la base)
+        if self._tables is None:
+            self._tables = LineTableCache()
+        current_table = self._tables.get(current, current_ref)
+        base_map = None
+        if base is not None:
+            base_ref = base_ref or ContentStore.ref(base)
+            base_map = base_maps.get((base_ref, current_ref))
+            if base_map is None:
+                base_map = BaseMap(
+                    self._tables.get(base, base_ref), current_table
+                )
+                base_maps[(base_ref, current_ref)] = base_map
+
+        results, lines = check_hunks(
+            hunks, current_table, base_map=base_map, fuzz=fuzz
+        )
+        status = summarize(results)
+        report.update(
+            ok=lines is not None,
+            status=status,
+            hunks=[r.to_dict() for r in results],
+        )
+        if with_result and lines is not None:
+            report["result_ref"] = self._store.put("".join(lines))
+        return report
+
+    def _patch_sides(
+        self,
+        proposal: Mapping[str, Any],
+    ) -> Tuple[str, str, str]:
+        """
+        (before, after, ref del before) di una proposta inline o per
+        riferimento. KeyError se un contenuto non è disponibile.
+        """
+        if "before_ref" in proposal:
+            before, after = self._contents(proposal)
+            return before, after, proposal["before_ref"]
+        if "before" in proposal and "after" in proposal:
+            before = proposal["before"]
+            return before, proposal["after"], ContentStore.ref(before)
+        raise KeyError("Proposal has no before / after content")
+
+    def _proposal_hunks(
+        self,
+        before_ref: str,
+        before: str,
+        after: str,
+    ) -> List[Hunk]:
+        from ice_ai.agents.domain.refactor_patch import hunks_from_texts
+
+        key = (before_ref, ContentStore.ref(after))
+        hunks = self._hunks.get(key)
+        if hunks is None:
+            # proposta inline o uscita dalla cache
+            hunks = hunks_from_texts(before, after)
+            self._remember_hunks(key, hunks)
+        else:
+            self._hunks.move_to_end(key)
+        return hunks
+
+    def _remember_hunks(self, key: Tuple[str, str], hunks: List[Hunk]) -> None:
+        self._hunks[key] = hunks
+        self._hunks.move_to_end(key)
+        if len(self._hunks) > 4096:
+            self._hunks.popitem(last=False)
+
     # ------------------------------------------------------------------
     # INTERNAL
     # ------------------------------------------------------------------
 
+    def _contents(self, proposal: Mapping[str, Any]) -> Tuple[str, str]:
+        contents = []
+        for key in ("before_ref", "after_ref"):
+            content = self._store.get(proposal[key])
+            if content is None:
+                raise KeyError(f"Content not available: {proposal[key]}")
+            contents.append(content)
+        return contents[0], contents[1]
+
+    def _error(self, code: str, message: str) -> Dict[str, Any]:
+        return {"ok": False, "error": code, "message": message}
+
     def _mock_refactor(self, code: str, goal: str) -> str:
         """
         Refactor placeholder.
@@ -87,14 +702,44 @@ class RefactorAgent:
             return header + code
         return header + "\n" + code
 
-    def _build_diff(self, before: str, after: str) -> str:
-        lines = difflib.unified_diff(
-            before.splitlines(keepends=True),
-            after.splitlines(keepends=True),
+    def _build_diff(
+        self,
+        before: str,
+        after: str,
+        algorithm: str = "histogram",
+    ) -> str:
+        """
+        Unified diff con la formattazione di `difflib.unified_diff`.
+
+        Righe internate a id interi, prefisso / suffisso comuni rimossi
+        e histogram diff: lineare sui file grandi con molte righe
+        ripetute, dove `difflib` degrada verso il quadratico.
+        """
+        lines = unified_diff(
+            split_lines(before),
+            split_lines(after),
             fromfile="before",
             tofile="after",
+            algorithm=algorithm,
         )
         return "".join(lines)
 
     def _summarize(self, goal: str) -> str:
         return f"Refactor proposal generated for goal: {goal}"
+
+
+def _bounded(lines: Iterator[str], max_bytes: Optional[int]) -> Tuple[str, bool]:
+    """
+    Concatena righe fino a `max_bytes` (UTF-8), tagliando solo a fine
+    riga. Il generatore non viene consumato oltre il budget.
+    """
+    if max_bytes is None:
+        return "".join(lines), False
+    parts = []
+    used = 0
+    for line in lines:
+        used += len(line.encode("utf-8", "surrogatepass"))
+        if used > max_bytes:
+            return "".join(parts), True
+        parts.append(line)
+    return "".join(parts), False
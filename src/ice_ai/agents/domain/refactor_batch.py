@@ -0,0 +1,316 @@
+"""
+Refactor Batch — proposte di refactor su molti file in un process pool.
+
+RESPONSABILITÀ:
+- normalizzare le richieste (path, goal) e raggrupparle per file
+  (ogni file letto una sola volta per run, anche con più goal)
+- calcolare proposte e diff su processi (diff e AST sono CPU-bound)
+- restituire le proposte man mano che i chunk terminano
+- sommario aggregato del patch-set
+
+NON FA:
+- applicare patch
+- scansione del filesystem (vedi ScannerAgent)
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import tokenize
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from ice_ai.agents.domain.refactor import RefactorAgent
+from ice_ai.agents.domain.refactor_codemod import Codemod
+from ice_ai.agents.domain.refactor_store import ContentStore
+
+
+# Sotto questa soglia il costo di avvio del pool supera il guadagno
+POOL_MIN_FILES = 16
+
+# Chunk in volo per worker (vedi validator_batch)
+INFLIGHT_PER_WORKER = 2
+
+# goal testuale oppure codemod deterministico
+Goal = Union[str, Codemod]
+
+# (path, goal in ordine, codice già letto oppure None)
+Job = Tuple[str, List[Goal], Optional[str]]
+
+# (opzioni RefactorAgent, directory dello store condiviso oppure None)
+_worker_options: Optional[Tuple[Dict[str, Any], Optional[str]]] = None
+
+
+# ============================================================
+# INPUT
+# ============================================================
+
+def group_requests(
+    requests: Iterable[Any],
+    sources: Optional[Mapping[str, str]] = None,
+) -> List[Job]:
+    """
+    Job per file a partire da coppie (path, goal) o dict con
+    "path" e "goal" / "codemod". `sources` fornisce contenuti già in
+    memoria.
+    """
+    goals: Dict[str, List[Goal]] = {}
+    for item in requests:
+        if isinstance(item, Mapping):
+            path = item["path"]
+            goal = item["codemod"] if "codemod" in item else item["goal"]
+        else:
+            path, goal = item
+        goals.setdefault(os.fspath(path), []).append(goal)
+
+    sources = sources or {}
+    return [
+        (path, path_goals, sources.get(path))
+        for path, path_goals in goals.items()
+    ]
+
+
+def read_text(path: str) -> str:
+    """
+    Legge un file preservando i fine riga (il diff deve riprodurli).
+    I sorgenti Python rispettano il cookie di encoding (PEP 263).
+    """
+    with open(path, "rb") as fh:
+        raw = fh.read()
+    encoding = "utf-8"
+    if path.endswith(".py"):
+        encoding, _ = tokenize.detect_encoding(io.BytesIO(raw).readline)
+    text = raw.decode(encoding)
+    # utf-8-sig: il BOM non fa parte del contenuto
+    return text[1:] if text.startswith("\ufeff") else text
+
+
+# ============================================================
+# WORKER
+# ============================================================
+
+def _init_worker(options: Dict[str, Any], store_path: Optional[str]) -> None:
+    global _worker_options
+    _worker_options = (options, store_path)
+
+
+def _propose_job(agent: RefactorAgent, job: Job) -> List[Dict[str, Any]]:
+    path, goals, code = job
+    if code is None:
+        try:
+            code = read_text(path)
+        except (OSError, UnicodeDecodeError, SyntaxError) as e:
+            error = agent._error("read_failed", str(e))
+            return [
+                dict(error, filename=path, goal=_describe(goal))
+                for goal in goals
+            ]
+
+    proposals = []
+    for goal in goals:
+        try:
+            if isinstance(goal, Codemod):
+                proposal = agent.propose_ref(
+                    code, goal.describe(), filename=path, codemod=goal
+                )
+            else:
+                proposal = agent.propose_ref(code, goal, filename=path)
+        except Exception as e:
+            # un file problematico non deve far fallire il chunk (e con
+            # lui le proposte degli altri file)
+            proposal = agent._error(
+                "propose_failed", f"{type(e).__name__}: {e}"
+            )
+        if not proposal["ok"]:
+            proposal.update(filename=path, goal=_describe(goal))
+        proposals.append(proposal)
+    return proposals
+
+
+def _describe(goal: Goal) -> str:
+    return goal.describe() if isinstance(goal, Codemod) else goal
+
+
+def _propose_chunk(
+    jobs: List[Job],
+) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    Proposte del chunk + contenuti referenziati, da copiare nello store
+    del chiamante. Con uno store su directory i worker vi scrivono
+    direttamente e i contenuti non passano dall'IPC.
+    """
+    options, store_path = _worker_options or ({}, None)
+    # store per chunk: nessun contenuto trattenuto nel worker
+    store = ContentStore(path=store_path)
+    agent = RefactorAgent(store=store, **options)
+
+    proposals: List[Dict[str, Any]] = []
+    for job in jobs:
+        proposals.extend(_propose_job(agent, job))
+
+    contents: Dict[str, str] = {}
+    if store_path is None:
+        for proposal in proposals:
+            for key in ("before_ref", "after_ref"):
+                ref = proposal.get(key)
+                if ref is not None and ref not in contents:
+                    contents[ref] = store.get(ref)
+    return proposals, contents
+
+
+def _retain(
+    proposal: Dict[str, Any],
+    contents: Mapping[str, str],
+    store: ContentStore,
+) -> Dict[str, Any]:
+    """
+    Copia before / after di una proposta del worker nello store del
+    chiamante, insieme; errore se lo store non può trattenerli.
+    """
+    refs = (proposal["before_ref"], proposal["after_ref"])
+    store.put_all(*(contents[ref] for ref in refs))
+    if all(ref in store for ref in refs):
+        return proposal
+    return {
+        "ok": False,
+        "error": "store_full",
+        "message": "Proposal content exceeds the store budget (max_bytes) "
+        "and the store has no disk tier.",
+        "filename": proposal.get("filename"),
+        "goal": proposal.get("goal"),
+    }
+
+
+# ============================================================
+# DISPATCH
+# ============================================================
+
+def iter_proposals(
+    jobs: List[Job],
+    *,
+    agent: RefactorAgent,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Proposte nell'ordine di completamento dei chunk; i contenuti
+    finiscono nello store di `agent`.
+
+    Input piccoli (o workers=1) restano nel processo corrente.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(jobs) < POOL_MIN_FILES:
+        for job in jobs:
+            yield from _propose_job(agent, job)
+        return
+
+    options = {
+        "max_input_bytes": agent.max_input_bytes,
+        "inline_diff_bytes": agent.inline_diff_bytes,
+    }
+    store = agent.store
+    chunk_size = chunk_size or max(1, min(64, len(jobs) // (workers * 8)))
+    chunks = (
+        jobs[i:i + chunk_size]
+        for i in range(0, len(jobs), chunk_size)
+    )
+
+    def collect(done: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+        for future in done:
+            proposals, contents = future.result()
+            for proposal in proposals:
+                if contents and proposal.get("ok"):
+                    proposal = _retain(proposal, contents, store)
+                yield proposal
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(options, store.path),
+    ) as pool:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(_propose_chunk, chunk))
+            if len(pending) >= workers * INFLIGHT_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from collect(done)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from collect(done)
+
+
+# ============================================================
+# SUMMARY
+# ============================================================
+
+class PatchSetSummary:
+    """
+    Aggregato incrementale delle proposte (nessuna proposta trattenuta).
+    """
+
+    def __init__(self) -> None:
+        self.files: set = set()
+        self.proposals = 0
+        self.failed = 0
+        self.skipped = 0
+        self.changed = 0
+        self.added = 0
+        self.removed = 0
+        self.hunks = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+        self.errors: Dict[str, int] = {}
+
+    def add(self, proposal: Mapping[str, Any]) -> None:
+        self.proposals += 1
+        if proposal.get("filename") is not None:
+            self.files.add(proposal["filename"])
+        if proposal.get("error") == "empty_code":
+            # file vuoti (es. __init__.py): niente da rifattorizzare
+            self.skipped += 1
+            return
+        if not proposal.get("ok"):
+            self.failed += 1
+            code = proposal.get("error", "unknown")
+            self.errors[code] = self.errors.get(code, 0) + 1
+            return
+
+        stats = proposal.get("diff_stats", {})
+        if stats.get("hunks"):
+            self.changed += 1
+        self.added += stats.get("added", 0)
+        self.removed += stats.get("removed", 0)
+        self.hunks += stats.get("hunks", 0)
+        self.bytes_before += proposal.get("before_bytes", 0)
+        self.bytes_after += proposal.get("after_bytes", 0)
+
+    def extend(self, proposals: Iterable[Mapping[str, Any]]) -> "PatchSetSummary":
+        for proposal in proposals:
+            self.add(proposal)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "files": len(self.files),
+            "proposals": self.proposals,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "changed": self.changed,
+            "added": self.added,
+            "removed": self.removed,
+            "hunks": self.hunks,
+            "bytes_before": self.bytes_before,
+            "bytes_after": self.bytes_after,
+            "errors": dict(sorted(self.errors.items())),
+        }
@@ -0,0 +1,732 @@
+"""
+Refactor Codemod — trasformazioni deterministiche basate su AST.
+
+RESPONSABILITÀ:
+- rename di un simbolo (definizioni, riferimenti, import, `modulo.nome`)
+- spostamento di un nome importato da un modulo a un altro
+- sostituzione del target di una chiamata (con import opzionale)
+- edit testuali puntuali: formattazione, commenti e stringhe intatti
+
+NON FA:
+- risoluzione semantica completa degli scope (rename per nome, con
+  esclusione delle funzioni che hanno un parametro omonimo)
+- scelta dei file (vedi SymbolIndex)
+"""
+
+from __future__ import annotations
+
+import ast
+import bisect
+import keyword
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Set, Tuple
+
+from ice_ai.agents.domain.refactor_diff import split_lines
+
+
+# ============================================================
+# EDITS
+# ============================================================
+
+class SourceEdits:
+    """
+    Edit su un sorgente in coordinate AST (righe 1-based, colonne in
+    byte UTF-8 come `col_offset`), applicati in un solo passaggio.
+    """
+
+    def __init__(self, code: str) -> None:
+        self.code = code
+        self._lines = split_lines(code)
+        self._starts: List[int] = []
+        offset = 0
+        for line in self._lines:
+            self._starts.append(offset)
+            offset += len(line)
+        self._edits: List[Tuple[int, int, str]] = []
+
+    def offset(self, line: int, col: int) -> int:
+        """
+        Offset di carattere da (riga, colonna in byte).
+        """
+        if line > len(self._lines):
+            return len(self.code)
+        text = self._lines[line - 1]
+        if not text.isascii():
+            col = len(text.encode("utf-8")[:col].decode("utf-8", "ignore"))
+        return self._starts[line - 1] + col
+
+    def line_text(self, line: int) -> str:
+        return self._lines[line - 1] if line <= len(self._lines) else ""
+
+    def line_range(self, offset: int) -> Tuple[int, int]:
+        """
+        (inizio, fine) della riga che contiene `offset`, fine riga incluso.
+        """
+        if not self._lines:
+            return 0, 0
+        index = max(bisect.bisect_right(self._starts, offset) - 1, 0)
+        start = self._starts[index]
+        return start, start + len(self._lines[index])
+
+    def replace(self, start: int, end: int, text: str) -> None:
+        self._edits.append((start, end, text))
+
+    def replace_node(self, node: ast.AST, text: str) -> None:
+        self.replace(
+            self.offset(node.lineno, node.col_offset),  # type: ignore[attr-defined]
+            self.offset(
+                node.end_lineno,  # type: ignore[attr-defined]
+                node.end_col_offset,  # type: ignore[attr-defined]
+            ),
+            text,
+        )
+
+    def __len__(self) -> int:
+        return len(self._edits)
+
+    def apply(self) -> str:
+        if not self._edits:
+            return self.code
+        # lo stesso span può essere raggiunto da due nodi: un solo edit
+        edits = sorted(set(self._edits))
+        parts: List[str] = []
+        cursor = 0
+        for start, end, text in edits:
+            if start < cursor:
+                raise ValueError(f"Overlapping edits at offset {start}")
+            parts.append(self.code[cursor:start])
+            parts.append(text)
+            cursor = end
+        parts.append(self.code[cursor:])
+        return "".join(parts)
+
+
+def dotted_name(node: ast.AST) -> Optional[str]:
+    """
+    "a.b.c" per Name / Attribute annidati, None per altre espressioni.
+    """
+    parts: List[str] = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+# ============================================================
+# CODEMODS
+# ============================================================
+
+class Codemod:
+    """
+    Trasformazione di un singolo sorgente.
+
+    `names`: identificatori di cui almeno uno deve comparire nel file
+    perché la trasformazione possa cambiarlo; `modules`: moduli da cui
+    il file deve importare (vuoto = nessun vincolo). L'indice di
+    progetto usa entrambi per scegliere i file candidati.
+    """
+
+    op = ""
+    names: FrozenSet[str] = frozenset()
+    modules: FrozenSet[str] = frozenset()
+
+    def apply(self, code: str) -> str:
+        """
+        Sorgente trasformato. SyntaxError se `code` non è parsabile,
+        ValueError se la trasformazione non è applicabile.
+        """
+        try:
+            # il parser C segnala l'annidamento oltre il suo stack come
+            # RecursionError o, oltre una certa profondità, MemoryError
+            tree = ast.parse(code)
+        except (RecursionError, MemoryError):
+            raise ValueError("Source too deeply nested to transform") from None
+        try:
+            edits = SourceEdits(code)
+            self._edit(tree, edits)
+        except RecursionError:
+            # espressioni annidate oltre lo stack del visitor
+            raise ValueError("Source too deeply nested to transform") from None
+        return edits.apply()
+
+    def describe(self) -> str:
+        raise NotImplementedError
+
+    def to_dict(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def _edit(self, tree: ast.Module, edits: SourceEdits) -> None:
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class RenameSymbol(Codemod):
+    """
+    Rinomina un identificatore: definizioni (def / class / assegnazioni),
+    riferimenti, `from m import old [as old]`, `import old` (diventa
+    `import old as new`) e `modulo.old` dove `modulo` è importato nel
+    file.
+
+    Metodi e attributi di classe non sono toccati: i loro riferimenti
+    passano da oggetti arbitrari (`self.old`) non risolvibili senza tipi.
+    """
+
+    old: str
+    new: str
+
+    op = "rename"
+
+    def __post_init__(self) -> None:
+        for value in (self.old, self.new):
+            if not _is_name(value):
+                raise ValueError(f"Invalid identifier: {value!r}")
+
+    @property
+    def names(self) -> FrozenSet[str]:  # type: ignore[override]
+        return frozenset({self.old})
+
+    def describe(self) -> str:
+        return f"rename {self.old} -> {self.new}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"op": self.op, "old": self.old, "new": self.new}
+
+    def _edit(self, tree: ast.Module, edits: SourceEdits) -> None:
+        modules = _imported_modules(tree)
+        _RenameVisitor(self.old, self.new, modules, edits).visit(tree)
+
+
+class _RenameVisitor(ast.NodeVisitor):
+
+    def __init__(
+        self,
+        old: str,
+        new: str,
+        modules: Set[str],
+        edits: SourceEdits,
+    ) -> None:
+        self.old = old
+        self.new = new
+        self.modules = modules
+        self.edits = edits
+        # nel corpo di una classe i binding sono attributi (`self.x`,
+        # `Cls.x`): non sono riferimenti al simbolo
+        self.class_body = False
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if node.id != self.old:
+            return
+        if self.class_body and not isinstance(node.ctx, ast.Load):
+            return
+        self.edits.replace_node(node, self.new)
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if node.attr == self.old:
+            base = dotted_name(node.value)
+            if base is not None and base in self.modules:
+                # l'attributo chiude lo span del nodo
+                end = self.edits.offset(node.end_lineno, node.end_col_offset)
+                self.edits.replace(end - len(self.old), end, self.new)
+        self.generic_visit(node)
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            if (alias.asname or alias.name) == self.old:
+                # `import old` / `import m as old`: lo stesso modulo, legato
+                # al nuovo nome (i riferimenti sono rinominati come Name)
+                self.edits.replace_node(alias, f"{alias.name} as {self.new}")
+            elif alias.asname is None and alias.name.split(".")[0] == self.old:
+                # `import old.sub` lega `old` al package: `import old.sub
+                # as new` legherebbe il sottomodulo, non è un rename
+                raise ValueError(
+                    f"Cannot rename {self.old!r}: bound by "
+                    f"'import {alias.name}'"
+                )
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        for alias in node.names:
+            if alias.name == self.old or alias.asname == self.old:
+                name = self.new if alias.name == self.old else alias.name
+                asname = self.new if alias.asname == self.old else alias.asname
+                text = name if asname is None else f"{name} as {asname}"
+                self.edits.replace_node(alias, text)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self._definition(node, r"def")
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:
+        self._definition(node, r"def")
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self._definition(node, r"class")
+
+    def visit_Lambda(self, node: ast.Lambda) -> None:
+        args = node.args
+        for default in args.defaults + [d for d in args.kw_defaults if d]:
+            self.visit(default)
+        if not _has_param(args, self.old):
+            outer = self.class_body
+            self.class_body = False
+            self.visit(node.body)
+            self.class_body = outer
+
+    # binding memorizzati come stringa (`except E as x`, pattern di
+    # `match`): il nome non ha un nodo, va cercato nel sorgente
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler) -> None:
+        if node.name == self.old and node.type is not None:
+            # `as nome` segue il tipo dell'eccezione
+            self._binding(
+                self._end(node.type), self._end(node),
+                rf"\s*as\s+({re.escape(self.old)})\b",
+            )
+        self.generic_visit(node)
+
+    def visit_MatchAs(self, node: Any) -> None:
+        if node.name == self.old:
+            # `case x` / `case p as x`: il nome chiude lo span
+            end = self._end(node)
+            self._binding(end - len(self.old), end, r"(\w+)")
+        self.generic_visit(node)
+
+    def visit_MatchStar(self, node: Any) -> None:
+        if node.name == self.old:
+            end = self._end(node)
+            self._binding(end - len(self.old), end, r"(\w+)")
+        self.generic_visit(node)
+
+    def visit_MatchMapping(self, node: Any) -> None:
+        if node.rest == self.old:
+            # `**rest` è l'ultimo elemento prima della `}`
+            children = node.keys + node.patterns
+            start = (
+                max(self._end(child) for child in children)
+                if children else
+                self.edits.offset(node.lineno, node.col_offset)
+            )
+            self._binding(
+                start, self._end(node),
+                rf"[\s,]*\*\*\s*({re.escape(self.old)})\b",
+            )
+        self.generic_visit(node)
+
+    def _end(self, node: Any) -> int:
+        return self.edits.offset(node.end_lineno, node.end_col_offset)
+
+    def _binding(self, start: int, end: int, pattern: str) -> None:
+        if self.class_body:
+            # come per i Name: nel corpo di una classe è un attributo
+            return
+        match = re.compile(pattern).match(self.edits.code, start, end)
+        if match is not None and match.group(1) == self.old:
+            self.edits.replace(match.start(1), match.end(1), self.new)
+
+    def visit_Global(self, node: ast.Global) -> None:
+        self._declaration(node)
+
+    def visit_Nonlocal(self, node: ast.Nonlocal) -> None:
+        self._declaration(node)
+
+    def _declaration(self, node: Any) -> None:
+        if self.old not in node.names:
+            return
+        # `global a, b`: i nomi non hanno posizione, stanno sulla riga
+        start = self.edits.offset(node.lineno, node.col_offset)
+        end = self.edits.offset(node.end_lineno, node.end_col_offset)
+        pattern = re.compile(rf"\b{re.escape(self.old)}\b")
+        for match in pattern.finditer(self.edits.code, start, end):
+            self.edits.replace(match.start(), match.end(), self.new)
+
+    def _definition(self, node: Any, keyword: str) -> None:
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        if node.name == self.old and not self.class_body:
+            # il nome non ha posizione propria: segue la keyword
+            line_start = self.edits.offset(node.lineno, 0)
+            column = self.edits.offset(node.lineno, node.col_offset)
+            match = re.compile(
+                rf"{keyword}\s+({re.escape(self.old)})\b"
+            ).search(self.edits.line_text(node.lineno), column - line_start)
+            if match is not None:
+                self.edits.replace(
+                    line_start + match.start(1),
+                    line_start + match.end(1),
+                    self.new,
+                )
+
+        if isinstance(node, ast.ClassDef):
+            for child in node.bases + node.keywords:
+                self.visit(child)
+            self._body(node.body, class_body=True)
+            return
+
+        # default e annotazioni appartengono allo scope esterno
+        args = node.args
+        for default in args.defaults + [d for d in args.kw_defaults if d]:
+            self.visit(default)
+        for arg in args.posonlyargs + args.args + args.kwonlyargs + [
+            a for a in (args.vararg, args.kwarg) if a is not None
+        ]:
+            if arg.annotation is not None:
+                self.visit(arg.annotation)
+        if node.returns is not None:
+            self.visit(node.returns)
+        if _has_param(args, self.old):
+            # parametro omonimo: il corpo si riferisce al parametro
+            return
+        self._body(node.body, class_body=False)
+
+    def _body(self, body: List[ast.stmt], class_body: bool) -> None:
+        outer = self.class_body
+        self.class_body = class_body
+        for stmt in body:
+            self.visit(stmt)
+        self.class_body = outer
+
+
+@dataclass(frozen=True)
+class MoveImport(Codemod):
+    """
+    `from source import name` -> `from target import name`; gli altri
+    nomi importati dalla stessa istruzione restano su `source`.
+    """
+
+    name: str
+    source: str
+    target: str
+
+    op = "move_import"
+
+    def __post_init__(self) -> None:
+        if not _is_name(self.name):
+            raise ValueError(f"Invalid identifier: {self.name!r}")
+        for value in (self.source, self.target):
+            if not _is_dotted(value):
+                raise ValueError(f"Invalid module: {value!r}")
+
+    @property
+    def names(self) -> FrozenSet[str]:  # type: ignore[override]
+        return frozenset({self.name})
+
+    @property
+    def modules(self) -> FrozenSet[str]:  # type: ignore[override]
+        return frozenset({self.source})
+
+    def describe(self) -> str:
+        return f"move import {self.name}: {self.source} -> {self.target}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "op": self.op,
+            "name": self.name,
+            "source": self.source,
+            "target": self.target,
+        }
+
+    def _edit(self, tree: ast.Module, edits: SourceEdits) -> None:
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.ImportFrom):
+                continue
+            if node.level or node.module != self.source:
+                continue
+            moved = [a for a in node.names if a.name == self.name]
+            if not moved:
+                continue
+            kept = [a for a in node.names if a.name != self.name]
+
+            # si tocca solo il testo che cambia: parentesi, commenti e
+            # continuazioni dell'istruzione originale restano com'erano
+            if not kept:
+                if not _replace_module(node, self.source, self.target, edits):
+                    edits.replace_node(node, _import_from(self.target, moved))
+                continue
+            for start, end in _alias_removals(node, moved, edits):
+                edits.replace(start, end, "")
+            _insert_after(node, _import_from(self.target, moved), edits)
+
+
+@dataclass(frozen=True)
+class ReplaceCall(Codemod):
+    """
+    Sostituisce il target delle chiamate `old(...)` (nome puntato, come
+    scritto nel sorgente) con `new`. `add_import` (es.
+    "from pathlib import Path") viene inserito se manca.
+    """
+
+    old: str
+    new: str
+    add_import: Optional[str] = None
+
+    op = "replace_call"
+
+    def __post_init__(self) -> None:
+        for value in (self.old, self.new):
+            if not _is_dotted(value):
+                raise ValueError(f"Invalid call target: {value!r}")
+        if self.add_import is not None:
+            try:
+                tree = ast.parse(self.add_import)
+            except (TypeError, SyntaxError, ValueError):
+                raise ValueError(
+                    f"Invalid import: {self.add_import!r}"
+                ) from None
+            if len(tree.body) != 1 or not isinstance(
+                tree.body[0], (ast.Import, ast.ImportFrom)
+            ):
+                raise ValueError(f"Invalid import: {self.add_import!r}")
+
+    @property
+    def names(self) -> FrozenSet[str]:  # type: ignore[override]
+        return frozenset({self.old.rsplit(".", 1)[-1]})
+
+    def describe(self) -> str:
+        return f"replace call {self.old} -> {self.new}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "op": self.op,
+            "old": self.old,
+            "new": self.new,
+            "add_import": self.add_import,
+        }
+
+    def _edit(self, tree: ast.Module, edits: SourceEdits) -> None:
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Call) and dotted_name(node.func) == self.old:
+                edits.replace_node(node.func, self.new)
+        if len(edits) and self.add_import is not None:
+            _ensure_import(tree, edits, self.add_import)
+
+
+_CODEMODS = {
+    RenameSymbol.op: RenameSymbol,
+    MoveImport.op: MoveImport,
+    ReplaceCall.op: ReplaceCall,
+}
+
+
+def codemod_from_dict(data: Mapping[str, Any]) -> Codemod:
+    """
+    Codemod da dict {"op": ..., parametri}; ValueError se invalido.
+    """
+    if not isinstance(data, Mapping):
+        raise ValueError(f"Invalid codemod: {data!r}")
+    params = dict(data)
+    op = params.pop("op", None)
+    cls = _CODEMODS.get(op)
+    if cls is None:
+        raise ValueError(f"Unknown codemod: {op!r}")
+    try:
+        return cls(**params)
+    except TypeError as e:
+        raise ValueError(f"Invalid parameters for {op}: {e}") from None
+
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+def _is_name(value: Any) -> bool:
+    return (
+        isinstance(value, str)
+        and value.isidentifier()
+        and not keyword.iskeyword(value)
+    )
+
+
+def _is_dotted(value: Any) -> bool:
+    return isinstance(value, str) and all(
+        _is_name(part) for part in value.split(".")
+    )
+
+
+def _has_param(args: ast.arguments, name: str) -> bool:
+    params = args.posonlyargs + args.args + args.kwonlyargs
+    params += [a for a in (args.vararg, args.kwarg) if a is not None]
+    return any(a.arg == name for a in params)
+
+
+def _imported_modules(tree: ast.Module) -> Set[str]:
+    """
+    Nomi locali legati a moduli: `import a.b` -> "a.b", `as x` -> "x".
+    """
+    modules: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                modules.add(alias.asname or alias.name)
+    return modules
+
+
+def _import_from(module: str, aliases: List[ast.alias]) -> str:
+    names = ", ".join(
+        a.name if a.asname is None else f"{a.name} as {a.asname}"
+        for a in aliases
+    )
+    return f"from {module} import {names}"
+
+
+# "from <modulo>": il modulo può essere spezzato da spazi / continuazioni
+_FROM_MODULE_RE = re.compile(
+    r"from(?:\s|\\\r?\n)+(\w+(?:(?:\s|\\\r?\n)*\.(?:\s|\\\r?\n)*\w+)*)"
+)
+# spazi, continuazioni e commenti fra un alias e la virgola che lo segue
+_GAP_RE = re.compile(r"(?:\s|\\\r?\n|#[^\r\n]*)*")
+_HSPACE_RE = re.compile(r"[ \t]*")
+
+
+def _replace_module(
+    node: ast.ImportFrom,
+    source: str,
+    target: str,
+    edits: SourceEdits,
+) -> bool:
+    """
+    Sostituisce il solo nome del modulo di `from source import ...`.
+    False se il testo non corrisponde (l'istruzione va riscritta).
+    """
+    start = edits.offset(node.lineno, node.col_offset)
+    match = _FROM_MODULE_RE.match(edits.code, start)
+    if match is None or re.sub(r"[\s\\]", "", match.group(1)) != source:
+        return False
+    edits.replace(match.start(1), match.end(1), target)
+    return True
+
+
+def _comma_after(code: str, offset: int) -> Optional[int]:
+    end = _GAP_RE.match(code, offset).end()  # type: ignore[union-attr]
+    return end if code.startswith(",", end) else None
+
+
+def _alias_removals(
+    node: ast.ImportFrom,
+    moved: List[ast.alias],
+    edits: SourceEdits,
+) -> List[Tuple[int, int]]:
+    """
+    Span da cancellare per togliere `moved` da un import che conserva
+    almeno un altro nome: ogni alias con la propria virgola (o, in coda,
+    con quella che lo precede). I commenti fra le parentesi restano; una
+    riga rimasta vuota viene tolta.
+    """
+    code = edits.code
+    last_kept = max(
+        index for index, alias in enumerate(node.names) if alias not in moved
+    )
+    spans: List[Tuple[int, int]] = []
+    for alias in moved:
+        start = edits.offset(alias.lineno, alias.col_offset)
+        end = edits.offset(alias.end_lineno, alias.end_col_offset)
+        comma = _comma_after(code, end)
+        if comma is not None:
+            end = comma + 1
+            while code.startswith((" ", "\t"), end):
+                end += 1
+        else:
+            # ultimo alias senza virgola finale: resta la virgola dopo
+            # l'ultimo alias conservato (tutti quelli dopo si spostano)
+            keep = node.names[last_kept]
+            comma = _comma_after(
+                code, edits.offset(keep.end_lineno, keep.end_col_offset)
+            )
+            spans.append((comma, comma + 1))  # type: ignore[operator]
+        spans.append((start, end))
+
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(spans):
+        if merged and _HSPACE_RE.fullmatch(code, merged[-1][1], start):
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+
+    removals: List[Tuple[int, int]] = []
+    for start, end in merged:
+        line_start, _ = edits.line_range(start)
+        _, line_end = edits.line_range(end)
+        if not code[line_start:start].strip():
+            # a inizio riga: un commento che segue prende l'indentazione
+            while code.startswith((" ", "\t"), end):
+                end += 1
+            # dopo una continuazione la riga vuota separa l'istruzione
+            continued = code[:line_start].rstrip("\r\n").endswith("\\")
+            if not code[end:line_end].strip() and not continued:
+                start, end = line_start, line_end
+        removals.append((start, end))
+    return removals
+
+
+def _insert_after(node: ast.stmt, statement: str, edits: SourceEdits) -> None:
+    """
+    Aggiunge `statement` dopo `node`: sulla riga seguente con la stessa
+    indentazione, oppure con "; " se la riga contiene altro codice.
+    """
+    code = edits.code
+    start = edits.offset(node.lineno, node.col_offset)
+    line_start, _ = edits.line_range(start)
+    end = edits.offset(
+        node.end_lineno,  # type: ignore[arg-type]
+        node.end_col_offset,  # type: ignore[arg-type]
+    )
+    _, line_end = edits.line_range(end)
+    rest = code[end:line_end].rstrip("\r\n")
+    if code[line_start:start].strip() or rest.strip()[:1] not in ("", "#"):
+        edits.replace(end, end, "; " + statement)
+        return
+    at = end + len(rest)
+    newline = code[at:line_end] or "\n"
+    indent = code[line_start:start]
+    edits.replace(at, at, newline + indent + statement)
+
+
+def _ensure_import(tree: ast.Module, edits: SourceEdits, statement: str) -> None:
+    """
+    Inserisce `statement` dopo gli import iniziali (o la docstring), se
+    i nomi che lega non sono già importati dallo stesso modulo.
+    """
+    wanted = _bindings(ast.parse(statement).body[0])
+    existing: Set[Tuple[str, str, str]] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            existing |= _bindings(node)
+    if wanted <= existing:
+        return
+
+    last: Optional[ast.stmt] = None
+    for index, node in enumerate(tree.body):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            last = node
+        elif index == 0 and _is_docstring(node):
+            last = node
+        else:
+            break
+
+    if last is None:
+        edits.replace(0, 0, statement + "\n")
+        return
+    end = edits.offset(last.end_lineno, last.end_col_offset)
+    edits.replace(end, end, "\n" + statement)
+
+
+def _bindings(node: ast.stmt) -> Set[Tuple[str, str, str]]:
+    # (modulo, nome importato, nome locale)
+    if isinstance(node, ast.ImportFrom):
+        module = "." * node.level + (node.module or "")
+        return {
+            (module, a.name, a.asname or a.name) for a in node.names
+        }
+    return {
+        (a.name, "", a.asname or a.name.split(".")[0])
+        for a in node.names  # type: ignore[attr-defined]
+    }
+
+
+def _is_docstring(node: ast.stmt) -> bool:
+    return (
+        isinstance(node, ast.Expr)
+        and isinstance(node.value, ast.Constant)
+        and isinstance(node.value.value, str)
+    )
@@ -0,0 +1,489 @@
+"""
+Refactor Diff — motore di diff per righe (patience / histogram / Myers).
+
+RESPONSABILITÀ:
+- internare le righe in id interi (confronti int, non stringhe)
+- rimuovere prefisso e suffisso comuni prima dell'algoritmo
+- ancore patience (righe uniche su entrambi i lati, LIS O(k log k)) in
+  un'unica passata per regione; ricorsione solo nei buchi tra ancore
+- histogram (ancora a bassa occorrenza) per le regioni senza righe
+  uniche, con fallback Myers a costo limitato
+- unified diff con la stessa formattazione di `difflib.unified_diff`
+
+NON FA:
+- diff intra-riga
+- applicazione di patch
+"""
+
+from __future__ import annotations
+
+import bisect
+import re
+from collections import Counter
+from typing import Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+
+ALGORITHMS = ("histogram", "myers")
+
+# Occorrenze massime di una riga per essere usata come ancora (come git):
+# oltre, la regione passa a Myers
+MAX_CHAIN = 64
+
+# Edit distance massima esplorata da Myers (memoria ~ D^2): oltre, la
+# regione diventa un unico blocco `replace`, corretto ma non minimo
+MYERS_MAX_COST = 1024
+
+# (tag, i1, i2, j1, j2) come `SequenceMatcher.get_opcodes`
+Opcode = Tuple[str, int, int, int, int]
+
+# (i, j, lunghezza)
+Block = Tuple[int, int, int]
+
+# una riga termina solo con \n, \r\n o \r (come `ast`, git e patch)
+_LINE_RE = re.compile(r"[^\r\n]*(?:\r\n?|\n)|[^\r\n]+")
+
+
+# ============================================================
+# LINES
+# ============================================================
+
+def split_lines(text: str) -> List[str]:
+    """
+    Righe con terminatore, come `splitlines(keepends=True)` ma senza
+    spezzare su \f, \v, \x1c-\x1e, \x85, \u2028 e \u2029.
+    """
+    if "\r" not in text:
+        lines = text.split("\n")
+        last = lines.pop()
+        lines = [line + "\n" for line in lines]
+        if last:
+            lines.append(last)
+        return lines
+    return _LINE_RE.findall(text)
+
+
+# ============================================================
+# INTERNING
+# ============================================================
+
+def intern_lines(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+) -> Tuple[List[int], List[int]]:
+    """
+    Mappa le righe di entrambi i lati su id interi condivisi.
+    """
+    ids: Dict[Hashable, int] = {}
+    setdefault = ids.setdefault
+    ia = [setdefault(line, len(ids)) for line in a]
+    ib = [setdefault(line, len(ids)) for line in b]
+    return ia, ib
+
+
+# ============================================================
+# MATCHING BLOCKS
+# ============================================================
+
+def matching_blocks(
+    a: Sequence[int],
+    b: Sequence[int],
+    algorithm: str = "histogram",
+) -> List[Block]:
+    """
+    Blocchi uguali (i, j, n) ordinati, non adiacenti.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown diff algorithm: {algorithm}")
+
+    blocks: List[Block] = []
+    # stack esplicito: niente limiti di ricorsione su file grandi
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+
+        # prefisso / suffisso comuni
+        start = 0
+        while alo + start < ahi and blo + start < bhi and (
+            a[alo + start] == b[blo + start]
+        ):
+            start += 1
+        if start:
+            blocks.append((alo, blo, start))
+            alo += start
+            blo += start
+        end = 0
+        while alo < ahi - end and blo < bhi - end and (
+            a[ahi - end - 1] == b[bhi - end - 1]
+        ):
+            end += 1
+        if end:
+            blocks.append((ahi - end, bhi - end, end))
+            ahi -= end
+            bhi -= end
+
+        if alo == ahi or blo == bhi:
+            continue
+
+        if algorithm == "histogram":
+            anchors = _unique_anchors(a, b, alo, ahi, blo, bhi)
+            if anchors:
+                # corse di ancore contigue come blocchi; nei buchi con
+                # righe su entrambi i lati si ricorre
+                pi, pj = alo, blo
+                for i, j, size in anchors:
+                    if i > pi and j > pj:
+                        stack.append((pi, i, pj, j))
+                    blocks.append((i, j, size))
+                    pi, pj = i + size, j + size
+                if ahi > pi and bhi > pj:
+                    stack.append((pi, ahi, pj, bhi))
+                continue
+            anchor = _histogram_anchor(a, b, alo, ahi, blo, bhi)
+            if anchor is not None:
+                i, j, size = anchor
+                blocks.append(anchor)
+                stack.append((i + size, ahi, j + size, bhi))
+                stack.append((alo, i, blo, j))
+                continue
+        blocks.extend(_myers(a, b, alo, ahi, blo, bhi))
+
+    blocks.sort()
+    merged: List[Block] = []
+    for i, j, size in blocks:
+        if size <= 0:
+            continue
+        if merged:
+            pi, pj, psize = merged[-1]
+            if pi + psize == i and pj + psize == j:
+                merged[-1] = (pi, pj, psize + size)
+                continue
+        merged.append((i, j, size))
+    return merged
+
+
+def _unique_anchors(
+    a: Sequence[int],
+    b: Sequence[int],
+    alo: int,
+    ahi: int,
+    blo: int,
+    bhi: int,
+) -> List[Block]:
+    """
+    Ancore patience della regione: righe che compaiono una sola volta
+    in entrambi i lati, ridotte alla più lunga sottosequenza crescente
+    (LIS) delle loro posizioni in `b`. Le ancore contigue sono fuse in
+    corse (i, j, n). Costo O(n + k log k) sulla regione.
+    """
+    count_a = Counter(a[alo:ahi])
+    count_b = Counter(b[blo:bhi])
+    pos_b = {line: j for j, line in enumerate(b[blo:bhi], blo)}
+
+    # (i, j) delle righe uniche comuni, in ordine di `a`
+    pairs = [
+        (i, pos_b[line])
+        for i, line in enumerate(a[alo:ahi], alo)
+        if count_a[line] == 1 and count_b.get(line) == 1
+    ]
+    if not pairs:
+        return []
+
+    # LIS per patience sorting: tails[p] = j minimo che chiude una
+    # sequenza lunga p + 1
+    tails: List[int] = []
+    tail_index: List[int] = []
+    prev = [-1] * len(pairs)
+    for t, (_, j) in enumerate(pairs):
+        p = bisect.bisect_left(tails, j)
+        if p == len(tails):
+            tails.append(j)
+            tail_index.append(t)
+        else:
+            tails[p] = j
+            tail_index[p] = t
+        if p:
+            prev[t] = tail_index[p - 1]
+
+    chain: List[int] = []
+    t = tail_index[-1]
+    while t >= 0:
+        chain.append(t)
+        t = prev[t]
+
+    runs: List[Block] = []
+    for t in reversed(chain):
+        i, j = pairs[t]
+        if runs:
+            ri, rj, size = runs[-1]
+            if ri + size == i and rj + size == j:
+                runs[-1] = (ri, rj, size + 1)
+                continue
+        runs.append((i, j, 1))
+    return runs
+
+
+def _histogram_anchor(
+    a: Sequence[int],
+    b: Sequence[int],
+    alo: int,
+    ahi: int,
+    blo: int,
+    bhi: int,
+) -> Optional[Block]:
+    """
+    Ancora di una regione senza righe uniche comuni: la corsa comune
+    che contiene la riga con meno occorrenze in `a` (a parità, la più
+    lunga).
+
+    None se non c'è nessuna riga comune sotto MAX_CHAIN occorrenze.
+    """
+    positions: Dict[int, List[int]] = {}
+    for i in range(alo, ahi):
+        positions.setdefault(a[i], []).append(i)
+
+    best: Optional[Block] = None
+    best_count = MAX_CHAIN + 1
+    j = blo
+    while j < bhi:
+        occurrences = positions.get(b[j])
+        if occurrences is None or len(occurrences) > MAX_CHAIN:
+            j += 1
+            continue
+        next_j = j + 1
+        for i in occurrences:
+            # estende la corsa in entrambe le direzioni
+            si, sj = i, j
+            while si > alo and sj > blo and a[si - 1] == b[sj - 1]:
+                si -= 1
+                sj -= 1
+            ei, ej = i + 1, j + 1
+            count = len(occurrences)
+            while ei < ahi and ej < bhi and a[ei] == b[ej]:
+                run = positions.get(a[ei])
+                if run is not None and len(run) < count:
+                    count = len(run)
+                ei += 1
+                ej += 1
+            size = ei - si
+            if best is None or count < best_count or (
+                count == best_count and size > best[2]
+            ):
+                best = (si, sj, size)
+                best_count = count
+            next_j = max(next_j, ej)
+        # le righe dentro la corsa appena vista non danno ancore migliori
+        j = next_j
+    return best
+
+
+def _myers(
+    a: Sequence[int],
+    b: Sequence[int],
+    alo: int,
+    ahi: int,
+    blo: int,
+    bhi: int,
+) -> List[Block]:
+    """
+    Myers O(ND) sulla regione. Oltre MYERS_MAX_COST nessun blocco
+    (la regione diventa un `replace`).
+    """
+    n, m = ahi - alo, bhi - blo
+    offset = n + m + 1
+    v = [0] * (2 * offset + 1)
+    trace: List[List[int]] = []
+    max_cost = min(n + m, MYERS_MAX_COST)
+
+    for d in range(max_cost + 1):
+        # copia solo la finestra di diagonali usata al passo d
+        trace.append(v[offset - d:offset + d + 1])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _myers_backtrack(trace, d, k, x, alo, blo)
+    return []
+
+
+def _myers_backtrack(
+    trace: List[List[int]],
+    d: int,
+    k: int,
+    x: int,
+    alo: int,
+    blo: int,
+) -> List[Block]:
+    blocks: List[Block] = []
+    for step in range(d, 0, -1):
+        # trace[step] = V all'inizio del passo, diagonali [-step, step]
+        v = trace[step]
+        if k == -step or (k != step and v[k - 1 + step] < v[k + 1 + step]):
+            prev_k = k + 1
+            px = v[prev_k + step]
+            start_x = px
+        else:
+            prev_k = k - 1
+            px = v[prev_k + step]
+            start_x = px + 1
+        if x > start_x:
+            blocks.append((alo + start_x, blo + start_x - k, x - start_x))
+        k, x = prev_k, px
+    if x > 0:
+        blocks.append((alo, blo, x))
+    blocks.reverse()
+    return blocks
+
+
+# ============================================================
+# OPCODES
+# ============================================================
+
+def diff_opcodes(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+    algorithm: str = "histogram",
+) -> List[Opcode]:
+    """
+    Opcode nel formato di `SequenceMatcher.get_opcodes`.
+    """
+    ia, ib = intern_lines(a, b)
+    opcodes: List[Opcode] = []
+    i = j = 0
+    for bi, bj, size in matching_blocks(ia, ib, algorithm) + [
+        (len(ia), len(ib), 0)
+    ]:
+        if i < bi and j < bj:
+            opcodes.append(("replace", i, bi, j, bj))
+        elif i < bi:
+            opcodes.append(("delete", i, bi, j, bj))
+        elif j < bj:
+            opcodes.append(("insert", i, bi, j, bj))
+        if size:
+            opcodes.append(("equal", bi, bi + size, bj, bj + size))
+        i, j = bi + size, bj + size
+    return opcodes
+
+
+def grouped_opcodes(
+    opcodes: List[Opcode],
+    n: int = 3,
+) -> Iterator[List[Opcode]]:
+    """
+    Hunk con `n` righe di contesto (stesso raggruppamento di difflib).
+    """
+    codes = list(opcodes) or [("equal", 0, 1, 0, 1)]
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    nn = n + n
+    group: List[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > nn:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+# ============================================================
+# UNIFIED DIFF
+# ============================================================
+
+def unified_diff(
+    a: Sequence[str],
+    b: Sequence[str],
+    fromfile: str = "",
+    tofile: str = "",
+    n: int = 3,
+    lineterm: str = "\n",
+    algorithm: str = "histogram",
+) -> Iterator[str]:
+    """
+    Drop-in di `difflib.unified_diff` (header, range dei hunk, prefissi).
+    """
+    return format_unified(
+        a,
+        b,
+        diff_opcodes(a, b, algorithm),
+        fromfile=fromfile,
+        tofile=tofile,
+        n=n,
+        lineterm=lineterm,
+    )
+
+
+def format_unified(
+    a: Sequence[str],
+    b: Sequence[str],
+    opcodes: List[Opcode],
+    *,
+    fromfile: str = "",
+    tofile: str = "",
+    n: int = 3,
+    lineterm: str = "\n",
+) -> Iterator[str]:
+    """
+    Righe del unified diff da opcode già calcolati (generatore lazy).
+    """
+    started = False
+    for group in grouped_opcodes(opcodes, n):
+        if not started:
+            started = True
+            yield f"--- {fromfile}{lineterm}"
+            yield f"+++ {tofile}{lineterm}"
+
+        first, last = group[0], group[-1]
+        file1 = _format_range(first[1], last[2])
+        file2 = _format_range(first[3], last[4])
+        yield f"@@ -{file1} +{file2} @@{lineterm}"
+
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                for line in a[i1:i2]:
+                    yield " " + line
+                continue
+            if tag in ("replace", "delete"):
+                for line in a[i1:i2]:
+                    yield "-" + line
+            if tag in ("replace", "insert"):
+                for line in b[j1:j2]:
+                    yield "+" + line
+
+
+def diff_stats(opcodes: List[Opcode], n: int = 3) -> Dict[str, int]:
+    """
+    Righe aggiunte / rimosse e numero di hunk, senza formattare il diff.
+    """
+    added = removed = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag != "equal":
+            removed += i2 - i1
+            added += j2 - j1
+    hunks = 0
+    if added or removed:
+        hunks = sum(1 for _ in grouped_opcodes(opcodes, n))
+    return {"added": added, "removed": removed, "hunks": hunks}
+
+
+def _format_range(start: int, stop: int) -> str:
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return str(beginning)
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
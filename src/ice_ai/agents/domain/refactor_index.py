@@ -0,0 +1,333 @@
+"""
+Refactor Index — indice di progetto simboli / riferimenti.
+
+RESPONSABILITÀ:
+- parsing AST parallelo dei sorgenti (una volta per file)
+- indice invertito identificatore -> file, modulo importato -> file
+- definizioni top-level per file
+- aggiornamento incrementale (solo i file cambiati vengono riparsati)
+- file candidati per un codemod
+
+NON FA:
+- trasformare codice (vedi refactor_codemod)
+- risoluzione degli scope: un file "referenzia" un nome se
+  l'identificatore vi compare nell'AST
+"""
+
+from __future__ import annotations
+
+import ast
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from ice_ai.agents.domain.refactor_codemod import Codemod
+
+
+# Sotto questa soglia il costo di avvio del pool supera il guadagno
+POOL_MIN_FILES = 32
+
+# (mtime_ns, size): basta a riconoscere un file cambiato senza leggerlo
+Signature = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class FileSymbols:
+    """
+    Simboli di un file. `error` valorizzato = file non parsabile
+    (indicizzato senza nomi, riprovato al prossimo cambiamento).
+    """
+
+    path: str
+    signature: Signature
+    names: FrozenSet[str]
+    modules: FrozenSet[str]
+    definitions: Tuple[Tuple[str, str, int], ...]
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "names": len(self.names),
+            "modules": sorted(self.modules),
+            "definitions": [
+                {"name": name, "kind": kind, "line": line}
+                for name, kind, line in self.definitions
+            ],
+            "error": self.error,
+        }
+
+
+# ============================================================
+# SCAN
+# ============================================================
+
+def signature(path: str) -> Optional[Signature]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def scan_file(path: str) -> Optional[FileSymbols]:
+    """
+    Simboli di un file; None se il file non esiste più.
+    """
+    from ice_ai.agents.domain.refactor_batch import read_text
+
+    sig = signature(path)
+    if sig is None:
+        return None
+    try:
+        tree = ast.parse(read_text(path), filename=path)
+    except (OSError, UnicodeDecodeError, SyntaxError, ValueError) as e:
+        return FileSymbols(path, sig, frozenset(), frozenset(), (), str(e))
+    except (RecursionError, MemoryError):
+        # annidamento oltre lo stack del parser C (vedi Codemod.apply)
+        return FileSymbols(
+            path, sig, frozenset(), frozenset(), (), "Source too deeply nested"
+        )
+
+    names: Set[str] = set()
+    modules: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            names.add(node.id)
+        elif isinstance(node, ast.Attribute):
+            names.add(node.attr)
+        elif isinstance(
+            node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+        ):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, ast.alias):
+            names.add(node.name.split(".")[0])
+            if node.asname:
+                names.add(node.asname)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            names.update(node.names)
+        elif isinstance(node, ast.Import):
+            modules.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.add(node.module)
+
+    return FileSymbols(
+        path,
+        sig,
+        frozenset(names),
+        frozenset(modules),
+        tuple(_definitions(tree)),
+    )
+
+
+def _definitions(tree: ast.Module) -> Iterator[Tuple[str, str, int]]:
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            yield node.name, "function", node.lineno
+        elif isinstance(node, ast.ClassDef):
+            yield node.name, "class", node.lineno
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = (
+                node.targets if isinstance(node, ast.Assign) else [node.target]
+            )
+            for target in targets:
+                if isinstance(target, ast.Name):
+                    yield target.id, "variable", node.lineno
+
+
+def _scan_chunk(paths: List[str]) -> List[Tuple[str, Optional[FileSymbols]]]:
+    return [(path, scan_file(path)) for path in paths]
+
+
+def scan_files(
+    paths: List[str],
+    *,
+    workers: Optional[int] = None,
+) -> Iterator[Tuple[str, Optional[FileSymbols]]]:
+    """
+    (path, simboli | None) per ogni path, su process pool se conviene.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(paths) < POOL_MIN_FILES:
+        for path in paths:
+            yield path, scan_file(path)
+        return
+
+    chunk_size = max(1, min(128, len(paths) // (workers * 8)))
+    chunks = [
+        paths[i:i + chunk_size]
+        for i in range(0, len(paths), chunk_size)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for results in pool.map(_scan_chunk, chunks):
+            yield from results
+
+
+# ============================================================
+# INDEX
+# ============================================================
+
+class SymbolIndex:
+    """
+    Indice invertito dei simboli di un insieme di file.
+
+    Costruito una volta (`build`), poi tenuto allineato con `update`
+    sui file cambiati o con `refresh` (stat di tutti i file noti,
+    riparsati solo quelli con mtime / size diversi).
+    """
+
+    def __init__(self) -> None:
+        self._files: Dict[str, FileSymbols] = {}
+        self._by_name: Dict[str, Set[str]] = {}
+        self._by_module: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __contains__(self, path: str) -> bool:
+        return os.fspath(path) in self._files
+
+    # ------------------------------------------------------------------
+    # BUILD / UPDATE
+    # ------------------------------------------------------------------
+
+    def build(
+        self,
+        paths: Iterable[str],
+        *,
+        workers: Optional[int] = None,
+    ) -> Dict[str, int]:
+        self._files.clear()
+        self._by_name.clear()
+        self._by_module.clear()
+        return self._rescan([os.fspath(p) for p in paths], workers)
+
+    def update(
+        self,
+        paths: Iterable[str],
+        *,
+        workers: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """
+        Riallinea i file indicati (nuovi, modificati o cancellati).
+        I file con firma invariata non vengono riletti.
+        """
+        stale: List[str] = []
+        unchanged = 0
+        for path in map(os.fspath, paths):
+            known = self._files.get(path)
+            if known is not None and known.signature == signature(path):
+                unchanged += 1
+            else:
+                stale.append(path)
+        counts = self._rescan(stale, workers)
+        counts["unchanged"] += unchanged
+        return counts
+
+    def refresh(self, *, workers: Optional[int] = None) -> Dict[str, int]:
+        """
+        `update` su tutti i file noti (non scopre file nuovi).
+        """
+        return self.update(list(self._files), workers=workers)
+
+    def _rescan(
+        self,
+        paths: List[str],
+        workers: Optional[int],
+    ) -> Dict[str, int]:
+        counts = {"parsed": 0, "removed": 0, "failed": 0, "unchanged": 0}
+        for path, symbols in scan_files(paths, workers=workers):
+            self._forget(path)
+            if symbols is None:
+                counts["removed"] += 1
+                continue
+            self._files[path] = symbols
+            for name in symbols.names:
+                self._by_name.setdefault(name, set()).add(path)
+            for module in symbols.modules:
+                self._by_module.setdefault(module, set()).add(path)
+            counts["parsed"] += 1
+            if symbols.error is not None:
+                counts["failed"] += 1
+        return counts
+
+    def _forget(self, path: str) -> None:
+        old = self._files.pop(path, None)
+        if old is None:
+            return
+        for name in old.names:
+            _discard(self._by_name, name, path)
+        for module in old.modules:
+            _discard(self._by_module, module, path)
+
+    # ------------------------------------------------------------------
+    # QUERY
+    # ------------------------------------------------------------------
+
+    def files_with(self, name: str) -> List[str]:
+        """
+        File in cui l'identificatore compare.
+        """
+        return sorted(self._by_name.get(name, ()))
+
+    def importers(self, module: str) -> List[str]:
+        return sorted(self._by_module.get(module, ()))
+
+    def definitions(self, name: str) -> List[Dict[str, Any]]:
+        """
+        Definizioni top-level di `name` (file, tipo, riga).
+        """
+        found = []
+        for path in self.files_with(name):
+            for def_name, kind, line in self._files[path].definitions:
+                if def_name == name:
+                    found.append({"path": path, "kind": kind, "line": line})
+        return found
+
+    def candidates(self, codemod: Codemod) -> List[str]:
+        """
+        File che il codemod può modificare: contengono uno dei suoi
+        identificatori e, se richiesto, importano dai suoi moduli.
+        """
+        files: Set[str] = set()
+        for name in codemod.names:
+            files |= self._by_name.get(name, set())
+        if codemod.modules:
+            importing: Set[str] = set()
+            for module in codemod.modules:
+                importing |= self._by_module.get(module, set())
+            files &= importing
+        return sorted(files)
+
+    def file(self, path: str) -> Optional[FileSymbols]:
+        return self._files.get(os.fspath(path))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "files": len(self._files),
+            "failed": sum(1 for f in self._files.values() if f.error),
+            "names": len(self._by_name),
+            "modules": len(self._by_module),
+        }
+
+
+def _discard(index: Dict[str, Set[str]], key: str, path: str) -> None:
+    paths = index.get(key)
+    if paths is None:
+        return
+    paths.discard(path)
+    if not paths:
+        del index[key]
@@ -0,0 +1,495 @@
+"""
+Refactor Patch — dry-run di unified diff sul contenuto corrente.
+
+RESPONSABILITÀ:
+- hunk da una coppia before / after o dal testo di un unified diff
+- localizzazione dei hunk nel file corrente (offset, fuzz sul contesto)
+- 3-way: con il contenuto base i hunk vengono riposizionati seguendo
+  le modifiche base -> corrente, e quelle sovrapposte sono conflitti
+- riconoscimento di hunk già applicati
+- tabelle di hash di riga riusate tra controlli (cache per contenuto)
+
+NON FA:
+- scrivere file (il risultato è solo calcolato)
+- merge automatico dei conflitti
+"""
+
+from __future__ import annotations
+
+import bisect
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ice_ai.agents.domain.refactor_diff import (
+    Opcode,
+    diff_opcodes,
+    grouped_opcodes,
+    split_lines,
+)
+from ice_ai.agents.domain.refactor_store import ContentStore
+
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+# Stati di un hunk, dal migliore al peggiore
+STATUSES = ("clean", "offset", "fuzz", "already_applied", "conflict", "failed")
+
+
+# ============================================================
+# HUNKS
+# ============================================================
+
+@dataclass(frozen=True)
+class Hunk:
+    """
+    Hunk di un unified diff. `before` = contesto + righe rimosse,
+    `after` = contesto + righe aggiunte; `lead` / `trail` = righe di
+    contesto iniziali / finali (uguali nei due lati).
+    """
+
+    old_start: int
+    old_lines: int
+    new_start: int
+    new_lines: int
+    before: Tuple[str, ...]
+    after: Tuple[str, ...]
+    lead: int
+    trail: int
+
+    @property
+    def start(self) -> int:
+        # indice 0-based della prima riga di `before` nel file base
+        return self.old_start - 1 if self.old_lines else self.old_start
+
+
+def hunks_from_texts(before: str, after: str, context: int = 3) -> List[Hunk]:
+    """
+    Hunk tra due versioni, senza passare dal testo del diff.
+    """
+    a = split_lines(before)
+    b = split_lines(after)
+    return hunks_from_opcodes(a, b, diff_opcodes(a, b), context)
+
+
+def hunks_from_opcodes(
+    a: Sequence[str],
+    b: Sequence[str],
+    opcodes: List[Opcode],
+    context: int = 3,
+) -> List[Hunk]:
+    """
+    Hunk da opcode già calcolati sulle righe `a` / `b`.
+    """
+    if all(tag == "equal" for tag, *_ in opcodes):
+        return []
+
+    hunks: List[Hunk] = []
+    for group in grouped_opcodes(opcodes, context):
+        i1, i2 = group[0][1], group[-1][2]
+        j1, j2 = group[0][3], group[-1][4]
+        lead = group[0][2] - i1 if group[0][0] == "equal" else 0
+        trail = group[-1][2] - group[-1][1] if group[-1][0] == "equal" else 0
+        hunks.append(Hunk(
+            old_start=i1 + 1 if i2 > i1 else i1,
+            old_lines=i2 - i1,
+            new_start=j1 + 1 if j2 > j1 else j1,
+            new_lines=j2 - j1,
+            before=tuple(a[i1:i2]),
+            after=tuple(b[j1:j2]),
+            lead=lead,
+            trail=trail,
+        ))
+    return hunks
+
+
+def parse_unified(diff: str) -> List[Hunk]:
+    """
+    Hunk dal testo di un unified diff a file singolo (formato git /
+    GNU, incluso "\\ No newline at end of file").
+    """
+    hunks: List[Hunk] = []
+    lines = split_lines(diff)
+    pos = 0
+    while pos < len(lines):
+        match = _HUNK_RE.match(lines[pos])
+        pos += 1
+        if match is None:
+            continue
+        old_start, new_start = int(match.group(1)), int(match.group(3))
+        old_lines = int(match.group(2) or 1)
+        new_lines = int(match.group(4) or 1)
+
+        before: List[str] = []
+        after: List[str] = []
+        tags: List[str] = []
+        while pos < len(lines) and (
+            len(before) < old_lines or len(after) < new_lines
+        ):
+            line = lines[pos]
+            pos += 1
+            tag, text = line[:1], line[1:]
+            if tag == "\\":
+                _strip_newline(before, after, tags)
+                continue
+            if tag not in (" ", "-", "+"):
+                if line.strip() == "":
+                    # riga di contesto vuota senza prefisso
+                    tag, text = " ", line
+                else:
+                    raise ValueError(f"Malformed hunk line: {line!r}")
+            if tag in (" ", "-"):
+                before.append(text)
+            if tag in (" ", "+"):
+                after.append(text)
+            tags.append(tag)
+        if pos < len(lines) and lines[pos].startswith("\\"):
+            _strip_newline(before, after, tags)
+            pos += 1
+
+        lead = next((i for i, t in enumerate(tags) if t != " "), len(tags))
+        trail = next(
+            (i for i, t in enumerate(reversed(tags)) if t != " "), 0
+        )
+        hunks.append(Hunk(
+            old_start, old_lines, new_start, new_lines,
+            tuple(before), tuple(after), lead, trail,
+        ))
+    return hunks
+
+
+def _strip_newline(
+    before: List[str],
+    after: List[str],
+    tags: List[str],
+) -> None:
+    if not tags:
+        return
+    last = tags[-1]
+    if last in (" ", "-") and before:
+        before[-1] = before[-1].rstrip("\r\n")
+    if last in (" ", "+") and after:
+        after[-1] = after[-1].rstrip("\r\n")
+
+
+# ============================================================
+# LINE TABLES
+# ============================================================
+
+class LineTable:
+    """
+    Righe di un contenuto con i loro hash e, per ogni hash, le
+    posizioni in cui compare (lookup di candidati O(1)).
+    """
+
+    __slots__ = ("lines", "hashes", "_positions")
+
+    def __init__(self, text: str) -> None:
+        self.lines = split_lines(text)
+        self.hashes = [hash(line) for line in self.lines]
+        self._positions: Optional[Dict[int, List[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    @property
+    def positions(self) -> Dict[int, List[int]]:
+        # costruito alla prima ricerca: i controlli 3-way spesso non
+        # ne hanno bisogno
+        if self._positions is None:
+            positions: Dict[int, List[int]] = {}
+            for index, h in enumerate(self.hashes):
+                positions.setdefault(h, []).append(index)
+            self._positions = positions
+        return self._positions
+
+    def matches(self, start: int, pattern: Sequence[str]) -> bool:
+        end = start + len(pattern)
+        if start < 0 or end > len(self.lines):
+            return False
+        return self.lines[start:end] == list(pattern)
+
+    def find(
+        self,
+        pattern: Sequence[str],
+        expected: int,
+        lo: int = 0,
+    ) -> Optional[int]:
+        """
+        Inizio del match di `pattern` più vicino a `expected`, >= lo.
+        La riga più rara del pattern fa da ancora.
+        """
+        if not pattern:
+            return max(lo, min(expected, len(self.lines)))
+        positions = self.positions
+        anchor, candidates = 0, None
+        for offset, line in enumerate(pattern):
+            found = positions.get(hash(line))
+            if found is None:
+                return None
+            if candidates is None or len(found) < len(candidates):
+                anchor, candidates = offset, found
+
+        best: Optional[int] = None
+        # dalla posizione attesa verso l'esterno: il primo match da
+        # ciascun lato è il più vicino
+        split = bisect.bisect_left(candidates, expected + anchor)
+        for index in range(split, len(candidates)):
+            start = candidates[index] - anchor
+            if start >= lo and self.matches(start, pattern):
+                best = start
+                break
+        for index in range(split - 1, -1, -1):
+            start = candidates[index] - anchor
+            if start < lo:
+                break
+            if best is not None and expected - start >= best - expected:
+                break
+            if self.matches(start, pattern):
+                best = start
+                break
+        return best
+
+
+class LineTableCache:
+    """
+    LRU di LineTable indicizzate per hash del contenuto (lo stesso
+    ref di ContentStore: il ref di una proposta è già una chiave).
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.max_entries = max_entries
+        self._tables: "OrderedDict[str, LineTable]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str, key: Optional[str] = None) -> LineTable:
+        key = key or ContentStore.ref(text)
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                self.hits += 1
+                return table
+            self.misses += 1
+        table = LineTable(text)
+        with self._lock:
+            self._tables[key] = table
+            while len(self._tables) > self.max_entries:
+                self._tables.popitem(last=False)
+        return table
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._tables),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# ============================================================
+# CHECK
+# ============================================================
+
+@dataclass(frozen=True)
+class HunkResult:
+    """
+    Esito di un hunk. `line` = riga 1-based (file corrente) dove il
+    hunk si applica, `offset` = spostamento rispetto all'header.
+    """
+
+    index: int
+    status: str
+    expected: int
+    line: Optional[int] = None
+    offset: int = 0
+    fuzz: int = 0
+    conflicts: Tuple[Tuple[int, int], ...] = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "index": self.index,
+            "status": self.status,
+            "expected": self.expected,
+            "line": self.line,
+            "offset": self.offset,
+            "fuzz": self.fuzz,
+        }
+        if self.conflicts:
+            data["conflicts"] = [list(span) for span in self.conflicts]
+        return data
+
+
+class BaseMap:
+    """
+    Modifiche base -> corrente: posizione corrente di una riga base
+    invariata e modifiche che intersecano un intervallo.
+
+    Dipende solo dalla coppia di contenuti: più proposte sullo stesso
+    file (stessa base) la condividono.
+    """
+
+    def __init__(self, base: LineTable, current: LineTable) -> None:
+        self._opcodes = diff_opcodes(base.hashes, current.hashes)
+        self._equal = [op for op in self._opcodes if op[0] == "equal"]
+        self._starts = [op[1] for op in self._equal]
+        self._base_len = len(base)
+        self._current_len = len(current)
+
+    def map(self, index: int) -> Optional[int]:
+        """
+        Indice corrente della riga base `index`; None se modificata.
+        """
+        if index >= self._base_len:
+            return self._current_len
+        pos = bisect.bisect_right(self._starts, index) - 1
+        if pos < 0:
+            return None
+        _, i1, i2, j1, _ = self._equal[pos]
+        return j1 + index - i1 if index < i2 else None
+
+    def changes(self, lo: int, hi: int) -> List[Tuple[int, int]]:
+        """
+        Modifiche (righe base 1-based, estremi inclusi) che toccano
+        [lo, hi); un insert conta solo se strettamente interno.
+        """
+        spans = []
+        for tag, i1, i2, _, _ in self._opcodes:
+            if tag == "equal" or i1 >= hi:
+                continue
+            if i1 < i2 and i2 > lo:
+                spans.append((i1 + 1, i2))
+            elif i1 == i2 and lo < i1 < hi:
+                spans.append((i1, i1))
+        return spans
+
+
+def check_hunks(
+    hunks: Sequence[Hunk],
+    current: LineTable,
+    *,
+    base: Optional[LineTable] = None,
+    base_map: Optional[BaseMap] = None,
+    fuzz: int = 2,
+) -> Tuple[List[HunkResult], Optional[List[str]]]:
+    """
+    Localizza i hunk nel contenuto corrente, in ordine e senza
+    sovrapposizioni. Ritorna gli esiti e le righe risultanti
+    (None se almeno un hunk è in conflitto o non si applica).
+
+    Con `base` (o una `base_map` già calcolata) il controllo è 3-way.
+    """
+    if base_map is None and base is not None:
+        base_map = BaseMap(base, current)
+    results: List[HunkResult] = []
+    # (inizio, fine, righe nuove) delle sostituzioni da applicare
+    splices: List[Tuple[int, int, Sequence[str]]] = []
+    drift = 0
+    lo = 0
+
+    for index, hunk in enumerate(hunks):
+        expected = hunk.start + drift
+        result, splice = _check_hunk(
+            index, hunk, current, base_map, expected, lo, fuzz
+        )
+        results.append(result)
+        if result.line is not None:
+            drift = result.offset
+        if splice is not None:
+            splices.append(splice)
+            lo = splice[1]
+        elif result.status == "already_applied":
+            lo = result.line - 1 + len(hunk.after)
+
+    if any(r.status in ("conflict", "failed") for r in results):
+        return results, None
+    lines = list(current.lines)
+    for start, end, replacement in reversed(splices):
+        lines[start:end] = replacement
+    return results, lines
+
+
+def _check_hunk(
+    index: int,
+    hunk: Hunk,
+    current: LineTable,
+    base_map: Optional[BaseMap],
+    expected: int,
+    lo: int,
+    fuzz: int,
+) -> Tuple[HunkResult, Optional[Tuple[int, int, Sequence[str]]]]:
+    header = hunk.start
+
+    def found(status: str, start: int, cut: int = 0) -> Tuple[
+        HunkResult, Optional[Tuple[int, int, Sequence[str]]]
+    ]:
+        lead = min(cut, hunk.lead)
+        trail = min(cut, hunk.trail)
+        offset = start - lead - header
+        result = HunkResult(
+            index, status, header + 1, start - lead + 1,
+            offset, cut,
+        )
+        if status == "already_applied":
+            return result, None
+        end = start + len(hunk.before) - lead - trail
+        after = hunk.after[lead:len(hunk.after) - trail]
+        return result, (start, end, after)
+
+    # 1) 3-way: posizione esatta seguendo le modifiche base -> corrente
+    conflicts: List[Tuple[int, int]] = []
+    if base_map is not None:
+        mapped = base_map.map(header)
+        if mapped is not None and current.matches(mapped, hunk.before):
+            return found("clean" if mapped == header else "offset", mapped)
+        core_lo = header + hunk.lead
+        core_hi = header + len(hunk.before) - hunk.trail
+        conflicts = base_map.changes(core_lo, max(core_hi, core_lo + 1))
+
+    # 2) match esatto più vicino
+    start = current.find(hunk.before, expected, lo)
+    if start is not None and not conflicts:
+        return found("clean" if start == header else "offset", start)
+
+    # 3) già applicato
+    applied = current.find(hunk.after, expected, 0)
+    if applied is not None and hunk.before != hunk.after:
+        return found("already_applied", applied)
+
+    if conflicts:
+        return HunkResult(
+            index, "conflict", header + 1, conflicts=tuple(conflicts)
+        ), None
+
+    # 4) fuzz: contesto esterno ignorato, una riga per lato alla volta
+    for cut in range(1, fuzz + 1):
+        if cut > max(hunk.lead, hunk.trail):
+            break
+        lead = min(cut, hunk.lead)
+        trail = min(cut, hunk.trail)
+        core = hunk.before[lead:len(hunk.before) - trail]
+        if not core:
+            break
+        start = current.find(core, expected + lead, lo)
+        if start is not None:
+            return found("fuzz", start, cut)
+
+    return HunkResult(index, "failed", header + 1), None
+
+
+def summarize(results: Sequence[HunkResult]) -> str:
+    """
+    Stato complessivo: il peggiore tra i hunk non già applicati
+    ("already_applied" se lo sono tutti, "clean" se non ce ne sono).
+    """
+    if not results:
+        return "clean"
+    pending = [r.status for r in results if r.status != "already_applied"]
+    if not pending:
+        return "already_applied"
+    return max(pending, key=STATUSES.index)
@@ -0,0 +1,203 @@
+"""
+Refactor Store — contenuti delle proposte indicizzati per hash.
+
+RESPONSABILITÀ:
+- memorizzare before / after una sola volta (stesso contenuto = stesso ref)
+- materializzare un ref su richiesta
+- budget di byte in memoria con eviction LRU
+- tier su directory opzionale (un file per ref, scritto una volta)
+
+NON FA:
+- generare diff o proposte (vedi RefactorAgent)
+- garbage collection della directory
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+
+# blake2b a 20 byte in esadecimale: l'unica forma di ref accettata
+# (i ref arrivano dall'esterno e diventano path nel tier su disco)
+_REF_RE = re.compile(r"[0-9a-f]{40}")
+
+class ContentStore:
+    """
+    Blob store content-addressed.
+
+    In memoria il totale resta sotto `max_bytes` (UTF-8) eliminando i
+    blob usati meno di recente; con `path` i blob sono anche scritti
+    su disco e un ref uscito dalla memoria resta materializzabile.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = 256 * 1024 * 1024,
+        path: Optional[str] = None,
+    ) -> None:
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be >= 1")
+        self.max_bytes = max_bytes
+        self.path = path
+
+        self._blobs: "OrderedDict[str, str]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.stores = 0
+        self.dedup = 0
+        self.evictions = 0
+
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def ref(text: str) -> str:
+        return hashlib.blake2b(
+            text.encode("utf-8", "surrogatepass"),
+            digest_size=20,
+        ).hexdigest()
+
+    @staticmethod
+    def is_ref(ref: Any) -> bool:
+        return isinstance(ref, str) and _REF_RE.fullmatch(ref) is not None
+
+    # ------------------------------------------------------------------
+    # PUT / GET
+    # ------------------------------------------------------------------
+
+    def put(self, text: str) -> str:
+        """
+        Memorizza `text` e ne ritorna il ref. Idempotente.
+
+        Senza disco un contenuto oltre `max_bytes` non viene trattenuto
+        (`ref in store` è False).
+        """
+        ref = self.ref(text)
+        with self._lock:
+            self._put(ref, text)
+            self._evict()
+        return ref
+
+    def put_all(self, *texts: str) -> Tuple[str, ...]:
+        """
+        Memorizza più contenuti che servono insieme (es. before / after
+        di una proposta): l'eviction non tocca i ref del gruppo, salvo
+        che il gruppo da solo superi `max_bytes`.
+        """
+        refs = tuple(self.ref(text) for text in texts)
+        with self._lock:
+            for ref, text in zip(refs, texts):
+                self._put(ref, text)
+            self._evict(keep=frozenset(refs))
+            self._evict()
+        return refs
+
+    def _put(self, ref: str, text: str) -> None:
+        if ref in self._blobs:
+            self._blobs.move_to_end(ref)
+            self.dedup += 1
+            return
+
+        size = _size(text)
+        self.stores += 1
+        self._disk_put(ref, text)
+        if size <= self.max_bytes:
+            self._blobs[ref] = text
+            self._sizes[ref] = size
+            self._bytes += size
+
+    def get(self, ref: str) -> Optional[str]:
+        """
+        Contenuto del ref, None se sconosciuto, non valido o eliminato
+        (senza disco).
+        """
+        if not self.is_ref(ref):
+            return None
+        with self._lock:
+            text = self._blobs.get(ref)
+            if text is not None:
+                self._blobs.move_to_end(ref)
+                return text
+        return self._disk_get(ref)
+
+    def __contains__(self, ref: str) -> bool:
+        if not self.is_ref(ref):
+            return False
+        return ref in self._blobs or (
+            self.path is not None and os.path.isfile(self._file(ref))
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "blobs": len(self._blobs),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "stores": self.stores,
+            "dedup": self.dedup,
+            "evictions": self.evictions,
+        }
+
+    def _evict(self, keep: FrozenSet[str] = frozenset()) -> None:
+        if not keep:
+            while self._bytes > self.max_bytes and self._blobs:
+                ref, _ = self._blobs.popitem(last=False)
+                self._bytes -= self._sizes.pop(ref)
+                self.evictions += 1
+            return
+
+        for ref in list(self._blobs):
+            if self._bytes <= self.max_bytes:
+                break
+            if ref in keep:
+                continue
+            del self._blobs[ref]
+            self._bytes -= self._sizes.pop(ref)
+            self.evictions += 1
+
+    # ------------------------------------------------------------------
+    # DISCO
+    # ------------------------------------------------------------------
+
+    def _file(self, ref: str) -> str:
+        return os.path.join(self.path, ref[:2], ref)
+
+    def _disk_put(self, ref: str, text: str) -> None:
+        if self.path is None:
+            return
+        target = self._file(ref)
+        if os.path.exists(target):
+            return
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # scrittura atomica: un lettore non vede mai un blob parziale
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(
+            tmp, "w", encoding="utf-8", errors="surrogatepass", newline=""
+        ) as fh:
+            fh.write(text)
+        os.replace(tmp, target)
+
+    def _disk_get(self, ref: str) -> Optional[str]:
+        if self.path is None or not self.is_ref(ref):
+            return None
+        try:
+            with open(
+                self._file(ref),
+                encoding="utf-8",
+                errors="surrogatepass",
+                newline="",
+            ) as fh:
+                return fh.read()
+        except FileNotFoundError:
+            return None
+
+
+def _size(text: str) -> int:
+    return len(text.encode("utf-8", "surrogatepass"))
@@ -113,7 +113,7 @@ class ScannerAgent:
             return "python"
         if path.suffix in {".md", ".rst"}:
             return "documentation"
-        if path.suffix in {".json", ".yaml", ".yml"}:
+        if path.suffix in {".json", ".yaml", ".yml", ".toml"}:
             return "data"
         return "generic"
 
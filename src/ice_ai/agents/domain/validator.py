@@ -1,8 +1,22 @@
 from __future__ import annotations
 
 import ast
-from typing import Dict, Any, List, Optional
+import os
+from typing import (
+    Dict,
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
+from ice_ai.agents.domain.validator_cache import ValidationCache
+from ice_ai.agents.domain.validator_metrics import RuleMetrics
+from ice_ai.agents.domain.validator_rules import Rule, RuleEngine
 from ice_ai.agents.spec import AgentSpec
 
 
@@ -12,7 +26,7 @@ class ValidatorAgent:
 
     Responsabilità:
     - validazione sintattica (AST)
-    - validazione semantica light (rule-based)
+    - validazione semantica light (rule-based, singola visita AST)
     - preparazione contesto per LLM (opzionale, esterno)
 
     NON:
@@ -29,11 +43,65 @@ class ValidatorAgent:
         capabilities={
             "code.validate.syntax",
             "code.validate.semantic",
+            "code.validate.rules",
+            "code.validate.cache",
+            "code.validate.batch",
+            "code.validate.diff",
+            "code.validate.metrics",
+            "data.validate",
         },
         ui_label="Validator",
         ui_group="domain",
     )
 
+    def __init__(
+        self,
+        rules: Optional[Iterable[Rule]] = None,
+        *,
+        cache: Optional[ValidationCache] = None,
+        metrics: Optional[RuleMetrics] = None,
+    ) -> None:
+        self._rules = RuleEngine(rules)
+        self._cache = cache
+        self._metrics = metrics
+
+    @property
+    def cache(self) -> Optional[ValidationCache]:
+        return self._cache
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Contatori della cache (hit / miss / eviction); vuoto se assente.
+        """
+        return self._cache.stats() if self._cache is not None else {}
+
+    @property
+    def metrics(self) -> Optional[RuleMetrics]:
+        return self._metrics
+
+    def rule_metrics(self) -> Dict[str, Any]:
+        """
+        Tempi / invocazioni / issue per regola cumulati tra le chiamate,
+        più le regole disabilitate; vuoto se le metriche sono spente.
+        Gli hit di cache non eseguono regole e non sono conteggiati.
+        """
+        if self._metrics is None:
+            return {}
+        snapshot = self._metrics.snapshot()
+        snapshot["disabled"] = list(self._rules.disabled)
+        return snapshot
+
+    @property
+    def rules(self) -> RuleEngine:
+        return self._rules
+
+    def register_rule(self, rule: Rule) -> None:
+        """
+        Aggiunge una regola: viene eseguita nella stessa visita AST
+        delle altre, senza scansioni aggiuntive del testo.
+        """
+        self._rules.register(rule)
+
     # ------------------------------------------------------------------
     # API PUBBLICA
     # ------------------------------------------------------------------
@@ -56,13 +124,388 @@ class ValidatorAgent:
                 filename,
             )
 
+        # 0) CACHE (contenuto + ruleset)
+        key: Optional[str] = None
+        if self._cache is not None:
+            key = self._cache.key(code, self._rules.fingerprint)
+            hit = self._cache.get(key)
+            if hit is not None:
+                ok, issues = hit
+                return self._result(
+                    ok=ok,
+                    issues=issues,
+                    filename=filename,
+                    goal=goal,
+                )
+
+        result = self._validate_uncached(code, filename, goal)
+        if key is not None:
+            self._cache.put(key, result["ok"], result["issues"])
+        return result
+
+    def validate_data(
+        self,
+        source: Any,
+        *,
+        kind: Optional[str] = None,
+        filename: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Valida un file di dati (JSON / TOML / YAML subset) in streaming.
+
+        Input:
+            source: path oppure stream testuale già aperto
+            kind: "json" | "toml" | "yaml"; default dall'estensione
+
+        JSON e YAML sono letti a chunk / righe in memoria costante; le
+        issue di sintassi riportano riga, colonna e offset.
+        """
+        from ice_ai.agents.domain.validator_data import (
+            DataError,
+            data_kind,
+            open_data,
+            validate_stream,
+        )
+
+        if isinstance(source, str):
+            filename = filename or source
+        kind = kind or data_kind(filename or "")
+        if kind is None:
+            return self._error(
+                "unsupported_data",
+                "Cannot infer data format; pass kind=.",
+                filename,
+            )
+
+        try:
+            if isinstance(source, str):
+                with open_data(source) as stream:
+                    info = validate_stream(kind, stream)
+            else:
+                info = validate_stream(kind, source)
+        except DataError as e:
+            result = self._result(
+                ok=False,
+                issues=[e.to_issue()],
+                filename=filename,
+                goal=None,
+            )
+        except (OSError, UnicodeDecodeError) as e:
+            return self._error("read_failed", str(e), filename)
+        else:
+            result = self._result(
+                ok=True,
+                issues=[],
+                filename=filename,
+                goal=None,
+            )
+            result["data"] = info
+
+        result["kind"] = kind
+        return result
+
+    def iter_validate_many(
+        self,
+        targets: Any,
+        *,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        sources: Optional[Mapping[str, str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Valida molti file su un process pool, restituendo i report
+        man mano che i chunk terminano (ordine non garantito).
+
+        Input: risultato di `ScannerAgent.scan`, descrittori di file
+        o path. Sorgenti Python e file di dati (JSON / TOML / YAML)
+        sono validati ciascuno col proprio validatore. Con la cache
+        attiva gli hit Python vengono risolti qui, chunk per chunk, e
+        solo i miss vanno ai worker. `sources` ({path: codice})
+        sostituisce la lettura da disco dei sorgenti indicati.
+
+        Il batch gira con le regole attive alla chiamata: una regola
+        disabilitata per budget durante il batch esce dalle chiamate
+        successive.
+        """
+        from ice_ai.agents.domain.validator_batch import (
+            Job,
+            iter_reports,
+            normalize_targets,
+            read_source,
+        )
+
+        sources = sources or {}
+        jobs = [
+            (path, sources.get(path)) for path in normalize_targets(targets)
+        ]
+        keys: Dict[str, str] = {}
+        # worker e agente in-process eseguono questo insieme di regole:
+        # le chiavi di cache seguono lui, non il fingerprint corrente
+        rules = self._rules.rules
+        fingerprint = self._rules.fingerprint
+
+        def resolve(job: Job) -> Union[Job, Dict[str, Any]]:
+            path, code = job
+            # i file di dati sono letti in streaming dai worker: niente
+            # hash dell'intero contenuto nel processo padre
+            if not path.endswith(".py"):
+                return job
+            if code is None:
+                try:
+                    code = read_source(path)
+                except (OSError, UnicodeDecodeError, SyntaxError) as e:
+                    return self._error("read_failed", str(e), path)
+
+            key = self._cache.key(code, fingerprint)
+            hit = self._cache.get(key)
+            if hit is not None:
+                ok, issues = hit
+                return self._result(
+                    ok=ok,
+                    issues=issues,
+                    filename=path,
+                    goal=None,
+                )
+            keys[path] = key
+            return path, code
+
+        reports = iter_reports(
+            jobs,
+            rules=rules,
+            workers=workers,
+            chunk_size=chunk_size,
+            timed=self._metrics is not None,
+            resolve=resolve if self._cache is not None else None,
+        )
+        for report in reports:
+            if self._metrics is not None:
+                # i worker misurano per report, qui si cumula; le regole
+                # oltre budget escono dalle chiamate successive (questo
+                # batch continua con `rules`)
+                self._apply_budget(self._metrics.record_report(report))
+                if not self._metrics.per_report:
+                    report.pop("rule_metrics", None)
+            key = keys.pop(report["filename"], None)
+            if key is not None and "error" not in report:
+                self._cache.put(key, report["ok"], report["issues"])
+            yield report
+
+    def validate_many(
+        self,
+        targets: Any,
+        *,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Come `iter_validate_many`, con report ordinati per path e
+        sommario aggregato (file falliti, issue per severità e regola).
+        """
+        from ice_ai.agents.domain.validator_batch import BatchSummary
+
+        summary = BatchSummary()
+        reports: List[Dict[str, Any]] = []
+        for report in self.iter_validate_many(
+            targets,
+            workers=workers,
+            chunk_size=chunk_size,
+        ):
+            summary.add(report)
+            reports.append(report)
+        reports.sort(key=lambda r: r["filename"] or "")
+
+        return {
+            "ok": summary.failed == 0,
+            "files": reports,
+            "summary": summary.to_dict(),
+        }
+
+    def validate_tree(
+        self,
+        root: str,
+        *,
+        patterns: Optional[List[str]] = None,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Scansiona `root` con ScannerAgent e valida i sorgenti trovati.
+        """
+        from ice_ai.agents.domain.scanner import ScannerAgent
+
+        scan = ScannerAgent().scan(root, patterns or [".py"])
+        if scan.get("ok") is False:
+            return scan
+
+        result = self.validate_many(
+            scan,
+            workers=workers,
+            chunk_size=chunk_size,
+        )
+        result["root"] = scan["root"]
+        result["scan_errors"] = scan["errors"]
+        return result
+
+    def validate_diff(
+        self,
+        changes: Any,
+        *,
+        root: str,
+        only_changed_lines: bool = False,
+        workers: Optional[int] = None,
+        sources: Optional[Mapping[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Valida solo i file toccati da un diff o da uno status GitAgent:
+        sorgenti Python e file di dati (JSON / TOML / YAML).
+
+        Input:
+            changes: `GitAgent.diff_files` / entry di `iter_diff`, oppure
+                `GitAgent.status`
+            root: radice del working tree (i path git sono relativi)
+            only_changed_lines: riporta solo le issue sulle righe dei
+                hunk (richiede un diff con hunk, idealmente context=0)
+            sources: {path assoluto: contenuto} del lato nuovo del diff
+                quando non è il working tree (revisione o index)
+        """
+        from ice_ai.agents.domain.validator_batch import BatchSummary
+        from ice_ai.agents.domain.validator_diff import (
+            changes_from_diff,
+            changes_from_status,
+            scope_issues,
+            validation_targets,
+        )
+
+        if isinstance(changes, dict) and "changed_files" in changes:
+            changed = changes_from_status(changes)
+        else:
+            changed = changes_from_diff(changes, scoped=only_changed_lines)
+        targets = validation_targets(changed, root, sources)
+
+        summary = BatchSummary()
+        reports: List[Dict[str, Any]] = []
+        for report in self.iter_validate_many(
+            list(targets),
+            workers=workers,
+            sources=sources,
+        ):
+            ranges = targets.get(report["filename"])
+            scoped = only_changed_lines and ranges is not None
+            if scoped and "error" not in report:
+                issues = scope_issues(report["issues"], ranges)
+                scoped_report = self._result(
+                    ok=self._is_ok(issues),
+                    issues=issues,
+                    filename=report["filename"],
+                    goal=report.get("goal"),
+                )
+                for extra in ("kind", "data"):
+                    if extra in report:
+                        scoped_report[extra] = report[extra]
+                report = scoped_report
+                report["changed_lines"] = ranges.to_list()
+            summary.add(report)
+            reports.append(report)
+        reports.sort(key=lambda r: r["filename"] or "")
+
+        return {
+            "ok": summary.failed == 0,
+            "root": root,
+            "scoped": only_changed_lines,
+            "changed": len(changed),
+            "files": reports,
+            "summary": summary.to_dict(),
+        }
+
+    def validate_changes(
+        self,
+        repo: str,
+        *,
+        rev: Optional[str] = None,
+        staged: bool = False,
+        only_changed_lines: bool = False,
+        include_untracked: bool = True,
+        workers: Optional[int] = None,
+        git: Any = None,
+    ) -> Dict[str, Any]:
+        """
+        Pre-merge: interroga GitAgent e valida solo ciò che è cambiato
+        (working tree, index con staged=True, o `rev` es. "main...HEAD").
+
+        Viene validato il lato nuovo del diff: il working tree, oppure
+        i blob dell'index / della revisione di destra del range, così
+        che contenuto e range dei hunk coincidano.
+        I file non tracciati del working tree sono inclusi per intero.
+        """
+        from ice_ai.agents.domain.git import GitAgent
+        from ice_ai.agents.domain.validator_data import validatable
+        from ice_ai.agents.domain.validator_diff import (
+            changes_from_diff,
+            changes_from_status,
+            new_side,
+        )
+
+        git = git or GitAgent()
+        top = git.toplevel(repo)
+        if not top.get("ok"):
+            return top
+        root = top["root"]
+
+        if only_changed_lines:
+            diff = git.diff_files(repo, rev=rev, staged=staged, context=0)
+        else:
+            diff = git.diff_files(
+                repo, rev=rev, staged=staged, name_status=True
+            )
+        if not diff.get("ok"):
+            return diff
+
+        files = list(diff["files"])
+        if include_untracked and rev is None and not staged:
+            status = git.status(repo)
+            if not status.get("ok"):
+                return status
+            untracked = changes_from_status(status, untracked_only=True)
+            files += [{"path": path, "status": "A"} for path in untracked]
+
+        sources: Optional[Dict[str, str]] = None
+        side = new_side(rev, staged)
+        if side is not None:
+            sources = {}
+            for rel in changes_from_diff(files, scoped=False):
+                if not validatable(rel):
+                    continue
+                blob = git.show_file(
+                    repo, rel, rev=side or "HEAD", staged=side == ""
+                )
+                if not blob.get("ok"):
+                    return blob
+                sources[os.path.join(root, rel)] = blob["content"]
+
+        result = self.validate_diff(
+            files,
+            root=root,
+            only_changed_lines=only_changed_lines,
+            workers=workers,
+            sources=sources,
+        )
+        result["repo"] = repo
+        result["rev"] = rev
+        return result
+
+    def _validate_uncached(
+        self,
+        code: str,
+        filename: Optional[str],
+        goal: Optional[str],
+    ) -> Dict[str, Any]:
         issues: List[Dict[str, Any]] = []
 
         # 1) SINTASSI
-        syntax_issues = self._validate_syntax(code)
+        tree, syntax_issues = self._validate_syntax(code)
         issues.extend(syntax_issues)
 
-        if any(i["severity"] == "error" for i in issues):
+        if tree is None or any(i["severity"] == "error" for i in issues):
             return self._result(
                 ok=False,
                 issues=issues,
@@ -71,62 +514,84 @@ class ValidatorAgent:
             )
 
         # 2) SEMANTICA BASE (rule-based)
-        semantic_issues = self._validate_semantic(code)
+        timings = {} if self._metrics is not None else None
+        semantic_issues = self._validate_semantic(code, tree, timings)
         issues.extend(semantic_issues)
 
-        ok = not any(i["severity"] in {"error", "warning"} for i in issues)
-
-        return self._result(
-            ok=ok,
+        result = self._result(
+            ok=self._is_ok(issues),
             issues=issues,
             filename=filename,
             goal=goal,
         )
+        if timings is not None:
+            self._apply_budget(self._metrics.record(timings))
+            if self._metrics.per_report:
+                result["rule_metrics"] = RuleMetrics.report_detail(timings)
+        return result
+
+    def _apply_budget(self, flagged: List[str]) -> None:
+        # una regola disabilitata esce anche dal fingerprint: i risultati
+        # in cache calcolati con lei non vengono riusati
+        if flagged and self._metrics.disable_slow:
+            for name in flagged:
+                self._rules.disable(name)
+
+    @staticmethod
+    def _is_ok(issues: List[Dict[str, Any]]) -> bool:
+        return not any(i["severity"] in {"error", "warning"} for i in issues)
 
     # ------------------------------------------------------------------
     # VALIDATION STEPS
     # ------------------------------------------------------------------
 
-    def _validate_syntax(self, code: str) -> List[Dict[str, Any]]:
+    def _validate_syntax(
+        self,
+        code: str,
+    ) -> Tuple[Optional[ast.AST], List[Dict[str, Any]]]:
+        """
+        Parsing AST. L'albero viene riusato dalla fase semantica.
+        """
         try:
-            ast.parse(code)
-            return []
-        except SyntaxError as e:
-            return [
+            return ast.parse(code), []
+        except (SyntaxError, ValueError) as e:
+            return None, [
                 {
                     "type": "syntax",
                     "severity": "error",
                     "message": str(e),
-                    "line": e.lineno,
-                    "column": e.offset,
+                    "line": getattr(e, "lineno", None),
+                    "column": getattr(e, "offset", None),
                 }
             ]
-
-    def _validate_semantic(self, code: str) -> List[Dict[str, Any]]:
-        """
-        Heuristiche semplici, deterministic, NO LLM.
-        """
-        issues: List[Dict[str, Any]] = []
-
-        if "print(" in code:
-            issues.append(
+        except (RecursionError, MemoryError):
+            # annidamento oltre il limite del parser C (es. migliaia di
+            # operandi in un'unica espressione); oltre una certa
+            # profondità il parser lo segnala come MemoryError
+            return None, [
                 {
-                    "type": "style",
-                    "severity": "warning",
-                    "message": "Usage of print() detected (consider logging).",
+                    "type": "syntax",
+                    "severity": "error",
+                    "message": "Code too deeply nested to parse.",
+                    "line": None,
+                    "column": None,
                 }
-            )
+            ]
 
-        if "TODO" in code or "FIXME" in code:
-            issues.append(
-                {
-                    "type": "maintainability",
-                    "severity": "info",
-                    "message": "TODO/FIXME markers found in code.",
-                }
-            )
+    def _validate_semantic(
+        self,
+        code: str,
+        tree: ast.AST,
+        timings: Optional[Dict[str, List[float]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Heuristiche semplici, deterministic, NO LLM.
 
-        return issues
+        Regole dispatchate per tipo di nodo in una sola visita; i
+        commenti passano da `tokenize`, quindi stringhe e codice non
+        generano falsi positivi.
+        """
+        return self._rules.run(tree, code, timings)
 
     # ------------------------------------------------------------------
     # RESULT BUILDERS
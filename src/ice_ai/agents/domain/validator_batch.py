@@ -0,0 +1,254 @@
+"""
+Validator Batch — validazione di molti file su un process pool.
+
+RESPONSABILITÀ:
+- normalizzare input (output ScannerAgent, descrittori, path)
+- distribuire i file a chunk su processi (ast.parse è CPU-bound:
+  il GIL impedisce ai thread di aiutare)
+- restituire i report man mano che i chunk terminano
+- aggregare un sommario di progetto
+
+NON FA:
+- scansione del filesystem (vedi ScannerAgent)
+- caching (il ValidatorAgent chiamante risolve gli hit via `resolve`,
+  un job alla volta, prima che entri in un chunk)
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import tokenize
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from ice_ai.agents.domain.validator import ValidatorAgent
+from ice_ai.agents.domain.validator_data import data_kind, validatable
+from ice_ai.agents.domain.validator_metrics import RuleMetrics
+from ice_ai.agents.domain.validator_rules import Rule
+
+
+# Sotto questa soglia il costo di avvio del pool supera il guadagno
+POOL_MIN_FILES = 32
+
+# Chunk in volo per worker: tiene il pool occupato senza caricare
+# in memoria tutti i job
+INFLIGHT_PER_WORKER = 2
+
+# (path, codice già letto oppure None)
+Job = Tuple[str, Optional[str]]
+
+# Job da inviare ai worker, oppure il report se già risolto (es. hit)
+Resolve = Callable[[Job], Union[Job, Dict[str, Any]]]
+
+_worker: Optional[ValidatorAgent] = None
+
+
+# ============================================================
+# INPUT
+# ============================================================
+
+def normalize_targets(targets: Any) -> List[str]:
+    """
+    Path da validare (sorgenti Python e file di dati), a partire da:
+    - risultato di `ScannerAgent.scan` (dict con "files")
+    - sequenza di descrittori ScannerAgent (dict con "path" / "type")
+    - sequenza di path (str / Path)
+    """
+    if isinstance(targets, Mapping):
+        targets = targets.get("files", [])
+
+    paths: List[str] = []
+    for item in targets:
+        if isinstance(item, Mapping):
+            kind = item.get("type")
+            path = str(item["path"])
+            if kind is not None and kind not in ("python", "data"):
+                continue
+            if not validatable(path):
+                continue
+            paths.append(path)
+        else:
+            paths.append(os.fspath(item))
+    return paths
+
+
+def read_source(path: str) -> str:
+    """
+    Legge un sorgente Python rispettando il cookie di encoding (PEP 263).
+    """
+    with tokenize.open(path) as fh:
+        return fh.read()
+
+
+# ============================================================
+# WORKER
+# ============================================================
+
+def _make_agent(
+    rules: Optional[Sequence[Rule]],
+    timed: bool,
+) -> ValidatorAgent:
+    # con `timed` ogni report porta il dettaglio per regola: il
+    # chiamante lo cumula nelle proprie metriche
+    metrics = RuleMetrics(per_report=True) if timed else None
+    return ValidatorAgent(rules, metrics=metrics)
+
+
+def _init_worker(rules: Optional[Sequence[Rule]], timed: bool) -> None:
+    global _worker
+    _worker = _make_agent(rules, timed)
+
+
+def _validate_job(agent: ValidatorAgent, job: Job) -> Dict[str, Any]:
+    path, code = job
+    if data_kind(path) is not None:
+        if code is None:
+            return agent.validate_data(path)
+        # contenuto già letto (es. blob git di una revisione)
+        return agent.validate_data(io.StringIO(code), filename=path)
+    if code is None:
+        try:
+            code = read_source(path)
+        except (OSError, UnicodeDecodeError, SyntaxError) as e:
+            return agent._error("read_failed", str(e), path)
+    return agent.validate(code, filename=path)
+
+
+def _validate_chunk(jobs: List[Job]) -> List[Dict[str, Any]]:
+    agent = _worker if _worker is not None else ValidatorAgent()
+    return [_validate_job(agent, job) for job in jobs]
+
+
+# ============================================================
+# DISPATCH
+# ============================================================
+
+def iter_reports(
+    jobs: Sequence[Job],
+    *,
+    rules: Optional[Sequence[Rule]] = None,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    timed: bool = False,
+    resolve: Optional[Resolve] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Report per file, nell'ordine di completamento dei chunk.
+
+    Input piccoli (o workers=1) restano nel processo corrente.
+    Con `timed` i report includono `rule_metrics`.
+    `resolve` è chiamata su ogni job solo quando il suo chunk sta per
+    partire: ciò che legge resta in memoria per i soli chunk in volo.
+    """
+    items = _resolved(jobs, resolve)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(jobs) < POOL_MIN_FILES:
+        agent = _make_agent(rules, timed)
+        for item in items:
+            if isinstance(item, dict):
+                yield item
+            else:
+                yield _validate_job(agent, item)
+        return
+
+    # alcuni chunk per worker: bilanciamento senza moltiplicare l'IPC
+    chunk_size = chunk_size or max(1, min(256, len(jobs) // (workers * 8)))
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(list(rules) if rules is not None else None, timed),
+    ) as pool:
+        pending = set()
+        chunk: List[Job] = []
+        for item in items:
+            if isinstance(item, dict):
+                yield item
+                continue
+            chunk.append(item)
+            if len(chunk) < chunk_size:
+                continue
+            pending.add(pool.submit(_validate_chunk, chunk))
+            chunk = []
+            if len(pending) >= workers * INFLIGHT_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        if chunk:
+            pending.add(pool.submit(_validate_chunk, chunk))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+def _resolved(
+    jobs: Iterable[Job],
+    resolve: Optional[Resolve],
+) -> Iterator[Union[Job, Dict[str, Any]]]:
+    for job in jobs:
+        yield job if resolve is None else resolve(job)
+
+
+# ============================================================
+# SUMMARY
+# ============================================================
+
+class BatchSummary:
+    """
+    Aggregato incrementale dei report (nessun report trattenuto).
+    """
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.failed = 0
+        self.unreadable = 0
+        self.empty = 0
+        self.severities: Dict[str, int] = {}
+        self.rules: Dict[str, int] = {}
+
+    def add(self, report: Dict[str, Any]) -> None:
+        self.files += 1
+        error = report.get("error")
+        if error == "empty_code":
+            # in un progetto un file vuoto (es. __init__.py) è legittimo
+            self.empty += 1
+        elif not report.get("ok"):
+            self.failed += 1
+        if error == "read_failed":
+            self.unreadable += 1
+        for issue in report.get("issues", []):
+            severity = issue.get("severity", "info")
+            self.severities[severity] = self.severities.get(severity, 0) + 1
+            rule = issue.get("rule") or issue.get("type", "unknown")
+            self.rules[rule] = self.rules.get(rule, 0) + 1
+
+    def extend(self, reports: Iterable[Dict[str, Any]]) -> "BatchSummary":
+        for report in reports:
+            self.add(report)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "files": self.files,
+            "failed": self.failed,
+            "unreadable": self.unreadable,
+            "empty": self.empty,
+            "errors": self.severities.get("error", 0),
+            "warnings": self.severities.get("warning", 0),
+            "infos": self.severities.get("info", 0),
+            "rules": dict(sorted(self.rules.items())),
+        }
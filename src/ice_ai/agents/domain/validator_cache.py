@@ -0,0 +1,299 @@
+"""
+Validator Cache — risultati di validazione indicizzati per contenuto.
+
+RESPONSABILITÀ:
+- chiave = hash del contenuto + fingerprint del ruleset
+- tier in memoria LRU (hit in microsecondi)
+- tier su disco opzionale (SQLite) con eviction per dimensione
+- contatori hit / miss / eviction per tier
+
+NON FA:
+- invalidazione per path o mtime (il contenuto è la chiave)
+- validazione (memorizza solo issue già calcolate)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# (ok, issues)
+Entry = Tuple[bool, List[Dict[str, Any]]]
+
+# Un hit su disco aggiorna `accessed` solo se più vecchio di così (s)...
+TOUCH_INTERVAL = 60.0
+# ...e gli aggiornamenti vengono scritti insieme, al put successivo o
+# ogni TOUCH_BATCH hit
+TOUCH_BATCH = 256
+
+
+class ValidationCache:
+    """
+    Cache a due livelli: LRU in memoria davanti a SQLite opzionale.
+
+    Un hit su disco viene promosso in memoria. Il tier su disco tiene
+    la dimensione totale dei valori sotto `max_bytes` eliminando le
+    voci lette meno di recente.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 4096,
+        path: Optional[str] = None,
+        max_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.max_entries = max_entries
+        self.path = path
+        self.max_bytes = max_bytes
+
+        self._memory: "OrderedDict[str, Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_bytes = 0
+        self._touched: Dict[str, float] = {}
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+        if path is not None:
+            self._open(path)
+
+    # ------------------------------------------------------------------
+    # CHIAVI
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def key(code: str, fingerprint: str) -> str:
+        h = hashlib.blake2b(digest_size=20)
+        h.update(fingerprint.encode("utf-8"))
+        h.update(b"\0")
+        h.update(code.encode("utf-8", "surrogatepass"))
+        return h.hexdigest()
+
+    # ------------------------------------------------------------------
+    # GET / PUT
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return _copy(entry)
+
+            entry = self._disk_get(key)
+            if entry is not None:
+                self.disk_hits += 1
+                self._remember(key, entry)
+                return _copy(entry)
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, ok: bool, issues: List[Dict[str, Any]]) -> None:
+        entry: Entry = (ok, [dict(issue) for issue in issues])
+        with self._lock:
+            self.stores += 1
+            self._remember(key, entry)
+            self._disk_put(key, entry)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                with self._db:
+                    self._db.execute("DELETE FROM results")
+                self._touched.clear()
+                self._disk_bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                with self._db:
+                    self._disk_touch()
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        if self._db is not None:
+            with self._lock:
+                self._disk_bytes = self._disk_usage()
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (
+                round((self.hits + self.disk_hits) / lookups, 4)
+                if lookups else 0.0
+            ),
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+            "entries": len(self._memory),
+            "disk_bytes": self._disk_bytes,
+        }
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    # ------------------------------------------------------------------
+    # MEMORIA
+    # ------------------------------------------------------------------
+
+    def _remember(self, key: str, entry: Entry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    # ------------------------------------------------------------------
+    # DISCO (SQLite)
+    # ------------------------------------------------------------------
+
+    def _open(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        with db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS results_accessed"
+                " ON results(accessed)"
+            )
+            # totale mantenuto da trigger: condiviso (e coerente) fra i
+            # processi che usano lo stesso file
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS usage ("
+                " id INTEGER PRIMARY KEY CHECK (id = 0),"
+                " bytes INTEGER NOT NULL)"
+            )
+            db.execute(
+                "INSERT OR IGNORE INTO usage"
+                " SELECT 0, COALESCE(SUM(size), 0) FROM results"
+            )
+            db.execute(
+                "CREATE TRIGGER IF NOT EXISTS results_insert"
+                " AFTER INSERT ON results BEGIN"
+                " UPDATE usage SET bytes = bytes + NEW.size WHERE id = 0;"
+                " END"
+            )
+            db.execute(
+                "CREATE TRIGGER IF NOT EXISTS results_delete"
+                " AFTER DELETE ON results BEGIN"
+                " UPDATE usage SET bytes = bytes - OLD.size WHERE id = 0;"
+                " END"
+            )
+            db.execute(
+                "CREATE TRIGGER IF NOT EXISTS results_update"
+                " AFTER UPDATE OF size ON results BEGIN"
+                " UPDATE usage SET bytes = bytes - OLD.size + NEW.size"
+                " WHERE id = 0;"
+                " END"
+            )
+        self._db = db
+        self._disk_bytes = self._disk_usage()
+
+    def _disk_usage(self) -> int:
+        row = self._db.execute(
+            "SELECT bytes FROM usage WHERE id = 0"
+        ).fetchone()
+        return int(row[0]) if row is not None else 0
+
+    def _disk_get(self, key: str) -> Optional[Entry]:
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT value, accessed FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        # niente scrittura per hit: l'ordine LRU su disco ha grana
+        # TOUCH_INTERVAL e i timestamp vengono scritti in blocco
+        now = time.time()
+        if now - row[1] >= TOUCH_INTERVAL:
+            self._touched[key] = now
+            if len(self._touched) >= TOUCH_BATCH:
+                with self._db:
+                    self._disk_touch()
+        data = json.loads(row[0])
+        return bool(data["ok"]), data["issues"]
+
+    def _disk_touch(self) -> None:
+        # da chiamare dentro una transazione
+        if self._touched:
+            self._db.executemany(
+                "UPDATE results SET accessed = ? WHERE key = ?",
+                [(at, key) for key, at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _disk_put(self, key: str, entry: Entry) -> None:
+        if self._db is None:
+            return
+        value = json.dumps({"ok": entry[0], "issues": entry[1]})
+        size = len(value)
+        if size > self.max_bytes:
+            return
+
+        with self._db:
+            self._touched.pop(key, None)
+            self._disk_touch()
+            self._db.execute(
+                "INSERT INTO results VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET"
+                " value = excluded.value,"
+                " size = excluded.size,"
+                " accessed = excluded.accessed",
+                (key, value, size, time.time()),
+            )
+            # letto dopo l'INSERT: la transazione ha già il lock di
+            # scrittura, nessun altro processo può cambiare il totale
+            self._disk_bytes = self._disk_usage()
+            if self._disk_bytes > self.max_bytes:
+                self._disk_evict()
+
+    def _disk_evict(self) -> None:
+        # libera fino al 90% del limite, per non ripetere a ogni put
+        target = int(self.max_bytes * 0.9)
+        rows = self._db.execute(
+            "SELECT key, size FROM results ORDER BY accessed"
+        )
+        victims: List[Tuple[str]] = []
+        for key, size in rows:
+            if self._disk_bytes <= target:
+                break
+            victims.append((key,))
+            self._disk_bytes -= int(size)
+        self._db.executemany("DELETE FROM results WHERE key = ?", victims)
+        self.disk_evictions += len(victims)
+
+
+def _copy(entry: Entry) -> Entry:
+    # copia superficiale delle issue: il chiamante può modificarle
+    return entry[0], [dict(issue) for issue in entry[1]]
@@ -0,0 +1,564 @@
+"""
+Validator Data — validazione streaming di file di dati (JSON / TOML / YAML).
+
+RESPONSABILITÀ:
+- JSON: tokenizer incrementale a chunk, memoria costante (a parte la
+  pila di annidamento e il token più lungo), offset di errore precisi
+- TOML: `tomllib` (stdlib), posizione dell'errore estratta dal messaggio
+- YAML: controllo riga per riga di un sottoinsieme (indentazione, tab,
+  block scalar, parentesi / quote bilanciate)
+
+NON FA:
+- costruire oggetti Python dai dati (solo validazione)
+- YAML completo (anchor, tag, chiavi complesse non sono verificati)
+"""
+
+from __future__ import annotations
+
+import io
+import re
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+try:  # stdlib da Python 3.11
+    import tomllib
+except ImportError:  # pragma: no cover - dipende dall'ambiente
+    tomllib = None
+
+
+CHUNK_SIZE = 64 * 1024
+
+DATA_EXTENSIONS = {
+    ".json": "json",
+    ".toml": "toml",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+}
+
+
+class DataError(Exception):
+    """
+    Errore di validazione con posizione (riga / colonna 1-based,
+    offset 0-based in caratteri).
+    """
+
+    def __init__(
+        self,
+        message: str,
+        line: Optional[int],
+        column: Optional[int],
+        offset: Optional[int] = None,
+    ) -> None:
+        super().__init__(message)
+        self.message = message
+        self.line = line
+        self.column = column
+        self.offset = offset
+
+    def to_issue(self) -> Dict[str, Any]:
+        return {
+            "type": "syntax",
+            "severity": "error",
+            "message": self.message,
+            "line": self.line,
+            "column": self.column,
+            "offset": self.offset,
+        }
+
+
+def data_kind(path: str) -> Optional[str]:
+    for ext, kind in DATA_EXTENSIONS.items():
+        if path.endswith(ext):
+            return kind
+    return None
+
+
+def validatable(path: str) -> bool:
+    """
+    Sorgente Python o file di dati con un validatore.
+    """
+    return path.endswith(".py") or data_kind(path) is not None
+
+
+# ============================================================
+# JSON (streaming)
+# ============================================================
+
+_WS_RE = re.compile(r"[ \t\n\r]+")
+# corpo di una stringa (dopo il '"' di apertura), fino al primo
+# carattere che non ne fa parte
+_STRING_BODY_RE = re.compile(
+    r'(?:[^"\\\x00-\x1f]+|\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4}))*'
+)
+_NUMBER_RE = re.compile(
+    r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?"
+)
+_NUMBER_CHARS_RE = re.compile(r"[-+.eE0-9]+")
+_LITERALS = ("true", "false", "null")
+
+# Sequenze di membri / elementi scalari chiuse da ",": consumate da una
+# sola regex (in C) invece che token per token
+_WS = r"[ \t\n\r]*"
+# un carattere per iterazione: nessuna ambiguità, quindi nessun
+# backtracking esponenziale quando la sequenza non chiude
+_STRING = r'"(?:[^"\\\x00-\x1f]|\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4}))*"'
+_SCALAR = (
+    rf"(?:{_STRING}|-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?"
+    r"|true|false|null)"
+)
+_MEMBERS_RE = re.compile(rf"(?:{_WS}{_STRING}{_WS}:{_WS}{_SCALAR}{_WS},)+")
+_ITEMS_RE = re.compile(rf"(?:{_WS}{_SCALAR}{_WS},)+")
+
+# Stati del parser
+(
+    _VALUE,            # atteso un valore
+    _VALUE_OR_END,     # dopo "[": valore o "]"
+    _KEY_OR_END,       # dopo "{": chiave o "}"
+    _KEY,              # dopo "," in un oggetto
+    _COLON,
+    _COMMA_OR_END,
+    _DONE,
+) = range(7)
+
+_EXPECTED = {
+    _VALUE: "Expected value",
+    _VALUE_OR_END: "Expected value or ']'",
+    _KEY_OR_END: "Expected string key or '}'",
+    _KEY: "Expected string key",
+    _COLON: "Expected ':'",
+    _COMMA_OR_END: "Expected ',' or closing bracket",
+    _DONE: "Extra data after JSON value",
+}
+
+
+class JSONStreamValidator:
+    """
+    Validatore JSON incrementale: `feed(chunk)` più volte, poi `close()`.
+
+    Ogni token è riconosciuto con una regex ancorata; un token che tocca
+    la fine del buffer viene rimandato al chunk successivo, quindi la
+    memoria è limitata dal token più lungo, non dal file. Le stringhe
+    fanno eccezione: il corpo già validato viene scartato e la scansione
+    riprende dal punto raggiunto, così una stringa lunga costa O(n).
+    """
+
+    def __init__(self) -> None:
+        self._buf = ""
+        self._base = 0          # offset assoluto di _buf[0]
+        self._line = 1
+        self._line_start = 0    # offset assoluto dell'inizio riga
+        self._stack: List[str] = []
+        self._state = _VALUE
+        # stato all'apertura della stringa in corso (None = fuori) e
+        # offset assoluto del suo '"'
+        self._string: Optional[int] = None
+        self._string_start = 0
+        self.max_depth = 0
+
+    def feed(self, chunk: str) -> None:
+        self._buf = self._buf + chunk if self._buf else chunk
+        self._scan(eof=False)
+
+    def close(self) -> None:
+        self._scan(eof=True)
+        if self._string is not None:
+            raise self._error(
+                "Unterminated string", self._string_start - self._base
+            )
+        if self._state != _DONE:
+            raise self._error("Unexpected end of data", len(self._buf))
+
+    # ------------------------------------------------------------------
+    # SCANNER
+    # ------------------------------------------------------------------
+
+    def _error(self, message: str, pos: int) -> DataError:
+        offset = self._base + pos
+        return DataError(
+            message,
+            self._line,
+            offset - self._line_start + 1,
+            offset,
+        )
+
+    def _unexpected(self, pos: int) -> DataError:
+        return self._error(_EXPECTED[self._state], pos)
+
+    def _scan(self, *, eof: bool) -> None:
+        buf = self._buf
+        end = len(buf)
+        pos = 0
+
+        stack = self._stack
+        while pos < end:
+            if self._string is not None:
+                stop = _STRING_BODY_RE.match(buf, pos).end()
+                if stop == end or (
+                    buf[stop] == "\\" and end - stop < 6 and not eof
+                ):
+                    if eof and stop == end:
+                        raise self._error(
+                            "Unterminated string",
+                            self._string_start - self._base,
+                        )
+                    # il corpo fino a `stop` è valido: non viene riletto,
+                    # resta solo un eventuale escape incompleto
+                    pos = stop
+                    break
+                if buf[stop] == "\\":
+                    raise self._error("Invalid escape in string", stop)
+                if buf[stop] != '"':
+                    raise self._error(
+                        "Invalid control character in string", stop
+                    )
+                state, self._string = self._string, None
+                if state in (_KEY_OR_END, _KEY):
+                    self._state = _COLON
+                else:
+                    self._value_done()
+                pos = stop + 1
+                continue
+
+            ch = buf[pos]
+            state = self._state
+
+            run = None
+            if state == _KEY or state == _KEY_OR_END:
+                run = _MEMBERS_RE.match(buf, pos)
+            elif (state == _VALUE or state == _VALUE_OR_END) and (
+                stack and stack[-1] == "["
+            ):
+                run = _ITEMS_RE.match(buf, pos)
+            if run is not None:
+                stop = run.end()
+                self._advance_lines(buf, pos, stop)
+                self._state = _KEY if state in (_KEY, _KEY_OR_END) else _VALUE
+                pos = stop
+                continue
+
+            if ch in " \t\n\r":
+                stop = _WS_RE.match(buf, pos).end()
+                self._advance_lines(buf, pos, stop)
+                pos = stop
+                continue
+
+            if ch == '"':
+                if state not in (_KEY_OR_END, _KEY, _VALUE, _VALUE_OR_END):
+                    raise self._unexpected(pos)
+                self._string = state
+                self._string_start = self._base + pos
+                pos += 1
+                continue
+
+            if ch == "{" or ch == "[":
+                if state not in (_VALUE, _VALUE_OR_END):
+                    raise self._unexpected(pos)
+                self._stack.append(ch)
+                if len(self._stack) > self.max_depth:
+                    self.max_depth = len(self._stack)
+                self._state = _KEY_OR_END if ch == "{" else _VALUE_OR_END
+                pos += 1
+                continue
+
+            if ch == "}" or ch == "]":
+                opener = "{" if ch == "}" else "["
+                empty = _KEY_OR_END if ch == "}" else _VALUE_OR_END
+                if state != _COMMA_OR_END and state != empty:
+                    raise self._unexpected(pos)
+                if self._stack[-1] != opener:
+                    raise self._error(f"Mismatched '{ch}'", pos)
+                self._stack.pop()
+                self._value_done()
+                pos += 1
+                continue
+
+            if ch == ":":
+                if state != _COLON:
+                    raise self._unexpected(pos)
+                self._state = _VALUE
+                pos += 1
+                continue
+
+            if ch == ",":
+                if state != _COMMA_OR_END:
+                    raise self._unexpected(pos)
+                self._state = _KEY if self._stack[-1] == "{" else _VALUE
+                pos += 1
+                continue
+
+            # --- numeri e letterali ---
+            if state not in (_VALUE, _VALUE_OR_END):
+                raise self._unexpected(pos)
+
+            if ch == "-" or "0" <= ch <= "9":
+                # estensione del token, poi verifica della grammatica
+                stop = _NUMBER_CHARS_RE.match(buf, pos).end()
+                if stop == end and not eof:
+                    break
+                if _NUMBER_RE.fullmatch(buf, pos, stop) is None:
+                    raise self._error("Invalid number", pos)
+                self._value_done()
+                pos = stop
+                continue
+
+            for literal in _LITERALS:
+                if buf.startswith(literal, pos):
+                    self._value_done()
+                    pos += len(literal)
+                    break
+            else:
+                rest = buf[pos:pos + 5]
+                partial = any(lit.startswith(rest) for lit in _LITERALS)
+                if partial and not eof and pos + len(rest) == end:
+                    break
+                raise self._error(f"Unexpected character {ch!r}", pos)
+
+        # conserva solo la coda non consumata (token incompleto)
+        self._base += pos
+        self._buf = buf[pos:]
+
+    def _advance_lines(self, buf: str, start: int, stop: int) -> None:
+        newlines = buf.count("\n", start, stop)
+        if newlines:
+            self._line += newlines
+            self._line_start = self._base + buf.rfind("\n", start, stop) + 1
+
+    def _value_done(self) -> None:
+        self._state = _COMMA_OR_END if self._stack else _DONE
+
+
+def validate_json_stream(
+    stream: TextIO,
+    *,
+    chunk_size: int = CHUNK_SIZE,
+) -> Dict[str, Any]:
+    validator = JSONStreamValidator()
+    for chunk in _chunks(stream, chunk_size):
+        validator.feed(chunk)
+    validator.close()
+    return {"max_depth": validator.max_depth}
+
+
+# ============================================================
+# TOML
+# ============================================================
+
+_TOML_POS_RE = re.compile(r"\(at line (\d+), column (\d+)\)")
+
+
+def validate_toml(stream: Any) -> Dict[str, Any]:
+    """
+    TOML via `tomllib`. Il formato non è streamabile (tabelle definibili
+    in qualunque punto): il documento viene letto per intero.
+    """
+    if tomllib is None:
+        raise DataError("TOML validation requires Python 3.11+", None, None)
+
+    text = stream.read()
+    if isinstance(text, bytes):
+        text = text.decode("utf-8")
+    try:
+        doc = tomllib.loads(text)
+    except tomllib.TOMLDecodeError as e:
+        match = _TOML_POS_RE.search(str(e))
+        message = _TOML_POS_RE.sub("", str(e)).strip()
+        if match is None:
+            raise DataError(message, None, None)
+        raise DataError(message, int(match.group(1)), int(match.group(2)))
+    return {"tables": len(doc)}
+
+
+# ============================================================
+# YAML (subset, line-oriented)
+# ============================================================
+
+_YAML_KEY_RE = re.compile(
+    r"""^(?:"(?:[^"\\]|\\.)*"|'(?:[^']|'')*'|[^\s#'"{}\[\],&*!|>%@`][^#]*?)"""
+    r"""\s*:(?:\s|$)"""
+)
+_BLOCK_SCALAR_RE = re.compile(r"[|>][+-]?[0-9]?[+-]?$")
+# proprietà di nodo in testa al valore: anchor (&a) e tag (!t, !!map)
+_NODE_PROPS_RE = re.compile(r"(?:(?:&[^\s,\[\]{}]+|![^\s,\[\]{}]*)(?:\s+|$))+")
+
+
+def validate_yaml_lines(lines: Iterator[str]) -> Dict[str, Any]:
+    """
+    Controlla un sottoinsieme YAML riga per riga, in memoria costante
+    (pila di indentazione a parte).
+
+    Verifiche: tab nell'indentazione, indentazione coerente con i
+    livelli aperti, quote chiuse sulla riga, parentesi flow bilanciate
+    anche su più righe. Block scalar (`|` / `>`) e continuazioni di
+    scalari plain (righe più indentate) vengono saltati; anchor e tag
+    davanti a un valore sono ignorati.
+    """
+    indents: List[int] = [0]
+    skip_deeper: Optional[int] = None    # block scalar / continuazione
+    plain = False                        # skip di uno scalare plain
+    opened = False                       # riga precedente apre un blocco
+    flow_depth = 0
+    documents = 1
+    content_lines = 0                    # righe di contenuto nel documento
+    lineno = 0
+
+    for lineno, raw in enumerate(lines, start=1):
+        line = raw.rstrip("\r\n")
+        stripped = line.lstrip(" ")
+        indent = len(line) - len(stripped)
+
+        if not stripped.strip():
+            continue
+        if skip_deeper is not None:
+            if indent > skip_deeper:
+                if plain and _YAML_KEY_RE.match(stripped):
+                    raise DataError(
+                        "Mapping values are not allowed here",
+                        lineno,
+                        indent + 1,
+                    )
+                continue
+            skip_deeper = None
+        if stripped.startswith("#"):
+            continue
+        if stripped.startswith("\t"):
+            raise DataError("Tab character in indentation", lineno, indent + 1)
+        if indent == 0 and stripped.rstrip() in ("---", "..."):
+            indents, opened, flow_depth = [0], False, 0
+            if stripped.startswith("---") and content_lines:
+                documents += 1
+            content_lines = 0
+            continue
+        if indent == 0 and stripped.startswith("%"):
+            continue
+
+        content = _strip_comment(stripped, lineno, indent)
+
+        if flow_depth > 0:
+            flow_depth = _flow_balance(content, flow_depth, lineno, indent)
+            continue
+
+        # --- indentazione ---
+        scalar_ok = opened or content_lines == 0
+        content_lines += 1
+        if indent > indents[-1]:
+            if not opened:
+                raise DataError("Unexpected indentation", lineno, indent + 1)
+            indents.append(indent)
+        else:
+            while indent < indents[-1]:
+                indents.pop()
+            if indent != indents[-1]:
+                raise DataError(
+                    "Indentation does not match any outer level",
+                    lineno,
+                    indent + 1,
+                )
+
+        # --- elementi di lista: "- - x", "- key: v" ---
+        body = content
+        item_indent = indent
+        while body == "-" or body.startswith("- "):
+            body = body[1:].lstrip(" ")
+            item_indent = indent + (len(content) - len(body))
+        if body and item_indent > indent:
+            # il contenuto dell'elemento apre un livello implicito
+            indents.append(item_indent)
+
+        opened = not body
+        if not body:
+            continue
+
+        key = _YAML_KEY_RE.match(body)
+        value = body[key.end():].strip() if key else body
+        level = item_indent if key else indent
+        if key is None and item_indent == indent and not scalar_ok:
+            raise DataError(
+                "Expected 'key: value' or '- item'", lineno, indent + 1
+            )
+
+        # "key: &anchor" / "key: !!map" / "- &a": solo proprietà, il
+        # nodo è il blocco che segue (come un valore vuoto)
+        props = _NODE_PROPS_RE.match(value)
+        if props is not None:
+            value = value[props.end():]
+
+        first = value[:1]
+        if not value:
+            opened = key is not None or props is not None
+        elif first in "|>" and _BLOCK_SCALAR_RE.match(value):
+            skip_deeper, plain = level, False
+        elif first in "[{":
+            flow_depth = _flow_balance(value, 0, lineno, indent)
+        else:
+            # scalare plain: righe più indentate sono continuazioni
+            skip_deeper, plain = level, True
+
+    if flow_depth > 0:
+        raise DataError("Unclosed flow collection", lineno, None)
+    return {"documents": documents, "lines": lineno}
+
+
+def _strip_comment(text: str, lineno: int, indent: int) -> str:
+    """
+    Rimuove un commento finale e verifica che le quote siano chiuse.
+    """
+    quote: Optional[str] = None
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if quote is None:
+            if ch in "\"'" and (i == 0 or text[i - 1] in " :[{,-"):
+                quote = ch
+            elif ch == "#" and (i == 0 or text[i - 1] in " \t"):
+                return text[:i].rstrip()
+        elif ch == "\\" and quote == '"':
+            i += 1
+        elif ch == quote:
+            if quote == "'" and text[i + 1:i + 2] == "'":
+                i += 1
+            else:
+                quote = None
+        i += 1
+    if quote is not None:
+        raise DataError("Unterminated quoted scalar", lineno, indent + 1)
+    return text.rstrip()
+
+
+def _flow_balance(text: str, depth: int, lineno: int, indent: int) -> int:
+    for ch in text:
+        if ch in "[{":
+            depth += 1
+        elif ch in "]}":
+            depth -= 1
+            if depth < 0:
+                raise DataError(f"Unexpected '{ch}'", lineno, indent + 1)
+    return depth
+
+
+# ============================================================
+# DISPATCH
+# ============================================================
+
+def validate_stream(kind: str, stream: TextIO) -> Dict[str, Any]:
+    """
+    Valida uno stream testuale del tipo indicato. Solleva DataError.
+    """
+    if kind == "json":
+        return validate_json_stream(stream)
+    if kind == "toml":
+        return validate_toml(stream)
+    if kind == "yaml":
+        return validate_yaml_lines(iter(stream))
+    raise ValueError(f"Unsupported data kind: {kind}")
+
+
+def open_data(path: str) -> TextIO:
+    # newline="": offset e colonne riferiti al testo su disco
+    return io.open(path, "r", encoding="utf-8-sig", newline="")
+
+
+def _chunks(stream: TextIO, size: int) -> Iterator[str]:
+    while True:
+        chunk = stream.read(size)
+        if not chunk:
+            return
+        yield chunk
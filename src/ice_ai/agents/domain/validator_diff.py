@@ -0,0 +1,187 @@
+"""
+Validator Diff — validazione limitata ai file / righe toccati da Git.
+
+RESPONSABILITÀ:
+- ricavare i file modificati da un diff GitAgent o da `status`
+- mappare i hunk in range di righe (una volta per file)
+- filtrare le issue sulle righe modificate
+
+NON FA:
+- eseguire git (riceve l'output / i contenuti letti da GitAgent)
+- validare (delegato a ValidatorAgent.validate_many)
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from ice_ai.agents.domain.git_diff import unquote_path
+from ice_ai.agents.domain.validator_data import validatable
+
+
+# ============================================================
+# LINE RANGES
+# ============================================================
+
+class LineRanges:
+    """
+    Insieme di intervalli di righe chiusi, fusi e ordinati.
+    `line in ranges` costa O(log h) sul numero di hunk.
+    """
+
+    def __init__(self, ranges: Iterable[Tuple[int, int]]) -> None:
+        merged: List[List[int]] = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self._starts = [start for start, _ in merged]
+        self._ends = [end for _, end in merged]
+
+    def __contains__(self, line: int) -> bool:
+        idx = bisect.bisect_right(self._starts, line) - 1
+        return idx >= 0 and line <= self._ends[idx]
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def to_list(self) -> List[Tuple[int, int]]:
+        return list(zip(self._starts, self._ends))
+
+
+def hunk_ranges(entry: Mapping[str, Any]) -> Optional[LineRanges]:
+    """
+    Righe del lato nuovo coperte dai hunk di una entry `iter_diff`.
+
+    None = intero file (file nuovo, hunk troncati o assenti).
+    Una cancellazione pura marca la riga che ne prende il posto.
+    """
+    if entry.get("status") == "A" or entry.get("truncated"):
+        return None
+    hunks = entry.get("hunks")
+    if not hunks:
+        return None
+
+    ranges: List[Tuple[int, int]] = []
+    for hunk in hunks:
+        start, count = hunk["new_start"], hunk["new_lines"]
+        if count > 0:
+            ranges.append((start, start + count - 1))
+        else:
+            ranges.append((max(start, 1), start + 1))
+    return LineRanges(ranges)
+
+
+# ============================================================
+# CHANGES
+# ============================================================
+
+def changes_from_diff(
+    diff: Any,
+    *,
+    scoped: bool = True,
+) -> Dict[str, Optional[LineRanges]]:
+    """
+    {path relativo: range modificati | None} da `GitAgent.diff_files`
+    (dict con "files") o da una sequenza di entry `iter_diff`.
+    I file cancellati sono esclusi.
+    """
+    files = diff.get("files", []) if isinstance(diff, Mapping) else diff
+    changes: Dict[str, Optional[LineRanges]] = {}
+    for entry in files:
+        if entry.get("status") == "D" or not entry.get("path"):
+            continue
+        changes[entry["path"]] = hunk_ranges(entry) if scoped else None
+    return changes
+
+
+def changes_from_status(
+    status: Any,
+    *,
+    untracked_only: bool = False,
+) -> Dict[str, Optional[LineRanges]]:
+    """
+    {path relativo: None} da `GitAgent.status` (porcelain v1): lo
+    status non ha hunk, ogni file toccato è validato per intero.
+    """
+    lines = status
+    if isinstance(status, Mapping):
+        lines = status.get("changed_files", [])
+
+    changes: Dict[str, Optional[LineRanges]] = {}
+    for line in lines:
+        # "XY path": codice di due colonne, poi uno spazio
+        if len(line) < 4 or line[2] != " ":
+            continue
+        code, path = line[:2], line[3:]
+        if "D" in code or (untracked_only and code != "??"):
+            continue
+        if " -> " in path:
+            path = path.split(" -> ", 1)[1]
+        changes[unquote_path(path)] = None
+    return changes
+
+
+def new_side(rev: Optional[str], staged: bool) -> Optional[str]:
+    """
+    Dove si trova il lato nuovo di un diff GitAgent (quello a cui si
+    riferiscono i range dei hunk):
+
+    - None: working tree (`git diff`, `git diff <rev>`)
+    - "": index (`staged=True`)
+    - revisione: lato destro di un range (`a..b`, `a...b`; vuoto = HEAD)
+    """
+    if staged:
+        return ""
+    if rev is None:
+        return None
+    for sep in ("...", ".."):
+        if sep in rev:
+            return rev.split(sep, 1)[1] or "HEAD"
+    return None
+
+
+def validation_targets(
+    changes: Mapping[str, Optional[LineRanges]],
+    root: str,
+    sources: Optional[Mapping[str, str]] = None,
+) -> Dict[str, Optional[LineRanges]]:
+    """
+    Sorgenti Python e file di dati (JSON / TOML / YAML), con path
+    assoluti sotto `root`: esistenti nel working tree oppure, con
+    `sources` (contenuti già letti, es. blob git di una revisione),
+    presenti in `sources`.
+    """
+    targets: Dict[str, Optional[LineRanges]] = {}
+    for rel, ranges in changes.items():
+        if not validatable(rel):
+            continue
+        path = os.path.join(root, rel)
+        if path in sources if sources is not None else os.path.isfile(path):
+            targets[path] = ranges
+    return targets
+
+
+# ============================================================
+# FILTER
+# ============================================================
+
+def scope_issues(
+    issues: List[Dict[str, Any]],
+    ranges: Optional[LineRanges],
+) -> List[Dict[str, Any]]:
+    """
+    Issue sulle righe modificate. Errori di sintassi e issue senza
+    riga restano sempre: invalidano il file intero.
+    """
+    if ranges is None:
+        return issues
+    return [
+        issue for issue in issues
+        if issue.get("type") == "syntax"
+        or issue.get("line") is None
+        or issue["line"] in ranges
+    ]
@@ -0,0 +1,192 @@
+"""
+Validator Metrics — tempi e conteggi per regola, cumulati tra chiamate.
+
+RESPONSABILITÀ:
+- aggregare i tempi di ogni run del RuleEngine (invocazioni, secondi,
+  issue) per regola e per fase condivisa (visita AST, tokenize)
+- snapshot delle metriche e dettaglio per singolo report
+- segnalare le regole il cui costo medio per file supera il budget
+
+NON FA:
+- misurare (lo fa il RuleEngine quando riceve `timings`)
+- disabilitare regole (decide il ValidatorAgent, vedi `disable_slow`)
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Mapping, Optional
+
+from ice_ai.agents.domain.validator_rules import (
+    PHASE_TOKENIZE,
+    PHASE_VISIT,
+    Timings,
+)
+
+
+_PHASES = {PHASE_VISIT: "visit", PHASE_TOKENIZE: "tokenize"}
+
+
+class _RuleStats:
+    __slots__ = ("calls", "seconds", "issues", "max_seconds", "over_budget")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+        self.issues = 0
+        self.max_seconds = 0.0
+        self.over_budget = 0
+
+
+class RuleMetrics:
+    """
+    Metriche cumulative per regola.
+
+    `budget_ms`: costo massimo per file di una regola. Una regola è
+    segnalata quando la sua media per file supera il budget dopo
+    almeno `min_runs` file (un singolo run lento, es. una pausa del GC,
+    conta solo in `over_budget`). Con `disable_slow` il ValidatorAgent
+    disabilita le regole segnalate.
+
+    `per_report`: aggiunge a ogni report il dettaglio del run.
+    """
+
+    def __init__(
+        self,
+        *,
+        budget_ms: Optional[float] = None,
+        min_runs: int = 10,
+        disable_slow: bool = False,
+        per_report: bool = False,
+    ) -> None:
+        if budget_ms is not None and budget_ms <= 0:
+            raise ValueError("budget_ms must be > 0")
+        if min_runs < 1:
+            raise ValueError("min_runs must be >= 1")
+        self.budget_ms = budget_ms
+        self.min_runs = min_runs
+        self.disable_slow = disable_slow
+        self.per_report = per_report
+
+        self.runs = 0
+        self._rules: Dict[str, _RuleStats] = {}
+        self._phases: Dict[str, float] = {}
+        self._flagged: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # RECORD
+    # ------------------------------------------------------------------
+
+    def record(self, timings: Timings) -> List[str]:
+        """
+        Aggiunge un run. Ritorna le regole appena entrate oltre budget.
+        """
+        with self._lock:
+            self.runs += 1
+            for name, (calls, seconds, issues) in timings.items():
+                if name in _PHASES:
+                    self._phases[name] = self._phases.get(name, 0.0) + seconds
+                    continue
+                stats = self._rules.get(name)
+                if stats is None:
+                    stats = self._rules[name] = _RuleStats()
+                stats.calls += int(calls)
+                stats.seconds += seconds
+                stats.issues += int(issues)
+                stats.max_seconds = max(stats.max_seconds, seconds)
+                if self.budget_ms is not None and (
+                    seconds * 1000 > self.budget_ms
+                ):
+                    stats.over_budget += 1
+            return self._check_budget()
+
+    def record_report(self, report: Mapping[str, Any]) -> List[str]:
+        """
+        Come `record`, dal dettaglio `rule_metrics` di un report
+        (es. prodotto in un worker del process pool).
+        """
+        detail = report.get("rule_metrics")
+        if not detail:
+            return []
+        return self.record({
+            name: [item["calls"], item["ms"] / 1000, item["issues"]]
+            for name, item in detail.items()
+        })
+
+    def _check_budget(self) -> List[str]:
+        if self.budget_ms is None or self.runs < self.min_runs:
+            return []
+        fresh: List[str] = []
+        for name, stats in self._rules.items():
+            mean_ms = stats.seconds * 1000 / self.runs
+            if mean_ms > self.budget_ms and name not in self._flagged:
+                self._flagged[name] = mean_ms
+                fresh.append(name)
+        return fresh
+
+    def reset(self) -> None:
+        with self._lock:
+            self.runs = 0
+            self._rules.clear()
+            self._phases.clear()
+            self._flagged.clear()
+
+    # ------------------------------------------------------------------
+    # VIEW
+    # ------------------------------------------------------------------
+
+    @property
+    def flagged(self) -> List[str]:
+        return sorted(self._flagged)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Metriche per regola, ordinate per tempo totale decrescente.
+        """
+        with self._lock:
+            runs = self.runs
+            rules = {}
+            ranked = sorted(
+                self._rules.items(),
+                key=lambda item: item[1].seconds,
+                reverse=True,
+            )
+            for name, stats in ranked:
+                rules[name] = {
+                    "calls": stats.calls,
+                    "issues": stats.issues,
+                    "total_ms": _ms(stats.seconds),
+                    "mean_ms": _ms(stats.seconds / runs) if runs else 0.0,
+                    "max_ms": _ms(stats.max_seconds),
+                    "over_budget": stats.over_budget,
+                    "flagged": name in self._flagged,
+                }
+            return {
+                "runs": runs,
+                "budget_ms": self.budget_ms,
+                "rules": rules,
+                "phases": {
+                    label: _ms(self._phases.get(phase, 0.0))
+                    for phase, label in _PHASES.items()
+                },
+                "flagged": sorted(self._flagged),
+            }
+
+    @staticmethod
+    def report_detail(timings: Timings) -> Dict[str, Dict[str, Any]]:
+        """
+        Dettaglio di un singolo run, da allegare al report.
+        """
+        return {
+            name: {
+                "calls": int(calls),
+                "issues": int(issues),
+                "ms": _ms(seconds),
+            }
+            for name, (calls, seconds, issues) in timings.items()
+        }
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 4)
@@ -0,0 +1,446 @@
+"""
+Validator Rules — motore di regole semantiche a singola visita AST.
+
+RESPONSABILITÀ:
+- registro di regole dichiarative (tipi di nodo AST / commenti)
+- dispatch di tutte le regole da un'unica visita dell'albero
+- regole sui commenti via `tokenize` (stringhe e codice esclusi)
+- issue con riga / colonna
+- tempi / invocazioni per regola (opzionale, a costo zero se spento)
+
+NON FA:
+- parsing (riusa l'albero prodotto dalla validazione sintattica)
+- fix automatici
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import io
+import json
+import time
+import tokenize
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+
+# Da incrementare quando cambia il comportamento di una regola builtin
+RULESET_VERSION = 1
+
+# Fasi condivise da tutte le regole, registrate accanto ai tempi per regola
+PHASE_VISIT = "<visit>"
+PHASE_TOKENIZE = "<tokenize>"
+
+# {nome regola | fase: [invocazioni, secondi, issue]} di un singolo run
+Timings = Dict[str, List[float]]
+
+
+# ============================================================
+# RULE MODEL
+# ============================================================
+
+class Rule:
+    """
+    Regola semantica.
+
+    Una regola dichiara i tipi di nodo che le interessano (`node_types`)
+    e/o se ispeziona i commenti (`comments`); il motore la invoca solo
+    per quelli. I metodi ritornano il messaggio dell'issue o None.
+
+    `markers`: sottostringhe senza le quali una regola sui commenti non
+    può scattare; se nessuna compare nel sorgente la tokenizzazione
+    viene saltata.
+
+    `version` va incrementata quando cambia il comportamento della
+    regola; una regola parametrica espone i parametri in `config()`.
+    Entrambi entrano nel fingerprint del ruleset (chiave della cache).
+    """
+
+    name: str = ""
+    version: int = 1
+    type: str = "style"
+    severity: str = "warning"
+    node_types: Tuple[Type[ast.AST], ...] = ()
+    comments: bool = False
+    markers: Tuple[str, ...] = ()
+
+    def check_node(self, node: ast.AST) -> Optional[str]:
+        return None
+
+    def check_comment(self, text: str) -> Optional[str]:
+        return None
+
+    def config(self) -> Dict[str, Any]:
+        """
+        Parametri che influenzano le issue (JSON-serializzabili).
+        """
+        return {}
+
+    def identity(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "class": f"{type(self).__module__}.{type(self).__qualname__}",
+            "version": self.version,
+            "type": self.type,
+            "severity": self.severity,
+            "node_types": sorted(t.__name__ for t in self.node_types),
+            "comments": self.comments,
+            "markers": list(self.markers),
+            "config": self.config(),
+        }
+
+    def issue(
+        self,
+        message: str,
+        line: Optional[int],
+        column: Optional[int],
+    ) -> Dict[str, Any]:
+        return {
+            "type": self.type,
+            "severity": self.severity,
+            "message": message,
+            "line": line,
+            "column": column,
+            "rule": self.name,
+        }
+
+
+# ============================================================
+# BUILTIN RULES
+# ============================================================
+
+class PrintCallRule(Rule):
+    name = "print-call"
+    node_types = (ast.Call,)
+
+    def check_node(self, node: ast.AST) -> Optional[str]:
+        func = node.func  # type: ignore[attr-defined]
+        if isinstance(func, ast.Name) and func.id == "print":
+            return "Usage of print() detected (consider logging)."
+        return None
+
+
+class TodoCommentRule(Rule):
+    name = "todo-comment"
+    type = "maintainability"
+    severity = "info"
+    comments = True
+    markers = ("TODO", "FIXME")
+
+    def check_comment(self, text: str) -> Optional[str]:
+        for marker in self.markers:
+            if marker in text:
+                return f"{marker} marker found in comment."
+        return None
+
+
+class BareExceptRule(Rule):
+    name = "bare-except"
+    type = "correctness"
+    node_types = (ast.ExceptHandler,)
+
+    def check_node(self, node: ast.AST) -> Optional[str]:
+        if node.type is None:  # type: ignore[attr-defined]
+            return "Bare except: catches SystemExit / KeyboardInterrupt."
+        return None
+
+
+class MutableDefaultRule(Rule):
+    name = "mutable-default"
+    type = "correctness"
+    node_types = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+
+    MUTABLE = (ast.List, ast.Dict, ast.Set)
+
+    def check_node(self, node: ast.AST) -> Optional[str]:
+        args = node.args  # type: ignore[attr-defined]
+        defaults = list(args.defaults) + [
+            d for d in args.kw_defaults if d is not None
+        ]
+        if any(isinstance(d, self.MUTABLE) for d in defaults):
+            name = getattr(node, "name", "lambda")
+            return f"Mutable default argument in {name}()."
+        return None
+
+
+def default_rules() -> List[Rule]:
+    """
+    Regole attive di default (equivalenti ai controlli storici).
+
+    `BareExceptRule` e `MutableDefaultRule` sono opt-in (via
+    `register_rule`): abilitarle di default cambierebbe l'esito di
+    codice che oggi valida.
+    """
+    return [
+        PrintCallRule(),
+        TodoCommentRule(),
+    ]
+
+
+# ============================================================
+# ENGINE
+# ============================================================
+
+class _DispatchVisitor:
+    """
+    Una sola visita: per ogni nodo invoca le regole registrate per il
+    suo tipo (lookup O(1) su dict), poi scende nei figli.
+
+    Visita iterativa (stack esplicito): espressioni molto annidate che
+    `ast.parse` accetta non esauriscono lo stack di Python.
+    """
+
+    def __init__(
+        self,
+        dispatch: Dict[Type[ast.AST], List[Rule]],
+        issues: List[Dict[str, Any]],
+    ) -> None:
+        self._dispatch = dispatch
+        self._issues = issues
+
+    def visit(self, tree: ast.AST) -> None:
+        dispatch = self._dispatch
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            rules = dispatch.get(type(node))
+            if rules:
+                self._check(node, rules)
+            # figli in ordine inverso: visita in preordine come NodeVisitor
+            children = list(ast.iter_child_nodes(node))
+            children.reverse()
+            stack.extend(children)
+
+    def _check(self, node: ast.AST, rules: List[Rule]) -> None:
+        for rule in rules:
+            message = rule.check_node(node)
+            if message is not None:
+                self._issues.append(self._issue(rule, message, node))
+
+    @staticmethod
+    def _issue(rule: Rule, message: str, node: ast.AST) -> Dict[str, Any]:
+        return rule.issue(
+            message,
+            getattr(node, "lineno", None),
+            _column(getattr(node, "col_offset", None)),
+        )
+
+
+class _TimedDispatchVisitor(_DispatchVisitor):
+    """
+    Come `_DispatchVisitor`, misurando ogni invocazione di regola.
+    Usato solo quando sono richieste metriche.
+    """
+
+    def __init__(
+        self,
+        dispatch: Dict[Type[ast.AST], List[Rule]],
+        issues: List[Dict[str, Any]],
+        timings: Timings,
+    ) -> None:
+        super().__init__(dispatch, issues)
+        self._timings = timings
+
+    def _check(self, node: ast.AST, rules: List[Rule]) -> None:
+        clock = time.perf_counter
+        for rule in rules:
+            start = clock()
+            message = rule.check_node(node)
+            entry = self._timings[rule.name]
+            entry[0] += 1
+            entry[1] += clock() - start
+            if message is not None:
+                entry[2] += 1
+                self._issues.append(self._issue(rule, message, node))
+
+
+class RuleEngine:
+    """
+    Esegue un insieme di regole con costo ~ una visita AST (+ una
+    tokenizzazione se almeno una regola ispeziona i commenti),
+    indipendentemente dal numero di regole.
+
+    Le regole disabilitate (es. oltre il budget di tempo) restano
+    registrate ma escono dal dispatch e dal fingerprint.
+    """
+
+    def __init__(self, rules: Optional[Iterable[Rule]] = None) -> None:
+        self._rules: List[Rule] = []
+        self._disabled: Dict[str, Rule] = {}
+        self._dispatch: Dict[Type[ast.AST], List[Rule]] = {}
+        self._comment_rules: List[Rule] = []
+        self._fingerprint: Optional[str] = None
+        for rule in default_rules() if rules is None else rules:
+            self.register(rule)
+
+    @property
+    def rules(self) -> Sequence[Rule]:
+        """
+        Regole attive.
+        """
+        return tuple(self._rules)
+
+    @property
+    def disabled(self) -> Sequence[str]:
+        return tuple(sorted(self._disabled))
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Identità del ruleset: versione + hash dell'identità (classe,
+        versione, config, ...) delle regole attive.
+
+        Calcolato alla prima richiesta dopo register / disable / enable:
+        la config di una regola non va cambiata dopo la registrazione.
+        """
+        if self._fingerprint is not None:
+            return self._fingerprint
+        rules = sorted(
+            (rule.identity() for rule in self._rules),
+            key=lambda identity: identity["name"],
+        )
+        blob = json.dumps(rules, sort_keys=True, default=repr)
+        digest = hashlib.blake2b(blob.encode("utf-8"), digest_size=16)
+        self._fingerprint = f"{RULESET_VERSION}:{digest.hexdigest()}"
+        return self._fingerprint
+
+    def register(self, rule: Rule) -> None:
+        if not rule.name:
+            raise ValueError("rule must have a name")
+        if rule.name in self._disabled or any(
+            r.name == rule.name for r in self._rules
+        ):
+            raise ValueError(f"Rule already registered: {rule.name}")
+
+        self._rules.append(rule)
+        self._index(rule)
+
+    def disable(self, name: str) -> bool:
+        """
+        Toglie una regola dal dispatch. False se non è attiva.
+        """
+        for rule in self._rules:
+            if rule.name == name:
+                break
+        else:
+            return False
+
+        self._rules.remove(rule)
+        self._disabled[name] = rule
+        self._fingerprint = None
+        self._dispatch = {}
+        self._comment_rules = []
+        for active in self._rules:
+            self._index(active)
+        return True
+
+    def enable(self, name: str) -> bool:
+        """
+        Riattiva una regola disabilitata. False se non lo è.
+        """
+        rule = self._disabled.pop(name, None)
+        if rule is None:
+            return False
+        self._rules.append(rule)
+        self._index(rule)
+        return True
+
+    def _index(self, rule: Rule) -> None:
+        self._fingerprint = None
+        for node_type in rule.node_types:
+            self._dispatch.setdefault(node_type, []).append(rule)
+        if rule.comments:
+            self._comment_rules.append(rule)
+
+    def run(
+        self,
+        tree: ast.AST,
+        code: str,
+        timings: Optional[Timings] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Issue ordinate per posizione.
+
+        Con `timings` (dict vuoto) registra per ogni regola attiva
+        invocazioni, secondi e issue, più le fasi condivise
+        (`PHASE_VISIT`, `PHASE_TOKENIZE`).
+        """
+        if timings is not None:
+            for rule in self._rules:
+                timings[rule.name] = [0, 0.0, 0]
+
+        issues: List[Dict[str, Any]] = []
+        if self._dispatch:
+            if timings is None:
+                _DispatchVisitor(self._dispatch, issues).visit(tree)
+            else:
+                start = time.perf_counter()
+                _TimedDispatchVisitor(
+                    self._dispatch, issues, timings
+                ).visit(tree)
+                timings[PHASE_VISIT] = [
+                    1, time.perf_counter() - start, 0
+                ]
+        if self._comment_rules:
+            issues.extend(self._run_comments(code, timings))
+        issues.sort(key=lambda i: (i["line"] or 0, i["column"] or 0))
+        return issues
+
+    def _run_comments(
+        self,
+        code: str,
+        timings: Optional[Timings] = None,
+    ) -> List[Dict[str, Any]]:
+        issues: List[Dict[str, Any]] = []
+        rules = [
+            rule for rule in self._comment_rules
+            if not rule.markers or any(m in code for m in rule.markers)
+        ]
+        if not rules:
+            # tokenize è puro Python: il prefiltro evita il costo dominante
+            return issues
+
+        clock = time.perf_counter
+        phase_start = clock()
+        readline = io.StringIO(code).readline
+        try:
+            for tok in tokenize.generate_tokens(readline):
+                if tok.type != tokenize.COMMENT:
+                    continue
+                for rule in rules:
+                    if timings is None:
+                        message = rule.check_comment(tok.string)
+                    else:
+                        start = clock()
+                        message = rule.check_comment(tok.string)
+                        entry = timings[rule.name]
+                        entry[0] += 1
+                        entry[1] += clock() - start
+                        if message is not None:
+                            entry[2] += 1
+                    if message is not None:
+                        issues.append(
+                            rule.issue(message, tok.start[0], tok.start[1] + 1)
+                        )
+        except (tokenize.TokenError, SyntaxError):
+            # codice già validato da ast.parse: qui solo casi limite
+            # (es. EOF in continuazione), i commenti visti restano validi
+            pass
+        if timings is not None:
+            # include il tempo delle regole sui commenti
+            timings[PHASE_TOKENIZE] = [1, clock() - phase_start, 0]
+        return issues
+
+
+def _column(col_offset: Optional[int]) -> Optional[int]:
+    # colonne 1-based, come `SyntaxError.offset`
+    return None if col_offset is None else col_offset + 1
@@ -1,6 +1,8 @@
+from .fs import write_json_atomic
 from .introspection import describe_agent, describe_catalog
 
 __all__ = [
     "describe_agent",
     "describe_catalog",
+    "write_json_atomic",
 ]
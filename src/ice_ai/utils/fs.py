@@ -0,0 +1,39 @@
+"""
+FS — scritture su file condivise dagli agenti.
+
+RESPONSABILITÀ:
+- scrittura atomica di stato JSON (file temporaneo + rename)
+
+NON FA:
+- locking tra processi (vince l'ultimo rename)
+- lettura / validazione dello stato (compito del chiamante)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from typing import Any
+
+
+def write_json_atomic(path: str, data: Any, **dump_options: Any) -> None:
+    """
+    Scrive `data` come JSON in `path` in modo atomico: un crash o un
+    errore di serializzazione non lasciano mai un file troncato.
+
+    La directory viene creata se manca; `dump_options` va a json.dump.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    # temporaneo nella stessa directory: os.replace resta un rename
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, **dump_options)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
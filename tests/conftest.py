@@ -0,0 +1,51 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+
+def run_git(repo, *args, when=0):
+    """
+    git con autore e date fissi (`when` = minuti dall'epoca del test):
+    history riproducibili e ordinabili nel tempo.
+    """
+    date = f"{1700000000 + when * 60} +0000"
+    env = dict(
+        os.environ,
+        GIT_AUTHOR_NAME="a",
+        GIT_AUTHOR_EMAIL="a@example.com",
+        GIT_COMMITTER_NAME="a",
+        GIT_COMMITTER_EMAIL="a@example.com",
+        GIT_AUTHOR_DATE=date,
+        GIT_COMMITTER_DATE=date,
+    )
+    return subprocess.run(
+        ["git", *args], cwd=repo, env=env, check=True,
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    ).stdout
+
+
+def commit_file(repo, name, when, text=None):
+    path = os.path.join(repo, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(text if text is not None else f"{when}\n")
+    run_git(repo, "add", name)
+    run_git(repo, "commit", "-q", "-m", f"c{when}", when=when)
+    return run_git(repo, "rev-parse", "HEAD").strip()
+
+
+@pytest.fixture
+def git():
+    if shutil.which("git") is None:
+        pytest.skip("git not installed")
+    return run_git
+
+
+@pytest.fixture
+def new_repo(tmp_path, git):
+    path = str(tmp_path / "repo")
+    os.makedirs(path)
+    git(path, "init", "-q", "-b", "main")
+    return path
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from ice_ai.agents.domain import code as code_module
+from ice_ai.agents.domain.code import CodeAgent
+
+
+def _tree(root):
+    (root / "a.txt").write_text("alpha\n")
+    (root / "b.txt").write_text("b" * 100)
+    (root / "empty.txt").write_text("")
+    (root / "big.txt").write_bytes(b"x" * (code_module.MMAP_MIN_BYTES + 10))
+    (root / "sub").mkdir()
+    names = ["a.txt", "missing.txt", "b.txt", "sub", "empty.txt", "big.txt"]
+    return [str(root / name) for name in names]
+
+
+@pytest.mark.parametrize("workers", [1, 8])
+def test_order_and_errors(tmp_path, workers):
+    paths = _tree(tmp_path)
+    result = CodeAgent().read_files(paths, workers=workers)
+    files = result["files"]
+    assert [f["path"] for f in files] == paths
+    assert [f["ok"] for f in files] == [True, False, True, False, True, True]
+    assert files[1]["error"] == "file_not_found"
+    assert files[3]["error"] == "read_error"
+    assert files[0]["content"] == "alpha\n"
+    assert files[4]["content"] == "" and not files[4]["truncated"]
+    assert files[5]["bytes"] == code_module.MMAP_MIN_BYTES + 10
+    assert (result["read"], result["failed"], result["truncated"]) == (4, 2, 0)
+
+
+def test_pool_matches_serial(tmp_path):
+    paths = _tree(tmp_path) * 3
+    kwargs = {"max_file_bytes": 50, "max_total_bytes": 300}
+    serial = CodeAgent().read_files(paths, workers=1, **kwargs)
+    pooled = CodeAgent().read_files(paths, workers=8, **kwargs)
+    assert pooled == serial
+
+
+def test_per_file_cap(tmp_path):
+    path = tmp_path / "b.txt"
+    path.write_text("b" * 100)
+    (entry,) = CodeAgent().read_files([str(path)], max_file_bytes=10)["files"]
+    assert entry["content"] == "b" * 10
+    assert entry["truncated"]
+    assert entry["bytes"] == 10
+
+
+def test_total_budget_in_input_order(tmp_path):
+    paths = []
+    for name in "abc":
+        path = tmp_path / name
+        path.write_text(name * 40)
+        paths.append(str(path))
+    result = CodeAgent().read_files(paths, max_total_bytes=60, workers=8)
+    first, second, third = result["files"]
+    assert first["bytes"] == 40 and not first["truncated"]
+    assert second["bytes"] == 20 and second["truncated"]
+    assert third["error"] == "total_limit_exceeded"
+    assert result["bytes"] == 60
+
+
+def test_truncation_inside_utf8_sequence(tmp_path):
+    path = tmp_path / "u.txt"
+    path.write_text("àè", encoding="utf-8")
+    (entry,) = CodeAgent().read_files([str(path)], max_file_bytes=3)["files"]
+    assert entry["content"] == "à"
+    assert entry["truncated"]
+
+
+@pytest.mark.skipif(
+    not os.path.exists("/proc/self/status"), reason="no procfs"
+)
+def test_zero_size_special_files_are_read():
+    (entry,) = CodeAgent().read_files(["/proc/self/status"])["files"]
+    assert entry["ok"]
+    assert "Name:" in entry["content"]
+    (entry,) = CodeAgent().read_files(
+        ["/proc/self/status"], max_file_bytes=4
+    )["files"]
+    assert entry["truncated"] and entry["bytes"] == 4
+
+
+def test_invalid_limits():
+    result = CodeAgent().read_files([], max_file_bytes=0)
+    assert result["error"] == "invalid_limit"
@@ -0,0 +1,106 @@
+import os
+
+from conftest import commit_file
+from ice_ai.agents.domain.git import GitAgent
+from ice_ai.agents.domain.git_churn import ChurnIndex, split_rename
+
+
+def _commit(sha, ts, *files, author="a"):
+    return {
+        "hash": sha,
+        "author": author,
+        "timestamp": ts,
+        "files": [
+            {"path": path, "added": 1, "deleted": 0, "removed": removed}
+            for path, removed in files
+        ],
+    }
+
+
+def test_split_rename():
+    assert split_rename("a.txt") == (None, "a.txt")
+    assert split_rename("old.txt => new.txt") == ("old.txt", "new.txt")
+    assert split_rename("src/{a => b}/x.py") == ("src/a/x.py", "src/b/x.py")
+    assert split_rename("src/{ => sub}/x.py") == ("src/x.py", "src/sub/x.py")
+
+
+def test_index_rename_and_removal(tmp_path):
+    index = ChurnIndex(str(tmp_path / "churn.json"))
+    index.apply_commit(_commit("1", 10, ("a.py", False), ("b.py", False)))
+    index.apply_commit(_commit("2", 20, ("{a.py => c.py}", False)))
+
+    assert "a.py" not in index.files
+    assert index.files["c.py"]["commits"] == 2
+    assert index.co_changes("b.py") == [{"path": "c.py", "count": 1}]
+
+    # un file eliminato esce dall'indice e dai co-change
+    index.apply_commit(_commit("3", 30, ("c.py", True), ("b.py", False)))
+    assert "c.py" not in index.files
+    assert index.co_changes("b.py") == []
+    assert index.head == "3"
+
+
+def test_index_persists(tmp_path):
+    path = str(tmp_path / "churn.json")
+    index = ChurnIndex(path)
+    index.apply_commit(_commit("1", 10, ("a.py", False), author="x"))
+    index.save()
+
+    loaded = ChurnIndex.load(path)
+    assert (loaded.head, loaded.commits) == ("1", 1)
+    assert loaded.file("a.py")["recent_authors"] == ["x"]
+    assert ChurnIndex.load(str(tmp_path / "missing.json")).head is None
+
+
+def test_numstat_marks_removed_files(new_repo, git):
+    commit_file(new_repo, "a.txt", 0)
+    commit_file(new_repo, "b.txt", 1)
+    git(new_repo, "rm", "-q", "b.txt")
+    git(new_repo, "commit", "-q", "-m", "rm", when=2)
+
+    latest = next(GitAgent().iter_log(new_repo, numstat=True))
+    assert [(f["path"], f["removed"]) for f in latest["files"]] == [
+        ("b.txt", True)
+    ]
+
+
+def test_incremental_update(new_repo, git):
+    agent = GitAgent()
+    commit_file(new_repo, "a.txt", 0)
+    commit_file(new_repo, "b.txt", 1)
+    first = agent.update_churn_index(new_repo)
+    assert first["ok"] and first["rebuilt"] and first["new_commits"] == 2
+
+    commit_file(new_repo, "a.txt", 2)
+    second = agent.update_churn_index(new_repo)
+    assert (second["rebuilt"], second["new_commits"]) == (False, 1)
+    hotspots = agent.churn_hotspots(new_repo)["hotspots"]
+    assert [(h["path"], h["commits"]) for h in hotspots] == [
+        ("a.txt", 2), ("b.txt", 1)
+    ]
+
+    # history riscritta: l'indice viene ricostruito
+    git(new_repo, "reset", "-q", "--hard", "HEAD~1")
+    commit_file(new_repo, "b.txt", 3)
+    third = agent.update_churn_index(new_repo)
+    assert third["rebuilt"]
+    assert agent.churn_file(new_repo, "b.txt")["commits"] == 2
+
+
+def test_index_is_per_worktree(new_repo, git, tmp_path):
+    agent = GitAgent()
+    commit_file(new_repo, "a.txt", 0)
+    other = str(tmp_path / "wt")
+    git(new_repo, "worktree", "add", "-q", "-b", "wt", other)
+    commit_file(other, "b.txt", 1)
+
+    agent.update_churn_index(new_repo)
+    agent.update_churn_index(other)
+    assert os.path.exists(
+        os.path.join(new_repo, ".git", "ice-ai", "churn.json")
+    )
+    assert os.path.exists(
+        os.path.join(new_repo, ".git", "worktrees", "wt", "ice-ai", "churn.json")
+    )
+    assert agent.churn_file(new_repo, "b.txt")["error"] == "path_not_indexed"
+    assert agent.churn_file(other, "b.txt")["commits"] == 1
@@ -0,0 +1,105 @@
+from conftest import commit_file
+from ice_ai.agents.domain.git import GitAgent
+from ice_ai.agents.domain.git_diff import (
+    iter_file_diffs,
+    parse_name_status,
+    unquote_path,
+)
+
+
+PATCH = """\
+diff --git a/a.txt b/a.txt
+index 1111111..2222222 100644
+--- a/a.txt
++++ b/a.txt
+@@ -1,2 +1,2 @@
+-one
++ONE
+ two
+@@ -10 +10,2 @@
+ ten
++eleven
+diff --git a/old name.txt b/new name.txt
+similarity index 90%
+rename from old name.txt
+rename to new name.txt
+diff --git a/img.png b/img.png
+new file mode 100644
+index 0000000..3333333
+Binary files /dev/null and b/img.png differ
+"""
+
+
+def _entries(**budget):
+    return list(iter_file_diffs(PATCH.splitlines(), **budget))
+
+
+def test_iter_file_diffs_entries():
+    text, renamed, binary = _entries()
+    assert (text["path"], text["status"]) == ("a.txt", "M")
+    assert (text["added"], text["deleted"]) == (2, 1)
+    assert [h["new_lines"] for h in text["hunks"]] == [2, 2]
+    assert text["hunks"][0]["text"] == "-one\n+ONE\n two"
+    assert not text["truncated"]
+
+    assert (renamed["old_path"], renamed["path"]) == (
+        "old name.txt", "new name.txt"
+    )
+    assert renamed["status"] == "R"
+    assert binary["binary"] and binary["status"] == "A"
+    assert binary["old_path"] is None
+
+
+def test_budget_truncates_hunks_but_keeps_numstat():
+    full = _entries()[0]
+    (text, *_) = _entries(max_file_bytes=30)
+    assert text["truncated"]
+    assert (text["added"], text["deleted"]) == (full["added"], full["deleted"])
+    kept = sum(len(h["header"]) + len(h["text"]) for h in text["hunks"])
+    assert kept <= 30
+    assert text["bytes"] == full["bytes"]
+
+
+def test_total_budget_spans_files():
+    entries = _entries(max_total_bytes=1)
+    assert all(entry["hunks"] == [] for entry in entries)
+    assert entries[0]["truncated"]
+
+
+def test_parse_name_status():
+    tokens = ["M", "a.txt", "R087", "old.txt", "new.txt", "A", "b.txt", ""]
+    assert list(parse_name_status(tokens)) == [
+        {"path": "a.txt", "old_path": "a.txt", "status": "M", "score": None},
+        {"path": "new.txt", "old_path": "old.txt", "status": "R", "score": 87},
+        {"path": "b.txt", "old_path": None, "status": "A", "score": None},
+    ]
+
+
+def test_unquote_path():
+    assert unquote_path('"a/\\303\\250.txt"') == "a/è.txt"
+    assert unquote_path("plain.txt") == "plain.txt"
+
+
+def test_agent_diff_against_repo(new_repo, git):
+    commit_file(new_repo, "a.txt", 0, "".join(f"{i}\n" for i in range(100)))
+    commit_file(new_repo, "b.txt", 1)
+    with open(f"{new_repo}/a.txt", "a", encoding="utf-8") as fh:
+        fh.write("x" * 1000 + "\n")
+    git(new_repo, "mv", "b.txt", "c.txt")
+
+    agent = GitAgent()
+    (entry,) = agent.iter_diff(new_repo, max_file_bytes=200)
+    assert (entry["path"], entry["added"], entry["truncated"]) == (
+        "a.txt", 1, True
+    )
+    (staged,) = agent.iter_diff(new_repo, staged=True, name_status=True)
+    assert (staged["status"], staged["old_path"], staged["path"]) == (
+        "R", "b.txt", "c.txt"
+    )
+
+    summary = agent.diff_files(new_repo, rev="HEAD", context=0)
+    assert summary["ok"] and summary["count"] == 2
+    # il rename senza modifiche non aggiunge righe
+    assert summary["added"] == 1 and summary["truncated"] is False
+    assert summary["files"][1]["status"] == "R"
+    assert agent.diff_files(new_repo, rev="nope")["ok"] is False
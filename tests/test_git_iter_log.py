@@ -0,0 +1,91 @@
+import shutil
+
+import pytest
+
+from conftest import commit_file, run_git
+from ice_ai.agents.domain.git import GitAgent
+
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("git") is None, reason="git not installed"
+)
+
+
+@pytest.fixture(scope="module")
+def repo(tmp_path_factory):
+    """
+    History non lineare: due branch con commit alternati nel tempo,
+    poi un merge.
+    """
+    path = str(tmp_path_factory.mktemp("repo"))
+    run_git(path, "init", "-q", "-b", "main")
+    commit_file(path, "a.txt", 0)
+    run_git(path, "checkout", "-q", "-b", "side")
+    for when in (1, 3, 5):
+        commit_file(path, "side.txt", when)
+    run_git(path, "checkout", "-q", "main")
+    for when in (2, 4, 6):
+        commit_file(path, "a.txt", when)
+    run_git(path, "merge", "-q", "--no-ff", "-m", "merge", "side", when=7)
+    return path
+
+
+def _pages(agent, repo, size, **kwargs):
+    pages, after = [], None
+    while True:
+        page = list(agent.iter_log(repo, after=after, limit=size, **kwargs))
+        assert all(c.get("ok") is not False for c in page)
+        if not page:
+            return pages
+        pages.append([c["hash"] for c in page])
+        after = page[-1]["hash"]
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+@pytest.mark.parametrize("size", [1, 2, 3, 5])
+def test_paging_matches_full_log(repo, reverse, size):
+    agent = GitAgent()
+    full = [c["hash"] for c in agent.iter_log(repo, reverse=reverse)]
+    assert len(full) == 8
+
+    pages = _pages(agent, repo, size, reverse=reverse)
+    assert [h for page in pages for h in page] == full
+    assert all(len(page) <= size for page in pages)
+
+
+def test_reverse_is_full_log_reversed(repo):
+    agent = GitAgent()
+    forward = [c["hash"] for c in agent.iter_log(repo)]
+    backward = [c["hash"] for c in agent.iter_log(repo, reverse=True)]
+    assert backward == forward[::-1]
+
+
+def test_paging_with_path(repo):
+    agent = GitAgent()
+    full = [c["hash"] for c in agent.iter_log(repo, path="side.txt")]
+    assert len(full) == 3
+    pages = _pages(agent, repo, 2, path="side.txt")
+    assert [h for page in pages for h in page] == full
+
+
+def test_unknown_cursor(repo):
+    agent = GitAgent()
+    (error,) = list(agent.iter_log(repo, after="0" * 40))
+    assert error["ok"] is False
+    assert error["error"] == "cursor_not_found"
+
+
+def test_abbreviated_cursor(repo):
+    agent = GitAgent()
+    full = [c["hash"] for c in agent.iter_log(repo)]
+    page = [c["hash"] for c in agent.iter_log(repo, after=full[2][:10])]
+    assert page == full[3:]
+
+
+def test_prefix_is_not_a_cursor(repo):
+    # il vecchio confronto per prefisso agganciava il primo hash con
+    # questa iniziale: un prefisso troppo corto / ambiguo non è un cursore
+    agent = GitAgent()
+    head = next(agent.iter_log(repo))["hash"]
+    (error,) = list(agent.iter_log(repo, after=head[0]))
+    assert error["error"] == "cursor_not_found"
@@ -0,0 +1,82 @@
+import os
+
+from conftest import commit_file
+from ice_ai.agents.domain.git import GitAgent
+from ice_ai.agents.domain.git_refs import GitRefReader
+
+
+def _subprocess_branches(git, repo):
+    out = git(repo, "branch", "--all")
+    return [line.replace("*", "").strip() for line in out.splitlines()]
+
+
+def test_head_and_branches_match_git(new_repo, git):
+    first = commit_file(new_repo, "a.txt", 0)
+    git(new_repo, "branch", "feature")
+    git(new_repo, "update-ref", "refs/remotes/origin/main", first)
+    git(new_repo, "symbolic-ref", "refs/remotes/origin/HEAD",
+        "refs/remotes/origin/main")
+    head = commit_file(new_repo, "a.txt", 1)
+
+    reader = GitRefReader()
+    assert reader.head(new_repo) == {
+        "branch": "main", "ref": "refs/heads/main",
+        "sha": head, "detached": False,
+    }
+    assert reader.branches(new_repo) == _subprocess_branches(git, new_repo)
+
+    # dopo `pack-refs` gli stessi ref vengono da packed-refs
+    git(new_repo, "pack-refs", "--all")
+    assert reader.branches(new_repo) == _subprocess_branches(git, new_repo)
+    assert reader.resolve(new_repo, "feature") == first
+    assert reader.resolve(new_repo, "origin") == first
+
+
+def test_short_name_resolution_order(new_repo, git):
+    first = commit_file(new_repo, "a.txt", 0)
+    second = commit_file(new_repo, "a.txt", 1)
+    # tag e branch omonimi: il tag ha la precedenza, come in git
+    git(new_repo, "tag", "x", first)
+    git(new_repo, "branch", "x", second)
+    reader = GitRefReader()
+    assert reader.resolve(new_repo, "x") == first
+    assert reader.resolve(new_repo, "heads/x") == second
+    assert reader.resolve(new_repo, "missing") is None
+
+
+def test_unborn_and_detached_head(new_repo, git):
+    reader = GitRefReader()
+    assert reader.head(new_repo)["sha"] is None
+
+    sha = commit_file(new_repo, "a.txt", 0)
+    git(new_repo, "checkout", "-q", "--detach")
+    assert reader.head(new_repo) == {
+        "branch": None, "ref": None, "sha": sha, "detached": True,
+    }
+    # la riga descrittiva di git non è riprodotta: fallback
+    assert reader.branches(new_repo) is None
+    assert GitAgent().branches(new_repo)["backend"] == "subprocess"
+
+
+def test_worktree_uses_common_dir(new_repo, git, tmp_path):
+    commit_file(new_repo, "a.txt", 0)
+    other = str(tmp_path / "wt")
+    git(new_repo, "worktree", "add", "-q", "-b", "wt", other)
+    sha = commit_file(other, "b.txt", 1)
+
+    reader = GitRefReader()
+    _, common_dir = reader.locate(other)
+    assert os.path.samefile(common_dir, os.path.join(new_repo, ".git"))
+    assert reader.head(other)["branch"] == "wt"
+    assert reader.resolve(new_repo, "wt") == sha
+
+
+def test_agent_falls_back_for_revision_expressions(new_repo, git):
+    first = commit_file(new_repo, "a.txt", 0)
+    commit_file(new_repo, "a.txt", 1)
+    agent = GitAgent()
+    native = agent.resolve_ref(new_repo, "main")
+    assert native["backend"] == "native"
+    parent = agent.resolve_ref(new_repo, "HEAD~1")
+    assert (parent["sha"], parent["backend"]) == (first, "subprocess")
+    assert agent.resolve_ref(new_repo, "nope")["error"] == "ref_not_found"
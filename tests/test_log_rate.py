@@ -0,0 +1,86 @@
+import pytest
+
+from ice_ai.agents.domain.log import LogAgent
+from ice_ai.agents.domain.log_rate import (
+    OVERFLOW_KEY,
+    LogRatePipeline,
+    message_template,
+    parse_timestamp,
+)
+
+
+def _minutes(counts, message="ERROR timeout after {i}ms"):
+    # `counts[m]` righe di errore nel minuto m
+    for minute, count in enumerate(counts):
+        for i in range(count):
+            yield (minute * 60.0 + i * 0.1, message.format(i=i))
+
+
+def test_parse_timestamp():
+    assert parse_timestamp("2024-01-01T00:01:00Z boom") == 1704067260.0
+    assert parse_timestamp("2024-01-01 00:01:00,500 boom") == 1704067260.5
+    assert parse_timestamp("[1704067260] boom") == 1704067260.0
+    assert parse_timestamp("no time here") is None
+
+
+def test_message_template():
+    line = "2024-01-01T00:00:00Z ERROR user 42 timeout after 30ms"
+    assert message_template(line) == "error user <var> timeout after <var>"
+
+
+def test_burst_is_reported_with_exemplars():
+    counts = [3, 4, 3, 4] * 10 + [60] + [3, 4] * 3
+    result = LogAgent().analyze_rates(_minutes(counts), interval=60)
+    (anomaly,) = result["anomalies"]
+    assert anomaly["key"] == "severity:error"
+    assert anomaly["interval_start"] == 40 * 60.0
+    assert anomaly["count"] == 60
+    assert len(anomaly["exemplars"]) == 3
+    assert result["summary"]["intervals"] == len(counts)
+
+
+def test_drops_are_ignored_unless_requested():
+    counts = [20, 21] * 20 + [0, 0] + [20, 21] * 2
+    lines = list(_minutes(counts))
+    assert LogAgent().analyze_rates(lines)["anomalies"] == []
+    report = LogAgent().analyze_rates(lines, increases_only=False)
+    assert report["anomalies"][0]["count"] == 0
+
+
+def test_gap_is_capped():
+    pipeline = LogRatePipeline(interval=60, max_gap=10)
+    list(pipeline.run([(0.0, "ERROR a"), (86400.0, "ERROR b")]))
+    # primo intervallo + 10 vuoti + ultimo intervallo
+    assert pipeline.intervals == 12
+
+
+def test_template_keys_are_bounded():
+    lines = [(float(i), f"ERROR kind{chr(97 + i % 26)} failed") for i in range(26)]
+    pipeline = LogRatePipeline(by="template", max_keys=5)
+    list(pipeline.run(lines))
+    assert pipeline.summary()["keys"] == 6
+    assert OVERFLOW_KEY in pipeline.to_dict()
+
+
+def test_lines_without_timestamp_inherit_last():
+    pipeline = LogRatePipeline(interval=60)
+    pipeline.feed("2024-01-01T00:00:10Z ERROR boom")
+    pipeline.feed("Traceback: ERROR inner")
+    assert pipeline.events == 2
+    assert pipeline.flush() == []
+    assert pipeline.intervals == 1
+
+
+def test_checkpoint_restore():
+    counts = [3, 4] * 20
+    first = LogRatePipeline()
+    list(first.run(_minutes(counts)))
+    restored = LogRatePipeline().restore(first.to_dict())
+    assert restored.to_dict() == first.to_dict()
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        LogRatePipeline(interval=0)
+    with pytest.raises(ValueError):
+        LogRatePipeline(by="nope")
@@ -0,0 +1,62 @@
+import array
+import random
+
+import pytest
+
+from ice_ai.agents.domain.ml import MLAgent
+
+np = pytest.importorskip("numpy")
+
+
+def _series(seed, n, ints=False):
+    rng = random.Random(seed)
+    values = [rng.gauss(0, 1) * 10 ** rng.randint(-3, 8) for _ in range(n)]
+    values[n // 2] = 1e12
+    return [int(v) for v in values] if ints else values
+
+
+@pytest.mark.parametrize("ints", [False, True])
+@pytest.mark.parametrize("n", [3, 300, 70000])
+def test_backends_are_identical(n, ints):
+    # stesso ordine di somma: risultati identici, non solo vicini
+    values = _series(n, n, ints)
+    agent = MLAgent()
+    python = agent.detect_anomalies(values, backend="python")
+    assert agent.detect_anomalies(values, backend="numpy") == python
+    assert agent.detect_anomalies(values) == python
+    assert MLAgent._zscore_numpy(values, 3.0) == MLAgent._zscore_python(
+        values, 3.0
+    )
+
+
+def test_buffer_inputs_match_list():
+    values = _series(1, 1000)
+    agent = MLAgent()
+    expected = agent.detect_anomalies(values, backend="python")
+    for data in (
+        np.array(values),
+        array.array("d", values),
+        memoryview(array.array("d", values)),
+    ):
+        assert agent.detect_anomalies(data) == expected
+
+
+def test_flagged_indices_and_severity():
+    values = [1.0] * 500 + [50.0] + [1.0] * 499
+    result = MLAgent().detect_anomalies(values, backend="numpy")
+    (anomaly,) = result["anomalies"]
+    assert anomaly["index"] == 500
+    assert anomaly["severity"] == "error"
+    assert anomaly["description"] == "Value 50.0 deviates from mean"
+
+
+def test_constant_and_empty_series():
+    agent = MLAgent()
+    assert agent.detect_anomalies([])["summary"]["mean"] is None
+    flat = agent.detect_anomalies(np.ones(1000))
+    assert flat["anomalies"] == [] and flat["summary"]["std"] == 0
+
+
+def test_two_dimensional_input_is_rejected():
+    with pytest.raises(ValueError):
+        MLAgent().detect_anomalies(np.ones((10, 30)))
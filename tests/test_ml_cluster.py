@@ -0,0 +1,82 @@
+import pytest
+
+from ice_ai.agents.domain.ml import MLAgent
+
+np = pytest.importorskip("numpy")
+
+from ice_ai.agents.domain.ml_cluster import (  # noqa: E402
+    MiniBatchKMeans,
+    dense_batch,
+    hash_text_batches,
+    hash_text_features,
+    text_tokens,
+)
+
+
+TEXTS = (
+    [f"request {i} took {i * 7}ms" for i in range(40)]
+    + [f"user {i} logged in from 10.0.0.{i}" for i in range(40)]
+    + [f"disk /dev/sd{c} is full" for c in "abcdefgh" * 5]
+)
+
+
+def _blobs(seed=0):
+    rng = np.random.default_rng(seed)
+    centers = np.array([[0.0, 0.0], [10.0, 10.0], [0.0, 10.0]])
+    return np.vstack([c + rng.normal(size=(200, 2)) for c in centers])
+
+
+def test_text_tokens_mask_numbers():
+    assert text_tokens("Took 12ms, id=a1") == ["took", "<var>", "id", "<var>"]
+
+
+def test_sparse_batches_match_dense_features():
+    dense = hash_text_features(TEXTS, 64)
+    batches = hash_text_batches(TEXTS, 64, batch_size=16)
+    assert [b[0] for b in batches] == [16] * 7 + [8]
+    assert np.array_equal(
+        np.vstack([dense_batch(b, 64) for b in batches]), dense
+    )
+    # solo le feature presenti: molto meno di n x dims
+    assert sum(b[3].size for b in batches) < dense.size / 4
+
+
+def test_minibatch_kmeans_finds_blobs():
+    X = _blobs()
+    model = MiniBatchKMeans(3, seed=0)
+    model.fit_batches([X[i::4] for i in range(4)], epochs=5)
+    labels = model.predict(X)
+    # ogni blob in un solo cluster, blob diversi in cluster diversi
+    groups = [set(labels[i:i + 200].tolist()) for i in (0, 200, 400)]
+    assert all(len(g) == 1 for g in groups)
+    assert len(set().union(*groups)) == 3
+
+
+def test_round_trip(tmp_path):
+    model = MiniBatchKMeans(3, seed=0).partial_fit(_blobs())
+    path = str(tmp_path / "model.json")
+    model.save(path)
+    loaded = MiniBatchKMeans.load(path)
+    assert np.array_equal(loaded.predict(_blobs(1)), model.predict(_blobs(1)))
+
+
+def test_cluster_texts_groups_by_shape():
+    # righe di log interleaved: il primo blocco inizializza k-means++
+    texts = [TEXTS[g * 40 + i] for i in range(40) for g in range(3)]
+    result = MLAgent().cluster_texts(texts, 3, batch_size=16, seed=0)
+    labels = result["labels"]
+    assert [len(set(labels[g::3])) for g in range(3)] == [1, 1, 1]
+    assert sorted(c["size"] for c in result["clusters"]) == [40, 40, 40]
+    assert result["summary"]["rows"] == len(texts)
+    assert "centroids" not in result
+
+
+def test_cluster_numeric_rows():
+    result = MLAgent().cluster(_blobs(), 3, batch_size=128, seed=0)
+    assert sorted(result["summary"]["sizes"]) == [200, 200, 200]
+    assert len(result["centroids"]) == 3
+
+
+def test_first_batch_smaller_than_k():
+    with pytest.raises(ValueError):
+        MiniBatchKMeans(5).partial_fit(np.zeros((2, 3)))
@@ -0,0 +1,83 @@
+import pytest
+
+from ice_ai.agents.domain.ml import MLAgent
+
+np = pytest.importorskip("numpy")
+
+from ice_ai.agents.domain.ml_multivariate import (  # noqa: E402
+    MahalanobisDetector,
+    chi2_quantile,
+)
+
+
+def _rows(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    cov = [[1.0, 0.8, 0.0], [0.8, 1.0, 0.0], [0.0, 0.0, 2.0]]
+    return rng.multivariate_normal([10, 20, 30], cov, size=n)
+
+
+def _reference(X, rows):
+    diff = rows - X.mean(axis=0)
+    inv = np.linalg.inv(np.cov(X, rowvar=False, bias=True))
+    return np.sqrt(np.einsum("ij,jk,ik->i", diff, inv, diff))
+
+
+def test_chi2_quantile():
+    # valori tabulati a 3 gradi di libertà (Wilson-Hilferty: entro il 2%)
+    assert chi2_quantile(0.5, 3) == pytest.approx(2.366, rel=0.02)
+    assert chi2_quantile(0.999, 3) == pytest.approx(16.27, rel=0.02)
+
+
+def test_score_matches_reference():
+    X = _rows()
+    detector = MahalanobisDetector().fit(X)
+    assert np.allclose(detector.score(X[:50]), _reference(X, X[:50]))
+
+
+@pytest.mark.parametrize("chunk", [1, 500])
+def test_incremental_updates_match_refit(chunk):
+    X = _rows()
+    detector = MahalanobisDetector().fit(X[:100])
+    for start in range(100, len(X), chunk):
+        detector.update_many(X[start:start + chunk])
+    refit = MahalanobisDetector().fit(X)
+    assert detector.n == len(X)
+    assert np.allclose(detector.mean, refit.mean)
+    assert np.allclose(detector.cov, refit.cov)
+    assert np.allclose(detector._inv, refit._inv, atol=1e-6)
+
+
+def test_correlated_outlier_is_flagged():
+    X = _rows()
+    # valori singolarmente normali, ma contro la correlazione 0.8
+    probe = np.array([[11.5, 18.5, 30.0], [11.0, 21.0, 30.0]])
+    detector = MahalanobisDetector(feature_names=["cpu", "lat", "err"]).fit(X)
+    (anomaly,) = detector.detect(probe, start_index=7)
+    assert anomaly.index == 7
+    assert "top feature" in anomaly.description
+
+
+def test_robust_fit_ignores_contamination():
+    X = _rows()
+    X[:100] = [50.0, 0.0, 30.0]
+    plain = MahalanobisDetector().fit(X)
+    robust = MahalanobisDetector().fit(X, robust=True)
+    assert np.allclose(robust.mean, [10, 20, 30], atol=0.2)
+    assert abs(plain.mean[0] - 10) > 1
+    assert len(robust.detect(X[:100])) == 100
+
+
+def test_detect_with_update_skips_outliers():
+    X = _rows()
+    detector = MahalanobisDetector().fit(X[:1000])
+    batch = np.vstack([X[1000:1100], [[100.0, 100.0, 100.0]]])
+    assert [a.index for a in detector.detect(batch, update=True)] == [100]
+    assert detector.n == 1100
+
+
+def test_agent_summary():
+    result = MLAgent().detect_anomalies_multivariate(_rows(500).tolist())
+    assert result["summary"]["rows"] > 0
+    assert result["summary"]["dims"] == 3
+    with pytest.raises(ValueError):
+        MahalanobisDetector().score([[1.0, 2.0]])
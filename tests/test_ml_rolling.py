@@ -0,0 +1,78 @@
+import math
+import random
+import statistics
+
+import pytest
+
+from ice_ai.agents.domain.ml import MLAgent
+from ice_ai.agents.domain.ml_rolling import (
+    IndexableSkiplist,
+    RollingRobustDetector,
+    RollingWindow,
+    rolling_quantiles,
+)
+
+
+def _median_abs_deviation(window):
+    median = statistics.median(window)
+    return statistics.median(abs(v - median) for v in window)
+
+
+def test_skiplist_stays_sorted():
+    rng = random.Random(0)
+    skiplist, reference = IndexableSkiplist(64), []
+    for _ in range(2000):
+        value = rng.randint(0, 50)
+        if reference and rng.random() < 0.4:
+            value = rng.choice(reference)
+            skiplist.remove(value)
+            reference.remove(value)
+        else:
+            skiplist.insert(value)
+            reference.append(value)
+        assert len(skiplist) == len(reference)
+    reference.sort()
+    assert list(skiplist) == reference
+    assert [skiplist[i] for i in range(len(reference))] == reference
+    assert skiplist[-1] == reference[-1]
+
+
+def test_window_median_and_mad_match_brute_force():
+    rng = random.Random(1)
+    values = [rng.gauss(0, 1) for _ in range(500)]
+    rolling = RollingWindow(25)
+    for i, value in enumerate(values):
+        rolling.push(value)
+        window = values[max(0, i - 24):i + 1]
+        assert rolling.median() == pytest.approx(statistics.median(window))
+        assert rolling.mad() == pytest.approx(_median_abs_deviation(window))
+
+
+def test_window_rejects_nan():
+    with pytest.raises(ValueError):
+        RollingWindow(3).push(math.nan)
+    with pytest.raises(ValueError):
+        RollingWindow(3).median()
+
+
+def test_rolling_quantiles_skip_nan():
+    out = rolling_quantiles([math.nan, 1.0, 2.0, math.nan, 3.0], 2, [0.5])
+    assert math.isnan(out[0][0])
+    assert [row[0] for row in out[1:]] == [1.0, 1.5, 1.5, 2.5]
+
+
+def test_detector_ignores_outliers_in_baseline():
+    values = [10.0 + (i % 5) for i in range(200)]
+    values[50] = values[120] = 1000.0
+    detector = RollingRobustDetector(window=50, threshold=3.5)
+    anomalies = detector.update_many(values + [math.nan])
+    assert [a.index for a in anomalies] == [50, 120]
+    assert detector.index == 201
+
+
+def test_agent_robust_summary():
+    result = MLAgent().detect_anomalies_robust(
+        [1.0, 2.0, 3.0] * 20 + [100.0], window=30
+    )
+    assert [a["index"] for a in result["anomalies"]] == [60]
+    assert result["summary"]["size"] == 30
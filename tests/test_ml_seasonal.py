@@ -0,0 +1,86 @@
+import json
+import math
+
+import pytest
+
+from ice_ai.agents.domain.ml import MLAgent
+from ice_ai.agents.domain.ml_seasonal import DetectorBank, HoltWintersDetector
+
+
+PERIOD = 24
+
+
+def _daily(days, spike=None):
+    values = [
+        100 + 30 * math.sin(2 * math.pi * (i % PERIOD) / PERIOD) + (i % 3)
+        for i in range(days * PERIOD)
+    ]
+    if spike is not None:
+        values[spike] += 80
+    return values
+
+
+def test_seasonal_spike_is_flagged_once():
+    history = _daily(7)
+    live = _daily(3, spike=30)
+    detector = MLAgent().seasonal_detector(period=PERIOD, history=history)
+    anomalies = detector.update_many(live)
+    assert [a.index - len(history) for a in anomalies] == [30]
+    # il picco è limitato prima dell'update: la stagionalità non si sposta
+    assert detector.forecast() == pytest.approx(live[0], abs=5)
+
+
+def test_warm_up_matches_replay_index():
+    detector = HoltWintersDetector(period=PERIOD).warm_up(_daily(4))
+    assert detector.index == 4 * PERIOD
+    assert detector.update_many(_daily(2)) == []
+
+
+def test_ewma_tracks_level():
+    detector = MLAgent().ewma_detector(alpha=0.5)
+    detector.update_many([10.0] * 20 + [20.0] * 20)
+    assert detector.level == pytest.approx(20.0)
+    assert detector.trend == 0.0
+
+
+@pytest.mark.parametrize("bad", [math.nan, math.inf, -math.inf])
+def test_non_finite_values_are_skipped(bad):
+    values = _daily(6, spike=100)
+    clean = HoltWintersDetector(period=PERIOD)
+    expected = [a.index for a in clean.update_many(values)]
+
+    detector = HoltWintersDetector(period=PERIOD)
+    gaps = list(values)
+    gaps[50] = bad
+    flagged = [a.index for a in detector.update_many(gaps)]
+    assert flagged == expected
+    assert detector.index == len(values)
+    assert all(math.isfinite(v) for v in detector._state)
+    assert all(math.isfinite(v) for v in detector._season)
+
+
+def test_warm_up_with_missing_values():
+    history = _daily(4)
+    history[5] = math.nan
+    detector = HoltWintersDetector(period=PERIOD).warm_up(history)
+    assert math.isfinite(detector.forecast())
+    assert detector.update_many(_daily(1, spike=10))[0].index == 4 * PERIOD + 10
+
+
+def test_bank_round_trip():
+    bank = MLAgent().detector_bank(period=PERIOD)
+    bank.warm_up(("api", 1), _daily(3))
+    bank.update(7, 1.0)
+    bank.update("7", 2.0)
+    restored = DetectorBank(lambda: HoltWintersDetector(period=PERIOD))
+    restored.restore(json.loads(json.dumps(bank.to_dict())))
+    assert len(restored) == 3
+    assert restored.get(("api", 1)).to_dict() == bank.get(("api", 1)).to_dict()
+    assert restored.get("7").level == 2.0
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        HoltWintersDetector(period=1)
+    with pytest.raises(ValueError):
+        HoltWintersDetector(alpha=0)
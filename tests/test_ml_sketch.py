@@ -0,0 +1,73 @@
+import json
+import random
+
+import pytest
+
+from ice_ai.agents.domain.ml import MLAgent
+from ice_ai.agents.domain.ml_sketch import KLLSketch, merge_sketches
+
+
+N = 100_000
+
+
+def _rank_error(sketch, ordered):
+    worst = 0.0
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        value = sketch.quantile(q)
+        true_rank = ordered.index(value) / len(ordered)
+        worst = max(worst, abs(true_rank - q))
+    return worst
+
+
+@pytest.fixture(scope="module")
+def values():
+    rng = random.Random(0)
+    return [rng.random() for _ in range(N)]
+
+
+def test_quantiles_within_rank_error(values):
+    sketch = KLLSketch(200, seed=1).update_many(values)
+    assert sketch.n == N
+    assert (sketch.min, sketch.max) == (min(values), max(values))
+    # memoria sublineare, peso totale conservato dalle compattazioni
+    assert sum(len(level) for level in sketch._levels) < 2000
+    assert sketch._weighted()[1][-1] == N
+    assert _rank_error(sketch, sorted(values)) < 0.02
+
+
+def test_merge_matches_single_sketch(values):
+    parts = [
+        KLLSketch(200, seed=i).update_many(values[i::4]) for i in range(4)
+    ]
+    merged = merge_sketches(parts)
+    assert merged.n == N
+    assert _rank_error(merged, sorted(values)) < 0.02
+    # gli sketch di partenza non cambiano
+    assert sum(part.n for part in parts) == N
+
+
+def test_round_trip(values):
+    sketch = KLLSketch(64, seed=3).update_many(values[:5000])
+    restored = KLLSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+    assert restored.quantile(0.5) == sketch.quantile(0.5)
+    assert restored.rank(0.3) == sketch.rank(0.3)
+
+
+def test_empty_and_invalid():
+    sketch = KLLSketch()
+    assert sketch.quantile(0.5) is None and sketch.rank(1.0) == 0.0
+    with pytest.raises(ValueError):
+        KLLSketch(4)
+
+
+def test_score_series_rank_is_outlier_resistant():
+    values = [float(i) for i in range(100)] + [1e9]
+    agent = MLAgent()
+    # con "max" un outlier schiaccia tutti gli altri score verso 0
+    assert agent.score_series(values)[99] < 1e-6
+    ranks = agent.score_series(values, method="rank")
+    assert ranks[50] == pytest.approx(0.5, abs=0.02)
+    quantile = agent.score_series(values, method="quantile")
+    assert quantile[0] == 0.0 and quantile[-1] == 1.0
+    with pytest.raises(ValueError):
+        agent.score_series(values, method="nope")
@@ -0,0 +1,89 @@
+import json
+import math
+import random
+import statistics
+
+import pytest
+
+from ice_ai.agents.domain.ml_stream import StreamingDetector
+
+
+def _values(n=500, seed=0):
+    rng = random.Random(seed)
+    return [rng.gauss(10, 2) for _ in range(n)]
+
+
+def test_cumulative_matches_population_stats():
+    values = _values()
+    detector = StreamingDetector()
+    detector.update_many(values)
+    assert detector.count == len(values)
+    assert detector.mean == pytest.approx(statistics.fmean(values))
+    assert detector.std == pytest.approx(statistics.pstdev(values))
+
+
+def test_window_tracks_last_points():
+    values = _values()
+    detector = StreamingDetector(mode="window", window=50)
+    detector.update_many(values)
+    assert detector.count == 50
+    assert detector.mean == pytest.approx(statistics.fmean(values[-50:]))
+    assert detector.std == pytest.approx(statistics.pstdev(values[-50:]))
+
+
+def test_point_is_scored_before_being_added():
+    detector = StreamingDetector(min_samples=10)
+    assert detector.update_many([1.0, 2.0] * 10) == []
+    anomaly = detector.update(100.0)
+    assert anomaly.index == 20 and anomaly.severity == "error"
+
+
+def test_decay_follows_level_shift():
+    detector = StreamingDetector(mode="decay", alpha=0.2)
+    detector.update_many([0.0, 1.0] * 20 + [50.0, 51.0] * 20)
+    assert detector.mean == pytest.approx(50.5, abs=1)
+
+
+def test_checkpoint_round_trip():
+    values = _values()
+    detector = StreamingDetector(mode="window", window=30)
+    detector.update_many(values[:250])
+    restored = StreamingDetector.from_dict(
+        json.loads(json.dumps(detector.to_dict()))
+    )
+    assert restored.update_many(values[250:]) == detector.update_many(
+        values[250:]
+    )
+    assert restored.summary() == detector.summary()
+
+
+@pytest.mark.parametrize("mode, options", [
+    ("cumulative", {}),
+    ("decay", {"alpha": 0.1}),
+    ("window", {"window": 20}),
+])
+def test_non_finite_values_are_skipped(mode, options):
+    values = _values(100)
+    clean = StreamingDetector(mode=mode, **options)
+    expected = [
+        a.index + 3 if a.index >= 50 else a.index
+        for a in clean.update_many(values)
+    ]
+
+    detector = StreamingDetector(mode=mode, **options)
+    gaps = values[:50] + [math.nan, math.inf, -math.inf] + values[50:]
+    # gli indici contano anche i punti mancanti
+    assert [a.index for a in detector.update_many(gaps)] == expected
+    assert detector.index == len(gaps)
+    assert (detector.count, detector.mean, detector.std) == (
+        clean.count, clean.mean, clean.std
+    )
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        StreamingDetector(mode="nope")
+    with pytest.raises(ValueError):
+        StreamingDetector(mode="decay")
+    with pytest.raises(ValueError):
+        StreamingDetector(mode="window", window=1)
@@ -0,0 +1,106 @@
+import pytest
+
+from ice_ai.agents.domain import refactor_batch
+from ice_ai.agents.domain.refactor import RefactorAgent
+from ice_ai.agents.domain.refactor_batch import (
+    PatchSetSummary,
+    group_requests,
+    read_text,
+)
+from ice_ai.agents.domain.refactor_codemod import RenameSymbol
+from ice_ai.agents.domain.refactor_store import ContentStore
+
+
+def _project(root, n=6):
+    paths = []
+    for i in range(n):
+        path = root / f"mod{i}.py"
+        path.write_bytes(f"def old():\r\n    return {i}\r\n".encode())
+        paths.append(str(path))
+    (root / "empty.py").write_text("")
+    paths.append(str(root / "empty.py"))
+    return paths
+
+
+def _requests(paths):
+    for path in paths:
+        yield path, "tidy"
+        yield {"path": path, "codemod": RenameSymbol("old", "new")}
+
+
+def _comparable(result):
+    return [
+        {k: v for k, v in p.items() if k != "summary"}
+        for p in result["proposals"]
+    ]
+
+
+def test_group_requests_reads_each_file_once():
+    jobs = group_requests(
+        [("a.py", "x"), ("b.py", "y"), {"path": "a.py", "goal": "z"}],
+        sources={"b.py": "code"},
+    )
+    assert jobs == [("a.py", ["x", "z"], None), ("b.py", ["y"], "code")]
+
+
+def test_read_text_preserves_line_endings(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_bytes(b"\xef\xbb\xbfx = 1\r\ny = 2\n")
+    assert read_text(str(path)) == "x = 1\r\ny = 2\n"
+
+
+def test_in_process_batch(tmp_path):
+    paths = _project(tmp_path)
+    agent = RefactorAgent()
+    result = agent.propose_many(_requests(paths), workers=1)
+    summary = result["summary"]
+    assert summary["files"] == 7
+    assert summary["proposals"] == 14
+    assert summary["skipped"] == 2
+    assert summary["changed"] == 12
+    assert result["ok"]
+
+    renamed = [
+        p for p in result["proposals"]
+        if p["ok"] and p["goal"] == RenameSymbol("old", "new").describe()
+    ]
+    assert len(renamed) == 6
+    content = agent.materialize(renamed[0]["after_ref"])["content"]
+    assert content.startswith("def new():\r\n")
+
+
+@pytest.mark.parametrize("disk", [False, True])
+def test_pool_matches_in_process(tmp_path, monkeypatch, disk):
+    paths = _project(tmp_path)
+    serial = RefactorAgent().propose_many(_requests(paths), workers=1)
+
+    store_path = str(tmp_path / "store") if disk else None
+    agent = RefactorAgent(store=ContentStore(path=store_path))
+    monkeypatch.setattr(refactor_batch, "POOL_MIN_FILES", 0)
+    pooled = agent.propose_many(_requests(paths), workers=2, chunk_size=2)
+    assert _comparable(pooled) == _comparable(serial)
+    # i contenuti dei worker sono nello store del chiamante
+    for proposal in pooled["proposals"]:
+        if proposal["ok"]:
+            assert proposal["before_ref"] in agent.store
+            assert proposal["after_ref"] in agent.store
+
+
+def test_unreadable_file_fails_each_goal(tmp_path):
+    missing = str(tmp_path / "missing.py")
+    result = RefactorAgent().propose_many(
+        [(missing, "a"), (missing, "b")], workers=1
+    )
+    assert [p["error"] for p in result["proposals"]] == ["read_failed"] * 2
+    assert result["summary"]["errors"] == {"read_failed": 2}
+    assert not result["ok"]
+
+
+def test_summary_totals():
+    summary = PatchSetSummary().extend([
+        {"ok": True, "filename": "a", "diff_stats": {"hunks": 1, "added": 2}},
+        {"ok": True, "filename": "a", "diff_stats": {"hunks": 0}},
+        {"ok": False, "filename": "b", "error": "too_large"},
+    ]).to_dict()
+    assert (summary["files"], summary["changed"], summary["added"]) == (2, 1, 2)
+    assert summary["errors"] == {"too_large": 1}
@@ -0,0 +1,212 @@
+import pytest
+
+from ice_ai.agents.domain.refactor_codemod import (
+    MoveImport,
+    RenameSymbol,
+    ReplaceCall,
+    codemod_from_dict,
+)
+
+
+# ============================================================
+# RENAME
+# ============================================================
+
+def test_rename_definitions_and_references():
+    code = "def old():\n    return 1\n\nx = old()\n"
+    assert RenameSymbol("old", "new").apply(code) == (
+        "def new():\n    return 1\n\nx = new()\n"
+    )
+
+
+def test_rename_from_import_and_module_attribute():
+    code = "from m import foo\nfoo(1)\nimport m\nm.foo\n"
+    assert RenameSymbol("foo", "bar").apply(code) == (
+        "from m import bar\nbar(1)\nimport m\nm.bar\n"
+    )
+
+
+def test_rename_plain_import_binds_alias():
+    code = "import old\nx = old.f()\n"
+    assert RenameSymbol("old", "new").apply(code) == (
+        "import old as new\nx = new.f()\n"
+    )
+
+
+def test_rename_dotted_import_is_rejected():
+    with pytest.raises(ValueError):
+        RenameSymbol("foo", "bar").apply("import foo.sub\nfoo.sub.f()\n")
+
+
+def test_rename_keeps_offsets_after_form_feed():
+    # \f non è un separatore di riga per il parser: le colonne restano
+    # quelle della riga fisica
+    code = "x = 1\n\x0cdef old(): pass\nold()\n"
+    assert RenameSymbol("old", "new").apply(code) == (
+        "x = 1\n\x0cdef new(): pass\nnew()\n"
+    )
+
+
+def test_rename_leaves_attributes_of_other_objects():
+    code = "class A:\n    old = 1\n\nA().old\n"
+    assert RenameSymbol("old", "new").apply(code) == code
+
+
+def test_rename_except_handler_binding():
+    code = "try:\n    pass\nexcept (E,\n        F) as old:\n    print(old)\n"
+    assert RenameSymbol("old", "new").apply(code) == code.replace("old", "new")
+
+
+@pytest.mark.parametrize("pattern", [
+    "{'k': old}",
+    "{'k': 1, **old}",
+    "[1, *old]",
+    "old",
+    "[1] as old",
+])
+def test_rename_match_bindings(pattern):
+    code = f"match x:\n    case {pattern}:\n        print(old)\n"
+    assert RenameSymbol("old", "new").apply(code) == code.replace("old", "new")
+
+
+def test_rename_deeply_nested_source_is_value_error():
+    code = "x = " + "-" * 100000 + "a\n"
+    with pytest.raises(ValueError):
+        RenameSymbol("a", "b").apply(code)
+
+
+def test_rename_invalid_identifier():
+    with pytest.raises(ValueError):
+        RenameSymbol("foo.sub", "x")
+
+
+# ============================================================
+# MOVE IMPORT
+# ============================================================
+
+def test_move_import_splits_statement():
+    code = "from pkg.x import a, b\nprint(a, b)\n"
+    assert MoveImport("a", "pkg.x", "pkg.y").apply(code) == (
+        "from pkg.x import b\nfrom pkg.y import a\nprint(a, b)\n"
+    )
+
+
+def test_move_import_keeps_indentation():
+    code = "def f():\n    from pkg.x import a\n    return a\n"
+    assert MoveImport("a", "pkg.x", "pkg.y").apply(code) == (
+        "def f():\n    from pkg.y import a\n    return a\n"
+    )
+
+
+def test_move_import_keeps_comments_in_parentheses():
+    code = (
+        "from pkg.x import (  # note\n"
+        "    a,  # about a\n"
+        "    b,\n"
+        "    c,  # about c\n"
+        ")\n"
+    )
+    assert MoveImport("a", "pkg.x", "pkg.y").apply(code) == (
+        "from pkg.x import (  # note\n"
+        "    # about a\n"
+        "    b,\n"
+        "    c,  # about c\n"
+        ")\n"
+        "from pkg.y import a\n"
+    )
+    assert MoveImport("b", "pkg.x", "pkg.y").apply(code) == (
+        "from pkg.x import (  # note\n"
+        "    a,  # about a\n"
+        "    c,  # about c\n"
+        ")\n"
+        "from pkg.y import b\n"
+    )
+
+
+def test_move_import_last_name():
+    code = "from pkg.x import (\n    b,\n    a as z  # z\n)  # end\n"
+    assert MoveImport("a", "pkg.x", "pkg.y").apply(code) == (
+        "from pkg.x import (\n    b\n    # z\n)  # end\n"
+        "from pkg.y import a as z\n"
+    )
+    code = "from pkg.x import b, a\n"
+    assert MoveImport("a", "pkg.x", "pkg.y").apply(code) == (
+        "from pkg.x import b\nfrom pkg.y import a\n"
+    )
+
+
+def test_move_import_all_names_keeps_statement():
+    code = "from pkg . x import (  # note\n    a,  # why\n    a as b,\n)\n"
+    assert MoveImport("a", "pkg.x", "pkg.y").apply(code) == (
+        "from pkg.y import (  # note\n    a,  # why\n    a as b,\n)\n"
+    )
+
+
+def test_move_import_continuations_and_semicolons():
+    code = "from pkg.x import b, \\\n    a\nx = 1\n"
+    result = MoveImport("a", "pkg.x", "pkg.y").apply(code)
+    assert result == "from pkg.x import b \\\n    \nfrom pkg.y import a\nx = 1\n"
+    compile(result, "<test>", "exec")
+
+    code = "if True: from pkg.x import a, b; c = 1\n"
+    assert MoveImport("a", "pkg.x", "pkg.y").apply(code) == (
+        "if True: from pkg.x import b; from pkg.y import a; c = 1\n"
+    )
+
+
+def test_move_import_ignores_relative_imports():
+    code = "from .x import a\n"
+    assert MoveImport("a", "x", "y").apply(code) == code
+
+
+# ============================================================
+# REPLACE CALL
+# ============================================================
+
+def test_replace_call_adds_missing_import():
+    code = "import os\nos.path.join('a', 'b')\n"
+    codemod = ReplaceCall(
+        "os.path.join", "join", add_import="from os.path import join"
+    )
+    assert codemod.apply(code) == (
+        "import os\nfrom os.path import join\njoin('a', 'b')\n"
+    )
+
+
+def test_replace_call_without_matches_adds_nothing():
+    code = "import os\n"
+    codemod = ReplaceCall("a.b", "c", add_import="import c")
+    assert codemod.apply(code) == code
+
+
+def test_replace_call_invalid_import():
+    with pytest.raises(ValueError):
+        ReplaceCall("a", "b", add_import="x = (")
+
+
+# ============================================================
+# SERIALIZATION
+# ============================================================
+
+@pytest.mark.parametrize("codemod", [
+    RenameSymbol("a", "b"),
+    MoveImport("a", "pkg.x", "pkg.y"),
+    ReplaceCall("a.b", "c", add_import="import c"),
+])
+def test_codemod_round_trip(codemod):
+    assert codemod_from_dict(codemod.to_dict()) == codemod
+
+
+@pytest.mark.parametrize("data", [
+    None,
+    "rename",
+    {"op": "nope"},
+    {"op": "rename", "old": "a"},
+    {"op": "rename", "old": 1, "new": "x"},
+    {"op": "rename", "old": "a", "new": "b", "extra": 1},
+    {"op": "move_import", "name": "a", "source": "x..y", "target": "z"},
+    {"op": "replace_call", "old": "a", "new": "b", "add_import": 3},
+])
+def test_codemod_from_dict_invalid(data):
+    with pytest.raises(ValueError):
+        codemod_from_dict(data)
@@ -0,0 +1,121 @@
+import difflib
+import random
+import time
+
+import pytest
+
+from ice_ai.agents.domain.refactor_diff import (
+    diff_opcodes,
+    diff_stats,
+    split_lines,
+    unified_diff,
+)
+
+
+def _replay(a, b, opcodes):
+    # gli opcode coprono entrambi i lati, in ordine, e ricostruiscono b
+    out, i, j = [], 0, 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+        out += b[j1:j2]
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+    return out
+
+
+def _changed(opcodes):
+    return sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag != "equal")
+
+
+def test_split_lines():
+    assert split_lines("a\nb\r\nc\rd") == ["a\n", "b\r\n", "c\r", "d"]
+    assert split_lines("a\x0cb\n") == ["a\x0cb\n"]
+    assert split_lines("") == []
+
+
+def test_unified_diff_matches_difflib():
+    a = [f"line {i}\n" for i in range(30)]
+    b = list(a)
+    b[5] = "changed\n"
+    del b[20]
+    b.insert(25, "new\n")
+    assert list(unified_diff(a, b, "a", "b")) == list(
+        difflib.unified_diff(a, b, "a", "b")
+    )
+
+
+@pytest.mark.parametrize("algorithm", ["histogram", "myers"])
+def test_random_edits_replay(algorithm):
+    rng = random.Random(3)
+    for _ in range(500):
+        alphabet = rng.randint(1, 12)
+        a = [str(rng.randint(0, alphabet)) for _ in range(rng.randint(0, 40))]
+        b = list(a)
+        for _ in range(rng.randint(0, 6)):
+            op = rng.random()
+            if op < 0.3 and b:
+                del b[rng.randrange(len(b))]
+            elif op < 0.6:
+                b.insert(rng.randint(0, len(b)), str(rng.randint(0, alphabet)))
+            elif b:
+                b[rng.randrange(len(b))] = str(rng.randint(0, alphabet))
+        assert _replay(a, b, diff_opcodes(a, b, algorithm)) == b
+
+
+def test_unique_lines_diff_is_minimal():
+    a = [f"line {i}\n" for i in range(2000)]
+    b = list(a)
+    for k in range(0, 2000, 7):
+        b[k] = f"changed {k}\n"
+    opcodes = diff_opcodes(a, b)
+    _replay(a, b, opcodes)
+    assert diff_stats(opcodes)["removed"] == len(range(0, 2000, 7))
+
+
+def test_unknown_algorithm():
+    with pytest.raises(ValueError):
+        diff_opcodes(["a"], ["b"], "nope")
+
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+
+def _best_of(runs, fn):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def test_benchmark_large_file_many_changes():
+    rng = random.Random(1)
+    a = [f"line {i}\n" for i in range(50000)]
+    b = list(a)
+    for k in rng.sample(range(len(a)), 1000):
+        b[k] = f"changed {k}\n"
+
+    opcodes = diff_opcodes(a, b)
+    assert _changed(opcodes) == 1000
+    # O(n + k log k): ~0.15 s qui; O(righe x modifiche) impiegava > 10 s
+    assert _best_of(2, lambda: diff_opcodes(a, b)) < 1.5
+
+
+def test_benchmark_codemod_rename_faster_than_difflib():
+    a = [
+        f"    value_{i} = old_name(x{i})\n" if i % 3 == 0
+        else f"    other_{i} = {i}\n"
+        for i in range(1200)
+    ]
+    b = [line.replace("old_name", "new_name") for line in a]
+
+    ours = _best_of(5, lambda: diff_opcodes(a, b))
+    reference = _best_of(
+        5, lambda: difflib.SequenceMatcher(None, a, b).get_opcodes()
+    )
+    assert _changed(diff_opcodes(a, b)) == 400
+    assert ours < reference
@@ -0,0 +1,144 @@
+import difflib
+
+import pytest
+
+from ice_ai.agents.domain import refactor_patch
+from ice_ai.agents.domain.refactor import RefactorAgent
+from ice_ai.agents.domain.refactor_patch import (
+    LineTable,
+    check_hunks,
+    hunks_from_texts,
+    parse_unified,
+    summarize,
+)
+
+
+BEFORE = "".join(f"line {i}\n" for i in range(1, 21))
+AFTER = BEFORE.replace("line 10\n", "line ten\n")
+
+
+def _check(current, **kwargs):
+    hunks = hunks_from_texts(BEFORE, AFTER)
+    results, lines = check_hunks(hunks, LineTable(current), **kwargs)
+    return results, summarize(results), lines
+
+
+# ============================================================
+# HUNKS
+# ============================================================
+
+def test_hunks_from_texts():
+    (hunk,) = hunks_from_texts(BEFORE, AFTER)
+    assert (hunk.old_start, hunk.old_lines) == (7, 7)
+    assert (hunk.lead, hunk.trail) == (3, 3)
+    assert hunk.before[3] == "line 10\n"
+    assert hunk.after[3] == "line ten\n"
+
+
+def test_hunks_from_identical_texts():
+    assert hunks_from_texts(BEFORE, BEFORE) == []
+
+
+def test_hunks_split_on_lone_carriage_return():
+    (hunk,) = hunks_from_texts("a\rb\n", "a\rc\n")
+    assert hunk.before == ("a\r", "b\n")
+    assert hunk.after == ("a\r", "c\n")
+    assert hunk.lead == 1
+
+
+def test_parse_unified_matches_hunks_from_texts():
+    diff = "".join(difflib.unified_diff(
+        BEFORE.splitlines(True), AFTER.splitlines(True), "a", "b"
+    ))
+    assert parse_unified(diff) == hunks_from_texts(BEFORE, AFTER)
+
+
+def test_parse_unified_no_newline_at_end_of_file():
+    diff = (
+        "--- a\n+++ b\n@@ -1 +1 @@\n"
+        "-x\n\\ No newline at end of file\n"
+        "+y\n\\ No newline at end of file\n"
+    )
+    (hunk,) = parse_unified(diff)
+    assert hunk.before == ("x",)
+    assert hunk.after == ("y",)
+
+
+# ============================================================
+# CHECK
+# ============================================================
+
+def test_check_clean():
+    results, status, lines = _check(BEFORE)
+    assert status == "clean"
+    assert results[0].line == 7
+    assert "".join(lines) == AFTER
+
+
+def test_check_offset():
+    results, status, lines = _check("extra\nextra\n" + BEFORE)
+    assert status == "offset"
+    assert (results[0].line, results[0].offset) == (9, 2)
+    assert "".join(lines) == "extra\nextra\n" + AFTER
+
+
+def test_check_fuzz():
+    current = BEFORE.replace("line 7\n", "LINE 7\n")
+    results, status, lines = _check(current)
+    assert status == "fuzz"
+    assert results[0].fuzz == 1
+    assert "".join(lines) == current.replace("line 10\n", "line ten\n")
+
+
+def test_check_already_applied():
+    results, status, lines = _check(AFTER)
+    assert status == "already_applied"
+    assert "".join(lines) == AFTER
+
+
+def test_check_failed_without_base():
+    current = BEFORE.replace("line 10\n", "line X\n")
+    results, status, lines = _check(current)
+    assert status == "failed"
+    assert lines is None
+
+
+def test_check_conflict_with_base():
+    current = BEFORE.replace("line 10\n", "line X\n")
+    results, status, lines = _check(current, base=LineTable(BEFORE))
+    assert status == "conflict"
+    assert results[0].conflicts == ((10, 10),)
+    assert lines is None
+
+
+def test_check_three_way_follows_base_changes():
+    current = "new header\n" + BEFORE.replace("line 18\n", "changed\n")
+    results, status, lines = _check(current, base=LineTable(BEFORE))
+    assert status == "offset"
+    assert results[0].line == 8
+    assert "".join(lines) == current.replace("line 10\n", "line ten\n")
+
+
+@pytest.mark.parametrize("fuzz, status", [(0, "failed"), (1, "fuzz")])
+def test_check_fuzz_limit(fuzz, status):
+    current = BEFORE.replace("line 7\n", "LINE 7\n")
+    _, result, _ = _check(current, fuzz=fuzz)
+    assert result == status
+
+
+# ============================================================
+# DRY RUN
+# ============================================================
+
+def test_dry_run_reuses_proposal_hunks(monkeypatch):
+    agent = RefactorAgent()
+    proposal = agent.propose_ref(BEFORE, "goal")
+    # gli hunk vengono dagli opcode di propose_ref: nessun nuovo diff
+    monkeypatch.setattr(refactor_patch, "hunks_from_texts", None)
+    current = "extra\n" + BEFORE
+    report = agent.dry_run(proposal, current=current, with_result=True)
+    assert report["ok"] is True
+    expected = hunks_from_texts(BEFORE, agent.materialize(
+        proposal["after_ref"]
+    )["content"])
+    assert expected and len(report["hunks"]) == len(expected)
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from ice_ai.agents.domain.refactor import RefactorAgent
+from ice_ai.agents.domain.refactor_store import ContentStore
+
+
+CODE = "".join(f"x{i} = {i}\n" for i in range(200))
+
+
+def test_same_content_same_ref():
+    store = ContentStore()
+    ref = store.put("abc")
+    assert store.put("abc") == ref == ContentStore.ref("abc")
+    assert store.get(ref) == "abc"
+    assert store.stats()["dedup"] == 1
+    assert store.stats()["bytes"] == 3
+
+
+def test_lru_eviction_respects_budget():
+    store = ContentStore(max_bytes=10)
+    a = store.put("aaaa")
+    b = store.put("bbbb")
+    store.get(a)
+    c = store.put("cccc")
+    # "b" è il meno recente
+    assert b not in store and a in store and c in store
+    assert store.stats()["bytes"] <= 10
+    assert store.stats()["evictions"] == 1
+
+
+def test_put_all_keeps_group_together():
+    store = ContentStore(max_bytes=10)
+    store.put("zzzz")
+    before, after = store.put_all("aaaa", "bbbbb")
+    assert before in store and after in store
+
+
+def test_oversized_content_without_disk():
+    store = ContentStore(max_bytes=4)
+    ref = store.put("too large")
+    assert ref not in store
+    assert store.get(ref) is None
+
+
+def test_disk_tier_materializes_evicted(tmp_path):
+    path = str(tmp_path / "blobs")
+    store = ContentStore(max_bytes=4, path=path)
+    ref = store.put("long content\r\n")
+    assert store.stats()["blobs"] == 0
+    assert ref in store
+    assert store.get(ref) == "long content\r\n"
+    assert os.path.isfile(os.path.join(path, ref[:2], ref))
+    # un secondo store sulla stessa directory vede i blob
+    assert ContentStore(path=path).get(ref) == "long content\r\n"
+
+
+@pytest.mark.parametrize("ref", ["../../etc/passwd", "A" * 40, "ab", None])
+def test_malformed_refs_are_rejected(tmp_path, ref):
+    store = ContentStore(path=str(tmp_path))
+    assert store.get(ref) is None
+    assert ref not in store
+    result = RefactorAgent(store=store).materialize(ref)
+    assert result["error"] == "invalid_ref"
+
+
+def test_propose_ref_round_trip():
+    agent = RefactorAgent(inline_diff_bytes=64)
+    proposal = agent.propose_ref(CODE, "tidy")
+    assert "before" not in proposal and "after" not in proposal
+    assert proposal["diff_truncated"]
+    assert agent.materialize(proposal["before_ref"])["content"] == CODE
+    after = agent.materialize(proposal["after_ref"])["content"]
+    assert after.endswith(CODE)
+    full = agent.diff_of(proposal)
+    assert not full["truncated"]
+    assert full["diff"] == agent.propose(CODE, "tidy")["diff"]
+    assert proposal["diff_stats"]["added"] == 2
+
+
+def test_propose_ref_budgets():
+    agent = RefactorAgent(max_input_bytes=10)
+    assert agent.propose_ref(CODE, "tidy")["error"] == "too_large"
+    agent = RefactorAgent(store=ContentStore(max_bytes=100))
+    assert agent.propose_ref(CODE, "tidy")["error"] == "store_full"
+
+
+def test_unknown_ref():
+    agent = RefactorAgent()
+    result = agent.materialize(ContentStore.ref("never stored"))
+    assert result["error"] == "unknown_ref"
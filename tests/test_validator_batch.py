@@ -0,0 +1,110 @@
+from ice_ai.agents.domain import validator_batch
+from ice_ai.agents.domain.validator import ValidatorAgent
+from ice_ai.agents.domain.validator_batch import BatchSummary, normalize_targets
+from ice_ai.agents.domain.validator_cache import ValidationCache
+from ice_ai.agents.domain.validator_rules import BareExceptRule
+
+
+def _project(root, n=12):
+    for i in range(n):
+        (root / f"mod{i:02}.py").write_text(f"x = {i}\nprint(x)\n")
+    (root / "broken.py").write_text("def f(:\n")
+    (root / "__init__.py").write_text("")
+    (root / "latin.py").write_bytes(
+        b"# -*- coding: latin-1 -*-\ns = '\xe8'\n"
+    )
+    (root / "bare.py").write_text("try:\n    pass\nexcept:\n    pass\n")
+    (root / "config.json").write_text('{"a": [1, 2,]}')
+    return root
+
+
+def _strip(report):
+    report = dict(report)
+    report.pop("rule_metrics", None)
+    return report
+
+
+def test_normalize_targets():
+    scan = {"files": [
+        {"path": "a.py", "type": "python"},
+        {"path": "b.md", "type": "text"},
+        {"path": "c.json", "type": "data"},
+    ]}
+    assert normalize_targets(scan) == ["a.py", "c.json"]
+    assert normalize_targets(["x.py"]) == ["x.py"]
+
+
+def test_validate_tree_summary(tmp_path):
+    result = ValidatorAgent().validate_tree(str(_project(tmp_path)), workers=1)
+    names = [r["filename"].rsplit("/", 1)[-1] for r in result["files"]]
+    assert names == sorted(names)
+    by_name = dict(zip(names, result["files"]))
+    assert by_name["latin.py"]["ok"]
+    assert not by_name["broken.py"]["ok"]
+    summary = result["summary"]
+    assert summary["empty"] == 1
+    # i warning rendono il file non ok; il file vuoto no
+    assert summary["failed"] == 13
+    assert summary["rules"]["print-call"] == 12
+    assert not result["ok"]
+
+
+def test_pool_matches_in_process(tmp_path, monkeypatch):
+    root = _project(tmp_path)
+    paths = sorted(str(p) for p in root.iterdir() if p.suffix != ".pyc")
+    agent = ValidatorAgent()
+    agent.register_rule(BareExceptRule())
+    serial = agent.validate_many(paths, workers=1)
+
+    monkeypatch.setattr(validator_batch, "POOL_MIN_FILES", 0)
+    pooled = agent.validate_many(paths, workers=2, chunk_size=3)
+    assert [_strip(r) for r in pooled["files"]] == [
+        _strip(r) for r in serial["files"]
+    ]
+    # la regola opt-in arriva anche ai worker
+    assert pooled["summary"]["rules"].get("bare-except") == 1
+    (data,) = [r for r in pooled["files"] if r["filename"].endswith(".json")]
+    assert data["kind"] == "json" and not data["ok"]
+
+
+def test_cache_hits_skip_workers(tmp_path, monkeypatch):
+    root = _project(tmp_path)
+    agent = ValidatorAgent(cache=ValidationCache())
+    first = agent.validate_tree(str(root), workers=1)
+
+    validated = []
+    validate_job = validator_batch._validate_job
+
+    def spy(a, job):
+        validated.append(job[0].rsplit("/", 1)[-1])
+        return validate_job(a, job)
+
+    monkeypatch.setattr(validator_batch, "_validate_job", spy)
+    second = agent.validate_tree(str(root), workers=1)
+    assert second["summary"] == first["summary"]
+    # solo il file vuoto (report con "error", mai in cache) torna ai worker
+    assert validated == ["__init__.py"]
+    assert agent.cache_stats()["hits"] == 15
+
+
+def test_sources_override_disk(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_text("print(1)\n")
+    result = ValidatorAgent().validate_many(
+        [str(path)], workers=1, chunk_size=None
+    )
+    assert result["summary"]["rules"] == {"print-call": 1}
+    reports = list(ValidatorAgent().iter_validate_many(
+        [str(path)], workers=1, sources={str(path): "x = 1\n"}
+    ))
+    assert reports[0]["issues"] == []
+
+
+def test_summary_counts_unreadable():
+    summary = BatchSummary().extend([
+        {"ok": False, "error": "read_failed", "issues": []},
+        {"ok": True, "issues": [{"severity": "warning", "rule": "r"}]},
+    ])
+    data = summary.to_dict()
+    assert (data["files"], data["failed"], data["unreadable"]) == (2, 1, 1)
+    assert data["warnings"] == 1
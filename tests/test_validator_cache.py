@@ -0,0 +1,95 @@
+import sqlite3
+
+import pytest
+
+from ice_ai.agents.domain.validator import ValidatorAgent
+from ice_ai.agents.domain.validator_cache import ValidationCache
+from ice_ai.agents.domain.validator_rules import BareExceptRule
+
+
+CODE = "try:\n    print(1)\nexcept:\n    pass\n"
+
+
+def test_key_depends_on_content_and_fingerprint():
+    key = ValidationCache.key(CODE, "a")
+    assert key == ValidationCache.key(CODE, "a")
+    assert key != ValidationCache.key(CODE, "b")
+    assert key != ValidationCache.key(CODE + "\n", "a")
+
+
+def test_memory_lru_eviction():
+    cache = ValidationCache(max_entries=2)
+    for key in "abc":
+        cache.put(key, True, [])
+    assert cache.get("a") is None
+    assert cache.get("b") == (True, [])
+    cache.put("d", True, [])
+    # "b" è stato letto: esce "c"
+    assert cache.get("c") is None
+    assert cache.get("b") is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 2
+    assert stats["entries"] == 2
+
+
+def test_hits_return_copies():
+    cache = ValidationCache()
+    cache.put("k", False, [{"rule": "x"}])
+    cache.get("k")[1][0]["rule"] = "changed"
+    assert cache.get("k") == (False, [{"rule": "x"}])
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache" / "results.db")
+    first = ValidationCache(path=path)
+    first.put("k", False, [{"rule": "x"}])
+    first.close()
+
+    second = ValidationCache(path=path)
+    assert second.get("k") == (False, [{"rule": "x"}])
+    assert second.get("k") is not None
+    stats = second.stats()
+    assert (stats["disk_hits"], stats["hits"]) == (1, 1)
+    assert stats["disk_bytes"] > 0
+    second.close()
+
+
+def test_disk_eviction_keeps_size_bounded(tmp_path):
+    path = str(tmp_path / "results.db")
+    issues = [{"message": "x" * 200}]
+    cache = ValidationCache(max_entries=1, path=path, max_bytes=2000)
+    for i in range(30):
+        cache.put(f"k{i}", False, issues)
+    stats = cache.stats()
+    assert stats["disk_bytes"] <= 2000
+    assert stats["disk_evictions"] > 0
+    # le voci più recenti restano
+    assert cache.get("k29") is not None
+    assert cache.get("k0") is None
+    cache.close()
+
+    # il totale mantenuto dai trigger coincide con la somma reale
+    db = sqlite3.connect(path)
+    (total,) = db.execute("SELECT SUM(size) FROM results").fetchone()
+    (usage,) = db.execute("SELECT bytes FROM usage").fetchone()
+    db.close()
+    assert total == usage
+
+
+def test_agent_reuses_results_until_rules_change():
+    agent = ValidatorAgent(cache=ValidationCache())
+    first = agent.validate(CODE, filename="a.py")
+    second = agent.validate(CODE, filename="b.py")
+    assert second["issues"] == first["issues"]
+    assert second["filename"] == "b.py"
+    assert agent.cache_stats()["hits"] == 1
+
+    agent.register_rule(BareExceptRule())
+    third = agent.validate(CODE)
+    assert "bare-except" in {i["rule"] for i in third["issues"]}
+    assert agent.cache_stats()["misses"] == 2
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        ValidationCache(max_entries=0)
@@ -0,0 +1,123 @@
+import io
+import time
+
+import pytest
+
+from ice_ai.agents.domain.validator_data import (
+    DataError,
+    data_kind,
+    tomllib,
+    validate_json_stream,
+    validate_toml,
+    validate_yaml_lines,
+)
+
+
+def _json(text, chunk_size=3):
+    # chunk piccoli: i token attraversano i confini dei chunk
+    return validate_json_stream(io.StringIO(text), chunk_size=chunk_size)
+
+
+def _yaml(text):
+    return validate_yaml_lines(iter(io.StringIO(text)))
+
+
+def test_data_kind():
+    assert data_kind("a.json") == "json"
+    assert data_kind("a.yml") == "yaml"
+    assert data_kind("a.toml") == "toml"
+    assert data_kind("a.py") is None
+
+
+# ============================================================
+# JSON
+# ============================================================
+
+def test_json_valid_across_chunks():
+    text = '{"a": [1, 2.5e3, "x\\"y", true, null], "b": {}}'
+    assert _json(text) == {"max_depth": 2}
+    assert _json(text, chunk_size=1) == {"max_depth": 2}
+
+
+@pytest.mark.parametrize("text, message, line, column", [
+    ('{"a": 1,}', "Expected string key", 1, 9),
+    ('{"a":\n  tru}', "Unexpected character 't'", 2, 3),
+    ("[1, 2", "Unexpected end of data", 1, 6),
+    ('"\\u00e9" 1', "Extra data after JSON value", 1, 10),
+    ('\n  ["abc', "Unterminated string", 2, 4),
+    ('["ab\\u00', "Invalid escape in string", 1, 5),
+    ('["ab\\q"]', "Invalid escape in string", 1, 5),
+    ('["ab\x01"]', "Invalid control character in string", 1, 5),
+])
+def test_json_errors_have_positions(text, message, line, column):
+    with pytest.raises(DataError) as info:
+        _json(text)
+    assert (info.value.message, info.value.line, info.value.column) == (
+        message, line, column
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5])
+def test_json_string_states_across_chunks(chunk_size):
+    text = '{"k\\u00e9": "v\\n", "x": ["", "\\\\"]}'
+    assert _json(text, chunk_size) == {"max_depth": 2}
+
+
+def test_json_long_string_is_linear():
+    # il corpo già letto non viene riscandito a ogni chunk:
+    # con il rescan 16 MB richiedevano ~14 s
+    text = '["' + "x" * (16 << 20) + '", 1]'
+    start = time.perf_counter()
+    assert _json(text, chunk_size=64 << 10) == {"max_depth": 1}
+    assert time.perf_counter() - start < 3
+
+
+# ============================================================
+# YAML
+# ============================================================
+
+def test_yaml_valid():
+    assert _yaml("a: 1\nb:\n  - x\n  - y\n") == {"documents": 1, "lines": 4}
+
+
+def test_yaml_anchor_opens_block():
+    text = "base: &base\n  a: 1\nderived:\n  <<: *base\n  b: 2\n"
+    assert _yaml(text)["lines"] == 5
+
+
+def test_yaml_tag_and_anchor_open_block():
+    text = "job: !reference &j\n  script: x\n"
+    assert _yaml(text)["lines"] == 2
+
+
+def test_yaml_block_scalar_is_skipped():
+    assert _yaml("a: |\n  text: : :\n  more\nb: 1\n")["lines"] == 4
+
+
+@pytest.mark.parametrize("text, message, line", [
+    ("a: 1\n\tb: 2\n", "Tab character in indentation", 2),
+    ("a:\n  b: 1\n c: 2\n", "Indentation does not match any outer level", 3),
+    ("a: 'x\n", "Unterminated quoted scalar", 1),
+])
+def test_yaml_errors(text, message, line):
+    with pytest.raises(DataError) as info:
+        _yaml(text)
+    assert (info.value.message, info.value.line) == (message, line)
+
+
+def test_yaml_unclosed_flow_collection():
+    with pytest.raises(DataError) as info:
+        _yaml("a: [1, 2\nb: 3\n")
+    assert info.value.message == "Unclosed flow collection"
+
+
+# ============================================================
+# TOML
+# ============================================================
+
+@pytest.mark.skipif(tomllib is None, reason="tomllib requires Python 3.11+")
+def test_toml():
+    assert validate_toml(io.StringIO("a = 1\n[b]\nc = 2\n")) == {"tables": 2}
+    with pytest.raises(DataError) as info:
+        validate_toml(io.StringIO("a = \n"))
+    assert (info.value.line, info.value.column) == (1, 5)
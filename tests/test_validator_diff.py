@@ -0,0 +1,119 @@
+import os
+
+from conftest import commit_file, run_git
+
+from ice_ai.agents.domain.validator import ValidatorAgent
+from ice_ai.agents.domain.validator_diff import (
+    LineRanges,
+    changes_from_status,
+    new_side,
+    scope_issues,
+)
+
+
+BASE = "".join(f"x{i} = {i}\n" for i in range(10)) + "print(0)\n"
+
+
+def _write(repo, name, text):
+    with open(os.path.join(repo, name), "w", encoding="utf-8") as fh:
+        fh.write(text)
+
+
+def _rules(result):
+    return {
+        os.path.basename(r["filename"]): [i["line"] for i in r["issues"]]
+        for r in result["files"]
+    }
+
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+def test_line_ranges_merge():
+    ranges = LineRanges([(5, 6), (1, 2), (3, 4), (10, 12)])
+    assert ranges.to_list() == [(1, 6), (10, 12)]
+    assert 4 in ranges and 11 in ranges
+    assert 7 not in ranges and 0 not in ranges
+
+
+def test_changes_from_status():
+    status = ["?? new.py", " M mod.py", " D gone.py", "R  a.py -> b.py"]
+    assert list(changes_from_status(status)) == ["new.py", "mod.py", "b.py"]
+    assert list(changes_from_status(status, untracked_only=True)) == ["new.py"]
+
+
+def test_new_side():
+    assert new_side(None, False) is None
+    assert new_side("HEAD~1", False) is None
+    assert new_side(None, True) == ""
+    assert new_side("main...feature", False) == "feature"
+    assert new_side("main..", False) == "HEAD"
+
+
+def test_scope_issues_keeps_syntax_errors():
+    issues = [
+        {"type": "style", "line": 3},
+        {"type": "style", "line": 9},
+        {"type": "syntax", "line": 1},
+    ]
+    kept = scope_issues(issues, LineRanges([(8, 9)]))
+    assert [i["line"] for i in kept] == [9, 1]
+
+
+# ============================================================
+# GIT
+# ============================================================
+
+def test_working_tree_changes(new_repo):
+    commit_file(new_repo, "a.py", 0, BASE)
+    commit_file(new_repo, "b.py", 1, BASE)
+    _write(new_repo, "a.py", BASE + "print(1)\n")
+    _write(new_repo, "c.py", "print(2)\n")
+    _write(new_repo, "notes.txt", "ignored\n")
+    _write(new_repo, "conf.json", '{"a": }')
+
+    agent = ValidatorAgent()
+    full = agent.validate_changes(new_repo)
+    assert full["changed"] == 4
+    assert _rules(full) == {"a.py": [11, 12], "c.py": [1], "conf.json": [1]}
+
+    scoped = agent.validate_changes(new_repo, only_changed_lines=True)
+    assert _rules(scoped) == {"a.py": [12], "c.py": [1], "conf.json": [1]}
+    (a,) = [r for r in scoped["files"] if r["filename"].endswith("a.py")]
+    assert a["changed_lines"] == [(12, 12)]
+
+    tracked = agent.validate_changes(new_repo, include_untracked=False)
+    assert _rules(tracked) == {"a.py": [11, 12]}
+
+
+def test_revision_range_validates_new_side(new_repo):
+    commit_file(new_repo, "a.py", 0, BASE)
+    run_git(new_repo, "checkout", "-q", "-b", "feature")
+    commit_file(new_repo, "a.py", 1, "print(1)\n")
+    run_git(new_repo, "checkout", "-q", "main")
+    # il working tree di main non contiene la modifica di feature
+    result = ValidatorAgent().validate_changes(
+        new_repo, rev="main...feature", only_changed_lines=True
+    )
+    assert _rules(result) == {"a.py": [12]}
+
+
+def test_staged_changes_use_index(new_repo):
+    commit_file(new_repo, "a.py", 0, BASE)
+    _write(new_repo, "a.py", BASE + "print(1)\n")
+    run_git(new_repo, "add", "a.py")
+    # modifica successiva non in stage: non deve contare
+    _write(new_repo, "a.py", BASE + "print(1)\nprint(2)\n")
+    result = ValidatorAgent().validate_changes(
+        new_repo, staged=True, only_changed_lines=True
+    )
+    assert _rules(result) == {"a.py": [12]}
+
+
+def test_deleted_files_are_skipped(new_repo):
+    commit_file(new_repo, "a.py", 0, BASE)
+    os.remove(os.path.join(new_repo, "a.py"))
+    result = ValidatorAgent().validate_changes(new_repo)
+    assert result["files"] == []
+    assert result["ok"]
@@ -0,0 +1,79 @@
+import ast
+import time
+
+from ice_ai.agents.domain.validator import ValidatorAgent
+from ice_ai.agents.domain.validator_cache import ValidationCache
+from ice_ai.agents.domain.validator_metrics import RuleMetrics
+from ice_ai.agents.domain.validator_rules import PrintCallRule, Rule
+
+
+class SlowRule(Rule):
+    name = "slow"
+    node_types = (ast.Name,)
+
+    def check_node(self, node):
+        time.sleep(0.002)
+        return "slow name" if node.id == "x" else None
+
+
+CODE = "x = 1\nprint(x)\n"
+
+
+def _rules(report):
+    return [issue["rule"] for issue in report["issues"]]
+
+
+def test_metrics_count_calls_and_issues():
+    metrics = RuleMetrics()
+    agent = ValidatorAgent([PrintCallRule()], metrics=metrics)
+    agent.validate(CODE)
+    agent.validate(CODE)
+
+    snapshot = agent.rule_metrics()
+    assert snapshot["runs"] == 2
+    assert snapshot["rules"]["print-call"]["calls"] == 2
+    assert snapshot["rules"]["print-call"]["issues"] == 2
+    assert snapshot["disabled"] == []
+
+
+def test_per_report_detail():
+    agent = ValidatorAgent(
+        [PrintCallRule()], metrics=RuleMetrics(per_report=True)
+    )
+    detail = agent.validate(CODE)["rule_metrics"]
+    assert detail["print-call"]["calls"] == 1
+    assert detail["print-call"]["issues"] == 1
+
+
+def test_slow_rule_is_flagged_and_disabled():
+    metrics = RuleMetrics(budget_ms=1, min_runs=2, disable_slow=True)
+    agent = ValidatorAgent([SlowRule(), PrintCallRule()], metrics=metrics)
+
+    assert "slow" in _rules(agent.validate(CODE))
+    agent.validate(CODE)
+    assert metrics.flagged == ["slow"]
+    assert agent.rules.disabled == ("slow",)
+    assert _rules(agent.validate(CODE)) == ["print-call"]
+
+
+def test_disable_during_batch_does_not_poison_cache(tmp_path):
+    paths = []
+    for i in range(6):
+        path = tmp_path / f"m{i}.py"
+        path.write_text(CODE + f"y = {i}\n")
+        paths.append(str(path))
+
+    metrics = RuleMetrics(budget_ms=1, min_runs=1, disable_slow=True)
+    agent = ValidatorAgent(
+        [SlowRule(), PrintCallRule()],
+        cache=ValidationCache(),
+        metrics=metrics,
+    )
+    reports = list(agent.iter_validate_many(paths, workers=1))
+    # il batch prosegue con le regole attive alla chiamata
+    assert all("slow" in _rules(report) for report in reports)
+    assert agent.rules.disabled == ("slow",)
+
+    # il ruleset è cambiato: nessun hit sui risultati calcolati con "slow"
+    later = agent.validate(CODE + "y = 5\n")
+    assert _rules(later) == ["print-call"]
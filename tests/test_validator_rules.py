@@ -0,0 +1,120 @@
+import ast
+
+import pytest
+
+from ice_ai.agents.domain.validator import ValidatorAgent
+from ice_ai.agents.domain.validator_rules import (
+    BareExceptRule,
+    MutableDefaultRule,
+    PrintCallRule,
+    Rule,
+    RuleEngine,
+    TodoCommentRule,
+)
+
+
+CODE = '''\
+def f(a=[]):  # TODO: fix
+    try:
+        print(a)
+    except:
+        pass
+'''
+
+
+class CountingRule(Rule):
+    name = "counting"
+    node_types = (ast.Name,)
+
+    def __init__(self):
+        self.seen = []
+
+    def check_node(self, node):
+        self.seen.append(type(node))
+        return None
+
+
+class LimitRule(Rule):
+    name = "limit"
+    node_types = (ast.Constant,)
+
+    def __init__(self, limit):
+        self.limit = limit
+
+    def config(self):
+        return {"limit": self.limit}
+
+    def check_node(self, node):
+        if isinstance(node.value, int) and node.value > self.limit:
+            return f"{node.value} > {self.limit}"
+        return None
+
+
+def _run(engine, code=CODE):
+    return engine.run(ast.parse(code), code)
+
+
+def test_all_rules_in_one_pass_ordered_by_position():
+    engine = RuleEngine([
+        PrintCallRule(), TodoCommentRule(), BareExceptRule(),
+        MutableDefaultRule(),
+    ])
+    issues = _run(engine)
+    assert [(i["rule"], i["line"]) for i in issues] == [
+        ("mutable-default", 1),
+        ("todo-comment", 1),
+        ("print-call", 3),
+        ("bare-except", 4),
+    ]
+    assert issues[1]["column"] == 15  # 1-based, sul "#"
+
+
+def test_rules_only_see_their_node_types():
+    rule = CountingRule()
+    _run(RuleEngine([rule]))
+    assert set(rule.seen) == {ast.Name}
+    assert len(rule.seen) == 2  # print, a
+
+
+def test_deeply_nested_expression_does_not_recurse():
+    code = "x = " + "(" * 180 + "y" + ")" * 180 + "\nprint(x)\n"
+    issues = _run(RuleEngine([PrintCallRule()]), code)
+    assert [i["line"] for i in issues] == [2]
+
+
+def test_tokenize_skipped_without_markers():
+    engine = RuleEngine([TodoCommentRule()])
+    timings = {}
+    engine.run(ast.parse("x = 1  # nothing\n"), "x = 1  # nothing\n", timings)
+    assert "<tokenize>" not in timings
+
+
+def test_fingerprint_tracks_active_rules_and_config():
+    engine = RuleEngine([PrintCallRule(), LimitRule(3)])
+    base = engine.fingerprint
+    assert RuleEngine([LimitRule(3), PrintCallRule()]).fingerprint == base
+    assert RuleEngine([PrintCallRule(), LimitRule(4)]).fingerprint != base
+
+    assert engine.disable("limit")
+    assert engine.fingerprint != base
+    assert _run(engine, "x = 10\n") == []
+    assert engine.enable("limit")
+    assert engine.fingerprint == base
+    assert [i["message"] for i in _run(engine, "x = 10\n")] == ["10 > 3"]
+
+
+def test_duplicate_and_unnamed_rules_are_rejected():
+    engine = RuleEngine([PrintCallRule()])
+    with pytest.raises(ValueError):
+        engine.register(PrintCallRule())
+    with pytest.raises(ValueError):
+        engine.register(Rule())
+
+
+def test_agent_defaults_and_opt_in_rules():
+    agent = ValidatorAgent()
+    assert {i["rule"] for i in agent.validate(CODE)["issues"]} == {
+        "print-call", "todo-comment"
+    }
+    agent.register_rule(BareExceptRule())
+    assert "bare-except" in {i["rule"] for i in agent.validate(CODE)["issues"]}